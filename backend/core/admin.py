@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Clinic, User, AuditLog, SystemConfiguration
+from .models import Clinic, User, AuditLog, AuditChainHead, SystemConfiguration
 
 @admin.register(Clinic)
 class ClinicAdmin(admin.ModelAdmin):
@@ -11,6 +11,7 @@ class UserAdmin(admin.ModelAdmin):
     list_display = ('username', 'email', 'role', 'clinic', 'is_active')
     list_filter = ('role', 'clinic', 'is_active')
     search_fields = ('username', 'email', 'first_name', 'last_name')
+    filter_horizontal = ('regional_clinics',)
 
 @admin.register(AuditLog)
 class AuditLogAdmin(admin.ModelAdmin):
@@ -19,6 +20,11 @@ class AuditLogAdmin(admin.ModelAdmin):
     search_fields = ('username', 'resource_type')
     readonly_fields = ('timestamp', 'username', 'action', 'resource_type', 'resource_id', 'ip_address', 'changes')
 
+@admin.register(AuditChainHead)
+class AuditChainHeadAdmin(admin.ModelAdmin):
+    list_display = ('chain_id', 'last_sequence', 'updated_at')
+    readonly_fields = ('chain_id', 'last_sequence', 'last_hash', 'updated_at')
+
 @admin.register(SystemConfiguration)
 class SystemConfigurationAdmin(admin.ModelAdmin):
     list_display = ('key', 'updated_at', 'updated_by')
@@ -1,26 +1,33 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.response import Response
+
+from core.conditional import conditional_response, make_etag
+from scheduling.workflow import checkin_workflow
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def clinic_config(request):
     clinic = request.user.clinic
 
-    defaults = {
-    "pre_op": "Pre-Op",
-    "operating_room": "Operating Room",
-    "pacu": "PACU", 
-    "discharged": "Discharged",
-    }
+    def build():
+        defaults = {
+        "pre_op": "Pre-Op",
+        "operating_room": "Operating Room",
+        "pacu": "PACU", 
+        "discharged": "Discharged",
+        }
+
+        labels = defaults.copy()
+        if isinstance(clinic.workflow_labels, dict):
+            labels.update(clinic.workflow_labels)
 
-    labels = defaults.copy()
-    if isinstance(clinic.workflow_labels, dict):
-        labels.update(clinic.workflow_labels)
+        return {
+            "clinic_id": clinic.id,
+            "clinic_name": clinic.name,
+            "timezone": clinic.timezone,
+            "workflow_labels": labels,
+            "workflow": checkin_workflow(clinic),
+        }
 
-    return Response({
-        "clinic_id": clinic.id,
-        "clinic_name": clinic.name,
-        "timezone": clinic.timezone,
-        "workflow_labels": labels,
-    })
+    etag = make_etag("clinic-config", clinic.id, clinic.updated_at.isoformat())
+    return conditional_response(request, etag, build)
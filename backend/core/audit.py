@@ -0,0 +1,441 @@
+"""
+Request-scoped audit context and buffered audit log writer.
+
+While a request is being handled, AuditLog.log_action only records its
+entry on the request's AuditContext; AuditLoggingMiddleware then writes
+one consolidated row per request and resource touched.
+
+Outside requests (and for those consolidated rows) AuditLog.log_action
+hands entries to a per-process AuditWriter instead of inserting them
+inline. Entries are appended to a local spool file first
+(durability), then flushed to the database with bulk_create when the batch
+size or flush interval is reached. The per-clinic tamper-evidence hash
+chains are extended inside each batch, so a flush costs one head lock and
+one INSERT no matter how many entries it carries.
+"""
+
+import atexit
+import contextvars
+import glob
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.prometheus import AUDIT_ENTRIES_WRITTEN, AUDIT_WRITE_TIME
+
+logger = logging.getLogger('core.audit')
+
+_request_context = contextvars.ContextVar('audit_request_context', default=None)
+
+# Fields persisted to the spool file (everything except id and the chain
+# fields, which are assigned at flush time).
+SPOOL_FIELDS = [
+    'user_id',
+    'username',
+    'user_role',
+    'clinic_id',
+    'action',
+    'resource_type',
+    'resource_id',
+    'resource_repr',
+    'timestamp',
+    'ip_address',
+    'user_agent',
+    'reason',
+    'changes',
+    'metadata',
+]
+
+
+class AuditJSONEncoder(DjangoJSONEncoder):
+    """
+    Full-precision timestamps: log_hash covers str(timestamp) with
+    microseconds, which DjangoJSONEncoder would cut to milliseconds.
+    Used for the spool and the cold archives.
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class AuditContext:
+    """
+    Audit information gathered while one request is handled.
+
+    Views add detail either through AuditLog.log_action (collected in
+    entries) or directly via request.audit.enrich(resource_type=...,
+    resource_id=..., changes=...).
+    """
+
+    ENRICHABLE_FIELDS = ('action', 'resource_type', 'resource_id', 'resource_repr', 'reason', 'changes')
+
+    def __init__(self):
+        self.entries = []
+        self.overrides = {}
+
+    def add(self, entry):
+        self.entries.append(entry)
+
+    def enrich(self, **fields):
+        unknown = set(fields) - set(self.ENRICHABLE_FIELDS)
+        if unknown:
+            raise TypeError(f'Unknown audit fields: {sorted(unknown)}')
+        self.overrides.update(fields)
+
+    @property
+    def is_empty(self):
+        return not self.entries and not self.overrides
+
+    def consolidate(self, base):
+        """
+        Merge collected detail into one entry per resource touched.
+
+        base is the middleware's generic entry for the request (user, client
+        IP, path). View entries are grouped by (resource_type, resource_id):
+        the first group fills base, every further group gets its own row
+        (same user, IP and request metadata) so the access report finds it
+        by resource. Later entries for the same resource are kept under that
+        row's metadata['related_events']; enrich() overrides apply to the
+        first row. Returns the entries to write, base first.
+        """
+        groups = {}
+        for extra in self.entries:
+            groups.setdefault((extra.resource_type, extra.resource_id), []).append(extra)
+
+        request_metadata = base.metadata
+        rows = []
+        for index, group in enumerate(groups.values()):
+            entry = base if index == 0 else _copy_entry(base)
+            primary = group[0]
+            for name in self.ENRICHABLE_FIELDS:
+                setattr(entry, name, getattr(primary, name))
+            entry.metadata = {**request_metadata, **(primary.metadata or {})}
+            related = [
+                {
+                    'action': extra.action,
+                    'resource_type': extra.resource_type,
+                    'resource_id': extra.resource_id,
+                    'changes': extra.changes,
+                }
+                for extra in group[1:]
+            ]
+            if related:
+                entry.metadata['related_events'] = related
+            rows.append(entry)
+        if not rows:
+            rows.append(base)
+
+        for name, value in self.overrides.items():
+            setattr(rows[0], name, value)
+        return rows
+
+
+def _copy_entry(entry):
+    from core.models import AuditLog
+
+    return AuditLog(**{name: getattr(entry, name) for name in SPOOL_FIELDS})
+
+
+def begin_request_audit(context):
+    return _request_context.set(context)
+
+
+def end_request_audit(token):
+    _request_context.reset(token)
+
+
+def submit_audit_entry(entry):
+    """Route a new entry: request context if active, else writer/inline save."""
+    context = _request_context.get()
+    if context is not None:
+        context.add(entry)
+        return entry
+
+    # Off the request path: queued, spooled to disk, bulk inserted later
+    if getattr(settings, 'AUDIT_BUFFERED_WRITES', False):
+        return audit_writer.submit(entry)
+
+    entry.save()
+    return entry
+
+
+def write_audit_batch(entries):
+    """
+    Chain and insert a batch of unsaved AuditLog instances in one transaction.
+
+    Entries are grouped by clinic chain. Each chain's head row is locked
+    (in chain_id order, to avoid deadlocks), sequences and hashes are
+    assigned in memory, then rows and heads are written with one bulk
+    INSERT and one bulk UPDATE. Only writers touching the same clinic
+    wait on each other.
+    """
+    if not entries:
+        return []
+
+    with AUDIT_WRITE_TIME.labels('batch').time():
+        created = _write_audit_batch(entries)
+    AUDIT_ENTRIES_WRITTEN.inc(len(created))
+    return created
+
+
+def _write_audit_batch(entries):
+    from core.models import AuditChainHead, AuditLog
+
+    by_chain = {}
+    for entry in entries:
+        entry.chain_id = AuditLog.chain_for_clinic(entry.clinic_id)
+        by_chain.setdefault(entry.chain_id, []).append(entry)
+    chain_ids = sorted(by_chain)
+
+    with transaction.atomic():
+        heads = _lock_chain_heads(chain_ids)
+        missing = [cid for cid in chain_ids if cid not in heads]
+        if missing:
+            AuditChainHead.objects.bulk_create(
+                [AuditChainHead(chain_id=cid) for cid in missing],
+                ignore_conflicts=True,
+            )
+            heads.update(_lock_chain_heads(missing))
+
+        now = timezone.now()
+        for cid in chain_ids:
+            head = heads[cid]
+            for entry in by_chain[cid]:
+                head.last_sequence += 1
+                entry.sequence = head.last_sequence
+                entry.previous_log_hash = head.last_hash
+                entry.log_hash = entry.compute_log_hash()
+                head.last_hash = entry.log_hash
+            head.updated_at = now
+
+        created = AuditLog.objects.bulk_create(entries)
+        AuditChainHead.objects.bulk_update(
+            [heads[cid] for cid in chain_ids],
+            ['last_sequence', 'last_hash', 'updated_at'],
+        )
+        return created
+
+
+def _lock_chain_heads(chain_ids):
+    from core.models import AuditChainHead
+
+    qs = (
+        AuditChainHead.objects.select_for_update()
+        .filter(chain_id__in=chain_ids)
+        .order_by('chain_id')
+    )
+    return {head.chain_id: head for head in qs}
+
+
+class AuditWriter:
+    """
+    Per-process queue of pending audit entries.
+
+    - submit() appends to the spool file and the in-memory queue (no DB I/O)
+    - a daemon thread flushes on size or time trigger
+    - spool segments are deleted only after their batch has committed
+    - spool files left behind by dead processes are replayed on start-up
+    """
+
+    def __init__(self, batch_size=200, flush_interval=2.0, spool_dir=None, fsync=False):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_dir = str(spool_dir) if spool_dir else None
+        self.fsync = fsync
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._reset()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            batch_size=getattr(settings, 'AUDIT_BATCH_SIZE', 200),
+            flush_interval=getattr(settings, 'AUDIT_FLUSH_INTERVAL_SECONDS', 2.0),
+            spool_dir=getattr(settings, 'AUDIT_SPOOL_DIR', None),
+            fsync=getattr(settings, 'AUDIT_SPOOL_FSYNC', False),
+        )
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._pending = []
+        self._sealed = []
+        self._spool_file = None
+        self._segment = 0
+        self._thread = None
+        self._started = False
+
+    # --- public API ---
+
+    def submit(self, entry):
+        """Queue an unsaved AuditLog instance for the next flush."""
+        self._ensure_started()
+
+        with self._lock:
+            self._spool_append(entry)
+            self._pending.append(entry)
+            full = len(self._pending) >= self.batch_size
+
+        if full:
+            self._wakeup.set()
+        return entry
+
+    def flush(self):
+        """Write all pending entries. Returns the number written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                segments = self._seal_spool()
+
+            if not batch:
+                self._remove_segments(segments)
+                return 0
+
+            try:
+                write_audit_batch(batch)
+            except Exception:
+                logger.exception('Audit flush failed; %s entries kept in spool', len(batch))
+                with self._lock:
+                    self._pending[:0] = batch
+                    self._sealed[:0] = segments
+                return 0
+
+            self._remove_segments(segments)
+            return len(batch)
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    # --- background thread ---
+
+    def _ensure_started(self):
+        if self._pid != os.getpid():
+            # Forked worker: inherited queue, locks and thread belong to the parent.
+            self._lock = threading.Lock()
+            self._flush_lock = threading.Lock()
+            self._wakeup = threading.Event()
+            self._reset()
+
+        if self._started:
+            return
+
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            self._recover_spool()
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Audit writer loop error')
+
+    # --- spool handling ---
+
+    def _spool_path(self, suffix='active'):
+        return os.path.join(self.spool_dir, f'audit-{self._pid}.{suffix}.jsonl')
+
+    def _spool_append(self, entry):
+        if not self.spool_dir:
+            return
+        if self._spool_file is None:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            self._spool_file = open(self._spool_path(), 'a', encoding='utf-8')
+
+        record = {name: getattr(entry, name) for name in SPOOL_FIELDS}
+        self._spool_file.write(json.dumps(record, cls=AuditJSONEncoder) + '\n')
+        self._spool_file.flush()
+        if self.fsync:
+            os.fsync(self._spool_file.fileno())
+
+    def _seal_spool(self):
+        """Close the active spool segment and return all sealed segments."""
+        if self._spool_file is not None:
+            self._spool_file.close()
+            self._spool_file = None
+            self._segment += 1
+            sealed_path = self._spool_path(f'sealed-{self._segment}')
+            os.replace(self._spool_path(), sealed_path)
+            self._sealed.append(sealed_path)
+
+        segments, self._sealed = self._sealed, []
+        return segments
+
+    def _remove_segments(self, segments):
+        for path in segments:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _recover_spool(self):
+        """Adopt spool files from processes that exited before flushing."""
+        from core.models import AuditLog
+
+        if not self.spool_dir or not os.path.isdir(self.spool_dir):
+            return
+
+        for path in sorted(glob.glob(os.path.join(self.spool_dir, 'audit-*.jsonl'))):
+            owner = os.path.basename(path).split('.')[0].split('-', 1)[1]
+            if owner.isdigit() and int(owner) != self._pid and _pid_alive(int(owner)):
+                continue
+
+            self._segment += 1
+            claimed = self._spool_path(f'sealed-{self._segment}')
+            try:
+                os.replace(path, claimed)
+            except FileNotFoundError:
+                # Another worker claimed it first.
+                continue
+
+            recovered = 0
+            with open(claimed, encoding='utf-8') as fh:
+                for line in fh:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn final line from a crash mid-write.
+                        logger.warning('Skipping unreadable audit spool line in %s', path)
+                        continue
+                    record['timestamp'] = parse_datetime(record['timestamp'])
+                    self._pending.append(AuditLog(**record))
+                    recovered += 1
+
+            self._sealed.append(claimed)
+            logger.warning('Recovered %s audit entries from %s', recovered, path)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+audit_writer = AuditWriter.from_settings()
+atexit.register(audit_writer.flush)
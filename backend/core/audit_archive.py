@@ -0,0 +1,203 @@
+"""
+Monthly partition maintenance, cold archive and unified search for audit_logs.
+
+- ensure_partitions() creates upcoming monthly partitions ahead of time
+- archive_partition() streams one month to a JSONL.gz file, records it in
+  AuditArchive, then detaches and drops the partition
+- search_audit_logs() reads archived months and hot partitions as one
+  chronological stream, so callers don't care where a row lives
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+
+from core.audit import AuditJSONEncoder
+from core.models import AuditArchive, AuditLog
+
+PARTITION_PREFIX = 'audit_logs_p'
+PARTITION_RE = re.compile(r'^audit_logs_p(\d{4})(\d{2})$')
+
+ARCHIVE_FIELDS = [
+    'id', 'chain_id', 'sequence', 'user_id', 'username', 'user_role', 'clinic_id',
+    'action', 'resource_type', 'resource_id', 'resource_repr', 'timestamp',
+    'ip_address', 'user_agent', 'reason', 'changes', 'metadata',
+    'previous_log_hash', 'log_hash',
+]
+
+
+def month_start(dt):
+    return datetime(dt.year, dt.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(dt, months):
+    index = dt.year * 12 + dt.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(start):
+    return f'{PARTITION_PREFIX}{start:%Y%m}'
+
+
+def list_partitions():
+    """Return [(name, period_start)] for attached monthly partitions, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [AuditLog._meta.db_table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            start = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=dt_timezone.utc)
+            partitions.append((name, start))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def ensure_partitions(months_ahead=3, now=None):
+    """Create monthly partitions from the current month through months_ahead."""
+    current = month_start(now or datetime.now(dt_timezone.utc))
+    existing = {name for name, _ in list_partitions()}
+    created = []
+
+    with connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            start = add_months(current, offset)
+            name = partition_name(start)
+            if name in existing:
+                continue
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{AuditLog._meta.db_table}" '
+                'FOR VALUES FROM (%s) TO (%s)',
+                [start, add_months(start, 1)],
+            )
+            created.append(name)
+    return created
+
+
+def archive_path(name):
+    archive_dir = str(getattr(settings, 'AUDIT_ARCHIVE_DIR', settings.BASE_DIR / 'audit_archive'))
+    os.makedirs(archive_dir, exist_ok=True)
+    return os.path.join(archive_dir, f'{name}.jsonl.gz')
+
+
+def archive_partition(name, start, chain_checkpoints, chunk_size=5000):
+    """
+    Move one monthly partition into a compressed archive file.
+
+    The file is written and re-read (row count + SHA-256) before the
+    partition is detached and dropped in the same transaction that
+    records the AuditArchive row.
+    """
+    end = add_months(start, 1)
+    path = archive_path(name)
+    tmp_path = f'{path}.tmp'
+
+    rows = (
+        AuditLog.objects.filter(timestamp__gte=start, timestamp__lt=end)
+        .order_by('timestamp', 'id')
+        .values(*ARCHIVE_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+
+    row_count = 0
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as fh:
+        for row in rows:
+            fh.write(json.dumps(row, cls=AuditJSONEncoder) + '\n')
+            row_count += 1
+
+    digest = hashlib.sha256()
+    reread = 0
+    with open(tmp_path, 'rb') as raw:
+        for block in iter(lambda: raw.read(1024 * 1024), b''):
+            digest.update(block)
+    with gzip.open(tmp_path, 'rt', encoding='utf-8') as fh:
+        for _ in fh:
+            reread += 1
+    if reread != row_count:
+        os.remove(tmp_path)
+        raise RuntimeError(f'{name}: archive wrote {row_count} rows but re-read {reread}')
+
+    os.replace(tmp_path, path)
+
+    with transaction.atomic():
+        archive = AuditArchive.objects.create(
+            partition_name=name,
+            period_start=start,
+            period_end=end,
+            file_path=path,
+            row_count=row_count,
+            sha256=digest.hexdigest(),
+            chain_checkpoints=chain_checkpoints,
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE "{AuditLog._meta.db_table}" DETACH PARTITION "{name}"')
+            cursor.execute(f'DROP TABLE "{name}"')
+    return archive
+
+
+def iter_archive_rows(archive):
+    with gzip.open(archive.file_path, 'rt', encoding='utf-8') as fh:
+        for line in fh:
+            row = json.loads(line)
+            row['timestamp'] = parse_datetime(row['timestamp'])
+            yield row
+
+
+def search_audit_logs(clinic_id=None, user_id=None, action=None, resource_type=None,
+                      resource_id=None, start=None, end=None, chunk_size=2000):
+    """
+    Yield audit rows (dicts with ARCHIVE_FIELDS) ordered by (timestamp, id)
+    across archived months and the hot table. start is inclusive, end exclusive.
+    resource_type may be a single type or a list of types.
+    """
+    filters = {
+        'clinic_id': clinic_id,
+        'user_id': user_id,
+        'action': action,
+        'resource_id': int(resource_id) if resource_id not in (None, '') else None,
+    }
+    filters = {k: v for k, v in filters.items() if v is not None}
+    resource_types = [resource_type] if isinstance(resource_type, str) else resource_type
+
+    archives = AuditArchive.objects.all()
+    if start:
+        archives = archives.filter(period_end__gt=start)
+    if end:
+        archives = archives.filter(period_start__lt=end)
+
+    for archive in archives.order_by('period_start'):
+        for row in iter_archive_rows(archive):
+            if start and row['timestamp'] < start:
+                continue
+            if end and row['timestamp'] >= end:
+                continue
+            if resource_types and row['resource_type'] not in resource_types:
+                continue
+            if all(row.get(k) == v for k, v in filters.items()):
+                yield row
+
+    hot = AuditLog.objects.filter(**filters)
+    if resource_types:
+        hot = hot.filter(resource_type__in=resource_types)
+    if start:
+        hot = hot.filter(timestamp__gte=start)
+    if end:
+        hot = hot.filter(timestamp__lt=end)
+    yield from hot.order_by('timestamp', 'id').values(*ARCHIVE_FIELDS).iterator(chunk_size=chunk_size)
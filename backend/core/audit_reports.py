@@ -0,0 +1,207 @@
+"""
+HIPAA access reports over AuditLog ("who viewed patient X", "what did user Y touch").
+
+- access_report: JSON, newest first, keyset-paginated on (timestamp, id)
+- access_report_export: streamed CSV of the whole report, including
+  months already moved to the cold archive
+
+Both are clinic-scoped and themselves audited.
+"""
+
+import base64
+import csv
+from datetime import datetime, time
+from zoneinfo import ZoneInfo
+
+from django.db.models import Q
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import BasePermission, IsAuthenticated
+from rest_framework.response import Response
+
+from core.audit_archive import search_audit_logs
+from core.models import AuditLog
+from core.streaming import streaming_response
+
+# Audit resource types that carry a patient id in resource_id
+PATIENT_RESOURCE_TYPES = ['patient', 'patient_export_json', 'patient_export_fhir']
+
+REPORT_FIELDS = [
+    'id', 'timestamp', 'username', 'user_role', 'action',
+    'resource_type', 'resource_id', 'resource_repr', 'ip_address', 'reason',
+]
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+class CanViewAuditLog(BasePermission):
+    """Clinic administrators and users granted core.view_audit_log."""
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(
+            user and user.is_authenticated
+            and (getattr(user, 'role', '') == 'admin' or user.has_perm('core.view_audit_log'))
+        )
+
+
+class ReportParamError(ValueError):
+    pass
+
+
+def _parse_bound(value, clinic_tz, end_of_day=False):
+    """ISO datetime, or a date interpreted in clinic-local time."""
+    if not value:
+        return None
+    dt = parse_datetime(value)
+    if dt:
+        return dt if dt.tzinfo else dt.replace(tzinfo=clinic_tz)
+    d = parse_date(value)
+    if d:
+        return datetime.combine(d, time.max if end_of_day else time.min).replace(tzinfo=clinic_tz)
+    raise ReportParamError(f'Invalid date: {value}')
+
+
+def _report_filters(request):
+    """Translate query params into search_audit_logs-style filters."""
+    params = request.query_params
+    clinic = request.user.clinic
+    clinic_tz = ZoneInfo(getattr(clinic, 'timezone', None) or 'America/Chicago')
+
+    filters = {'clinic_id': clinic.id}
+
+    patient = params.get('patient')
+    resource_type = params.get('resource_type')
+    resource_id = params.get('resource_id')
+    if patient:
+        filters['resource_type'] = PATIENT_RESOURCE_TYPES
+        resource_id = patient
+    elif resource_type:
+        filters['resource_type'] = [resource_type]
+    if resource_id:
+        if not str(resource_id).isdigit():
+            raise ReportParamError('patient/resource_id must be an integer')
+        filters['resource_id'] = int(resource_id)
+
+    user_id = params.get('user')
+    if user_id:
+        if not str(user_id).isdigit():
+            raise ReportParamError('user must be an integer')
+        filters['user_id'] = int(user_id)
+
+    if params.get('action'):
+        filters['action'] = params['action']
+
+    filters['start'] = _parse_bound(params.get('start'), clinic_tz)
+    # end is inclusive for dates (whole day), exclusive for datetimes
+    end = _parse_bound(params.get('end'), clinic_tz, end_of_day=True)
+    filters['end'] = end
+    return filters
+
+
+def encode_cursor(timestamp, pk):
+    raw = f'{timestamp.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        ts, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        timestamp = parse_datetime(ts)
+        if timestamp is None:
+            raise ValueError
+        return timestamp, int(pk)
+    except (ValueError, UnicodeDecodeError):
+        raise ReportParamError('Invalid cursor')
+
+
+def _audit_report_access(request, action, filters):
+    AuditLog.log_action(
+        user=request.user,
+        action=action,
+        resource_type='audit_access_report',
+        changes={k: (v.isoformat() if hasattr(v, 'isoformat') else v) for k, v in filters.items() if v},
+        ip_address=request.META.get('REMOTE_ADDR', ''),
+        user_agent=request.META.get('HTTP_USER_AGENT', ''),
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, CanViewAuditLog])
+def access_report(request):
+    """
+    Query params: patient | resource_type + resource_id, user, action,
+    start, end (ISO datetime or YYYY-MM-DD), cursor, page_size.
+
+    Serves the hot audit table; use the CSV export for ranges that reach
+    into archived months.
+    """
+    try:
+        filters = _report_filters(request)
+        cursor = request.query_params.get('cursor')
+        position = decode_cursor(cursor) if cursor else None
+        page_size = max(1, min(int(request.query_params.get('page_size') or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+    except (ReportParamError, ValueError) as exc:
+        return Response({'detail': str(exc)}, status=400)
+
+    qs = AuditLog.objects.filter(clinic_id=filters['clinic_id'])
+    if filters.get('resource_type'):
+        qs = qs.filter(resource_type__in=filters['resource_type'])
+    if 'resource_id' in filters:
+        qs = qs.filter(resource_id=filters['resource_id'])
+    if 'user_id' in filters:
+        qs = qs.filter(user_id=filters['user_id'])
+    if 'action' in filters:
+        qs = qs.filter(action=filters['action'])
+    if filters['start']:
+        qs = qs.filter(timestamp__gte=filters['start'])
+    if filters['end']:
+        qs = qs.filter(timestamp__lt=filters['end'])
+
+    if position:
+        ts, pk = position
+        # (timestamp, id) < (ts, pk); the timestamp__lte bound keeps it an index range scan
+        qs = qs.filter(timestamp__lte=ts).filter(Q(timestamp__lt=ts) | Q(id__lt=pk))
+
+    rows = list(qs.order_by('-timestamp', '-id').values(*REPORT_FIELDS)[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if not cursor:
+        _audit_report_access(request, 'read', filters)
+
+    return Response({
+        'results': rows,
+        'next_cursor': encode_cursor(rows[-1]['timestamp'], rows[-1]['id']) if has_more else None,
+    })
+
+
+class _Echo:
+    """File-like object whose write() returns the line for streaming."""
+
+    def write(self, value):
+        return value
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, CanViewAuditLog])
+def access_report_export(request):
+    """Stream the full report as CSV (oldest first), archived months included."""
+    try:
+        filters = _report_filters(request)
+    except ReportParamError as exc:
+        return Response({'detail': str(exc)}, status=400)
+
+    _audit_report_access(request, 'export', filters)
+
+    writer = csv.writer(_Echo())
+
+    def rows():
+        yield writer.writerow(REPORT_FIELDS)
+        for row in search_audit_logs(**filters):
+            yield writer.writerow([row[f] for f in REPORT_FIELDS])
+
+    response = streaming_response(request, rows(), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="access-report.csv"'
+    return response
@@ -0,0 +1,37 @@
+"""
+ETag / 304 support for polled DRF endpoints.
+
+The ETag is computed from something cheap (a per-clinic data version, a
+row's updated_at) before any queryset is evaluated or serialized, so an
+unchanged poll costs only that lookup.
+"""
+
+import hashlib
+
+from django.utils.http import parse_etags
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    """Strong ETag from identifying parts (endpoint, clinic, version, ...)."""
+    raw = ':'.join(str(part) for part in parts)
+    return '"%s"' % hashlib.sha1(raw.encode()).hexdigest()
+
+
+def conditional_response(request, etag, build):
+    """
+    304 Not Modified if the client's If-None-Match covers etag, otherwise
+    Response(build()). Both carry the ETag; clients must revalidate.
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        client_etags = parse_etags(if_none_match)
+        if '*' in client_etags or etag in client_etags:
+            response = Response(status=304)
+        else:
+            response = Response(build())
+    else:
+        response = Response(build())
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
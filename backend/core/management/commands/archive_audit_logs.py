@@ -0,0 +1,90 @@
+"""
+Maintain audit_logs partitions and move old months to cold archive files.
+
+Runs monthly as core.tasks.maintain_audit_partitions (CELERY_BEAT_SCHEDULE);
+it can also be run by hand or from cron:
+    python manage.py archive_audit_logs
+    python manage.py archive_audit_logs --older-than-months 36 --dry-run
+
+Steps:
+1. create monthly partitions ahead of time
+2. bring verify_audit_chain checkpoints up to date
+3. archive every partition older than the retention window whose rows are
+   all covered by a verified checkpoint, recording each chain's last row
+   in that partition (where verify_audit_chain --full starts afterwards)
+"""
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from core.audit_archive import add_months, archive_partition, ensure_partitions, list_partitions, month_start
+from core.management.commands.verify_audit_chain import LEGACY_CHAIN, load_checkpoints
+
+
+class Command(BaseCommand):
+    help = 'Create upcoming audit_logs partitions and archive partitions past the hot retention window.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-months', type=int,
+                            default=getattr(settings, 'AUDIT_HOT_RETENTION_MONTHS', 24),
+                            help='Archive partitions that ended more than this many months ago.')
+        parser.add_argument('--months-ahead', type=int, default=3,
+                            help='Create partitions this many months ahead.')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('audit_logs partitioning requires PostgreSQL')
+
+        if not options['dry_run']:
+            for name in ensure_partitions(options['months_ahead']):
+                self.stdout.write(f'Created partition {name}')
+
+        cutoff = add_months(month_start(timezone.now()), -options['older_than_months'])
+        candidates = [(name, start) for name, start in list_partitions() if add_months(start, 1) <= cutoff]
+        if not candidates:
+            self.stdout.write('No partitions past the retention window.')
+            return
+
+        if options['dry_run']:
+            for name, _ in candidates:
+                self.stdout.write(f'Would archive {name}')
+            return
+
+        # Raises CommandError if any chain fails; nothing is archived then.
+        call_command('verify_audit_chain', stdout=self.stdout, stderr=self.stderr)
+        checkpoints = load_checkpoints()
+
+        for name, start in candidates:
+            archived = self._partition_checkpoints(name)
+            uncovered = [
+                chain for chain, last in archived.items()
+                if last['position'] > ((checkpoints.get(chain) or {}).get('position') or 0)
+            ]
+            if uncovered:
+                raise CommandError(f'{name}: rows beyond verified checkpoint in chain(s) {uncovered}')
+
+            snapshot = {str(chain): last for chain, last in archived.items()}
+            archive = archive_partition(name, start, snapshot)
+            self.stdout.write(self.style.SUCCESS(
+                f'Archived {name}: {archive.row_count} rows -> {archive.file_path}'
+            ))
+
+    def _partition_checkpoints(self, name):
+        """{chain: {'position', 'last_hash'}} of each chain's last row in the partition."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT DISTINCT ON (chain_id) chain_id, sequence, id, log_hash FROM "{name}" '
+                'ORDER BY chain_id, sequence DESC NULLS LAST, id DESC'
+            )
+            rows = cursor.fetchall()
+
+        checkpoints = {}
+        for chain_id, sequence, row_id, log_hash in rows:
+            chain = LEGACY_CHAIN if chain_id is None else chain_id
+            position = row_id if chain == LEGACY_CHAIN else sequence
+            checkpoints[chain] = {'position': position, 'last_hash': log_hash}
+        return checkpoints
@@ -0,0 +1,203 @@
+"""
+Verify the tamper-evidence hash chains in audit_logs.
+
+Each chain (one per clinic, plus the legacy pre-sequence chain) is read
+in chain order through a server-side cursor and every log_hash is
+recomputed. Progress is checkpointed in SystemConfiguration so later runs
+only verify rows appended since the last successful run. Independent
+chains can be verified in parallel with --workers. Rows moved to cold
+archives (archive_audit_logs) are verified before they leave the table.
+
+Usage:
+    python manage.py verify_audit_chain
+    python manage.py verify_audit_chain --workers 4
+    python manage.py verify_audit_chain --chain 12 --full
+"""
+
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from core.models import AuditArchive, AuditLog, SystemConfiguration
+
+LEGACY_CHAIN = 'legacy'
+CHECKPOINT_KEY_PREFIX = 'audit_chain_checkpoint:'
+
+ROW_FIELDS = (
+    'id', 'sequence', 'username', 'action', 'resource_type', 'resource_id',
+    'timestamp', 'previous_log_hash', 'log_hash',
+)
+
+
+def _chain_rows(chain, after, chunk_size):
+    """Stream rows of one chain in chain order, after the checkpoint position."""
+    if chain == LEGACY_CHAIN:
+        qs = AuditLog.objects.filter(chain_id__isnull=True).order_by('id')
+        if after:
+            qs = qs.filter(id__gt=after)
+    else:
+        qs = AuditLog.objects.filter(chain_id=chain).order_by('sequence')
+        if after:
+            qs = qs.filter(sequence__gt=after)
+    return qs.values_list(*ROW_FIELDS).iterator(chunk_size=chunk_size)
+
+
+def verify_chain(chain, checkpoint=None, chunk_size=5000):
+    """
+    Verify one chain from its checkpoint.
+
+    Returns {'chain', 'verified', 'position', 'last_hash', 'error'}; position
+    and last_hash describe the last row that verified cleanly.
+    """
+    position = (checkpoint or {}).get('position') or 0
+    expected_prev = (checkpoint or {}).get('last_hash') or ''
+    verified = 0
+    error = None
+
+    for row_id, sequence, username, action, resource_type, resource_id, ts, prev_hash, log_hash in _chain_rows(
+        chain, position, chunk_size
+    ):
+        if prev_hash != expected_prev:
+            error = f'row {row_id}: previous_log_hash does not match the preceding entry'
+            break
+
+        if chain == LEGACY_CHAIN:
+            # Rows written before timestamps were set at log time were
+            # hashed with an empty (None) timestamp.
+            candidates = (
+                AuditLog.hash_entry(username, action, resource_type, resource_id, ts, prev_hash),
+                AuditLog.hash_entry(username, action, resource_type, resource_id, None, prev_hash),
+            )
+            next_position = row_id
+        else:
+            if sequence != position + 1:
+                error = f'row {row_id}: sequence {sequence} follows {position} (gap or reorder)'
+                break
+            candidates = (
+                AuditLog.hash_entry(username, action, resource_type, resource_id, ts, prev_hash, chain, sequence),
+            )
+            next_position = sequence
+
+        if log_hash not in candidates:
+            error = f'row {row_id}: log_hash does not match row contents'
+            break
+
+        position = next_position
+        expected_prev = log_hash
+        verified += 1
+
+    connections.close_all()
+    return {
+        'chain': chain,
+        'verified': verified,
+        'position': position,
+        'last_hash': expected_prev,
+        'error': error,
+    }
+
+
+def load_checkpoints(chains=None):
+    """Saved checkpoints as {chain: {'position', 'last_hash', ...}}."""
+    qs = SystemConfiguration.objects.filter(key__startswith=CHECKPOINT_KEY_PREFIX)
+    checkpoints = {}
+    for key, value in qs.values_list('key', 'value'):
+        chain = key[len(CHECKPOINT_KEY_PREFIX):]
+        chain = chain if chain == LEGACY_CHAIN else int(chain)
+        if chains is None or chain in chains:
+            checkpoints[chain] = json.loads(value)
+    return checkpoints
+
+
+def archived_checkpoints():
+    """
+    Per chain, the last row moved to a cold archive. Rows up to these
+    positions were verified before they left the database, so a full
+    re-verification starts right after them.
+    """
+    checkpoints = {}
+    for archive in AuditArchive.objects.order_by('period_start'):
+        for chain, checkpoint in archive.chain_checkpoints.items():
+            checkpoints[chain if chain == LEGACY_CHAIN else int(chain)] = checkpoint
+    return checkpoints
+
+
+def _verify_chain_job(args):
+    return verify_chain(*args)
+
+
+class Command(BaseCommand):
+    help = 'Verify audit log hash chains (incremental, checkpointed).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chain', action='append', default=None,
+                            help="Chain id to verify (clinic id, 0, or 'legacy'); repeatable.")
+        parser.add_argument('--full', action='store_true',
+                            help='Ignore checkpoints and re-verify every row still in the database.')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Verify independent chains in this many processes.')
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Rows fetched per server-side cursor round trip.')
+
+    def handle(self, *args, **options):
+        chains = options['chain'] or self._all_chains()
+        chains = [c if c == LEGACY_CHAIN else int(c) for c in chains]
+
+        checkpoints = archived_checkpoints() if options['full'] else load_checkpoints(chains)
+        jobs = [(chain, checkpoints.get(chain), options['chunk_size']) for chain in chains]
+
+        if options['workers'] > 1 and len(jobs) > 1:
+            # Children must not share the parent's DB connection.
+            connections.close_all()
+            ctx = multiprocessing.get_context('fork')
+            with ProcessPoolExecutor(max_workers=options['workers'], mp_context=ctx) as pool:
+                results = list(pool.map(_verify_chain_job, jobs))
+        else:
+            results = [_verify_chain_job(job) for job in jobs]
+
+        failures = []
+        total = 0
+        for result in results:
+            total += result['verified']
+            self._save_checkpoint(result)
+            if result['error']:
+                failures.append(result)
+                self.stderr.write(self.style.ERROR(f"chain {result['chain']}: {result['error']}"))
+            else:
+                self.stdout.write(
+                    f"chain {result['chain']}: {result['verified']} new rows OK (position {result['position']})"
+                )
+
+        if failures:
+            raise CommandError(f'{len(failures)} audit chain(s) failed verification')
+
+        self.stdout.write(self.style.SUCCESS(f'Verified {total} audit rows across {len(results)} chain(s)'))
+
+    def _all_chains(self):
+        chains = list(
+            AuditLog.objects.filter(chain_id__isnull=False)
+            .values_list('chain_id', flat=True)
+            .distinct()
+            .order_by('chain_id')
+        )
+        if AuditLog.objects.filter(chain_id__isnull=True).exists():
+            chains.insert(0, LEGACY_CHAIN)
+        return chains
+
+    def _save_checkpoint(self, result):
+        if not result['position']:
+            return
+        SystemConfiguration.objects.update_or_create(
+            key=f"{CHECKPOINT_KEY_PREFIX}{result['chain']}",
+            defaults={
+                'value': json.dumps({
+                    'position': result['position'],
+                    'last_hash': result['last_hash'],
+                    'verified_at': timezone.now().isoformat(),
+                }),
+                'description': 'Last verified position of an audit hash chain (verify_audit_chain).',
+            },
+        )
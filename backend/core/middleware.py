@@ -1,39 +1,81 @@
 """
-Custom middleware for audit logging.
+Custom middleware for audit logging and request metrics.
 """
 
+import time
+
+from django.db import connection
+
+from core.audit import AuditContext, begin_request_audit, end_request_audit, submit_audit_entry
 from core.models import AuditLog
+from core.prometheus import AUDIT_WRITE_TIME, QueryStats, observe_request
+
+
+class PrometheusMetricsMiddleware:
+    """
+    Record latency, SQL count/time and response size per route.
+    Listed first in MIDDLEWARE so the timings cover the whole stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = QueryStats()
+        start = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        observe_request(request, response, time.perf_counter() - start, queries)
+        return response
 
 
 class AuditLoggingMiddleware:
     """
     Middleware to log all requests (for HIPAA compliance).
+
+    Each request gets an AuditContext (request.audit). Audit entries the
+    view logs are collected there, and one consolidated audit row per
+    resource touched is written once the response is ready.
     """
-    
+
+    MUTATING_METHODS = ['POST', 'PUT', 'PATCH', 'DELETE']
+    METHOD_ACTIONS = {'PUT': 'update', 'PATCH': 'update', 'GET': 'read', 'HEAD': 'read'}
+
     def __init__(self, get_response):
         self.get_response = get_response
     
     def __call__(self, request):
-        response = self.get_response(request)
-        
-        # Log the request if user is authenticated
-        if request.user.is_authenticated:
-            # Get IP address
-            ip_address = self.get_client_ip(request)
-            
-            # Log the action (simplified for now)
-            # In production, you'd log more specific actions
-            if request.method in ['POST', 'PUT', 'PATCH', 'DELETE']:
-                action = 'update' if request.method in ['PUT', 'PATCH'] else request.method.lower()
-                
-                AuditLog.log_action(
-                    user=request.user,
-                    action=action,
-                    resource_type='web_request',
-                    ip_address=ip_address,
-                    user_agent=request.META.get('HTTP_USER_AGENT', ''),
-                    metadata={'path': request.path, 'method': request.method}
-                )
+        context = AuditContext()
+        request.audit = context
+        token = begin_request_audit(context)
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request_audit(token)
+
+        if not request.user.is_authenticated:
+            # e.g. failed logins logged by a view: keep them as-is
+            for entry in context.entries:
+                submit_audit_entry(entry)
+            return response
+
+        if request.method in self.MUTATING_METHODS or not context.is_empty:
+            action = self.METHOD_ACTIONS.get(request.method, request.method.lower())
+            base = AuditLog.build_entry(
+                user=request.user,
+                action=action,
+                resource_type='web_request',
+                ip_address=self.get_client_ip(request),
+                user_agent=request.META.get('HTTP_USER_AGENT', ''),
+                metadata={
+                    'path': request.path,
+                    'method': request.method,
+                    'status_code': response.status_code,
+                },
+            )
+            with AUDIT_WRITE_TIME.labels('request').time():
+                for entry in context.consolidate(base):
+                    submit_audit_entry(entry)
         
         return response
     
@@ -0,0 +1,41 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_auditlog_timestamp_default"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuditChainHead",
+            fields=[
+                ("chain_id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("last_sequence", models.BigIntegerField(default=0)),
+                ("last_hash", models.CharField(blank=True, max_length=64)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table": "audit_chain_heads",
+            },
+        ),
+        migrations.AddField(
+            model_name="auditlog",
+            name="chain_id",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="auditlog",
+            name="sequence",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name="auditlog",
+            constraint=models.UniqueConstraint(
+                fields=("chain_id", "sequence"), name="audit_logs_chain_sequence_uniq"
+            ),
+        ),
+    ]
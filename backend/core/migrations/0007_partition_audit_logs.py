@@ -0,0 +1,118 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:18
+
+from django.db import migrations, models
+
+
+# Rebuild audit_logs as a table range-partitioned by month on "timestamp".
+# Existing rows are copied into monthly partitions; partitions are created
+# three months ahead (core.audit_archive.ensure_partitions keeps it so).
+# Index and constraint names match the Django model state.
+PARTITION_AUDIT_LOGS_SQL = """
+ALTER TABLE audit_logs RENAME TO audit_logs_unpartitioned;
+
+CREATE TABLE audit_logs (
+    LIKE audit_logs_unpartitioned INCLUDING DEFAULTS INCLUDING IDENTITY
+) PARTITION BY RANGE ("timestamp");
+
+CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT;
+
+DO $$
+DECLARE
+    month_start timestamp := date_trunc(
+        'month', COALESCE((SELECT min("timestamp") FROM audit_logs_unpartitioned), now()) AT TIME ZONE 'UTC'
+    );
+    last_month timestamp := date_trunc('month', now() AT TIME ZONE 'UTC') + interval '3 months';
+BEGIN
+    WHILE month_start <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+            'audit_logs_p' || to_char(month_start, 'YYYYMM'),
+            month_start AT TIME ZONE 'UTC',
+            (month_start + interval '1 month') AT TIME ZONE 'UTC'
+        );
+        month_start := month_start + interval '1 month';
+    END LOOP;
+END $$;
+
+INSERT INTO audit_logs SELECT * FROM audit_logs_unpartitioned;
+
+SELECT setval(
+    pg_get_serial_sequence('audit_logs', 'id'),
+    COALESCE((SELECT max(id) FROM audit_logs), 0) + 1,
+    false
+);
+
+DROP TABLE audit_logs_unpartitioned;
+
+ALTER TABLE audit_logs ADD CONSTRAINT audit_logs_pkey PRIMARY KEY (id, "timestamp");
+
+CREATE INDEX audit_logs_timestamp_f7429021 ON audit_logs ("timestamp");
+CREATE INDEX audit_logs_user_id_752b0e2b ON audit_logs (user_id);
+CREATE INDEX audit_logs_clinic_id_3304a291 ON audit_logs (clinic_id);
+CREATE INDEX audit_logs_timesta_423be6_idx ON audit_logs ("timestamp");
+CREATE INDEX audit_logs_user_id_88267f_idx ON audit_logs (user_id, "timestamp");
+CREATE INDEX audit_logs_resourc_bda8a6_idx ON audit_logs (resource_type, resource_id);
+CREATE INDEX audit_logs_action_474804_idx ON audit_logs (action, "timestamp");
+CREATE INDEX audit_logs_clinic__4d55c9_idx ON audit_logs (clinic_id, "timestamp");
+CREATE INDEX audit_logs_chain_sequence_idx ON audit_logs (chain_id, sequence);
+
+ALTER TABLE audit_logs
+    ADD CONSTRAINT audit_logs_user_id_752b0e2b_fk_users_id
+    FOREIGN KEY (user_id) REFERENCES users (id) DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE audit_logs
+    ADD CONSTRAINT audit_logs_clinic_id_3304a291_fk_clinics_id
+    FOREIGN KEY (clinic_id) REFERENCES clinics (id) DEFERRABLE INITIALLY DEFERRED;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_audit_clinic_chains"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuditArchive",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("partition_name", models.CharField(max_length=63, unique=True)),
+                ("period_start", models.DateTimeField()),
+                ("period_end", models.DateTimeField()),
+                ("file_path", models.CharField(max_length=500)),
+                ("row_count", models.BigIntegerField()),
+                ("sha256", models.CharField(max_length=64)),
+                ("chain_checkpoints", models.JSONField(default=dict)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "db_table": "audit_archives",
+                "ordering": ["period_start"],
+            },
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveConstraint(
+                    model_name="auditlog",
+                    name="audit_logs_chain_sequence_uniq",
+                ),
+                migrations.AddIndex(
+                    model_name="auditlog",
+                    index=models.Index(
+                        fields=["chain_id", "sequence"], name="audit_logs_chain_sequence_idx"
+                    ),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(PARTITION_AUDIT_LOGS_SQL),
+            ],
+        ),
+    ]
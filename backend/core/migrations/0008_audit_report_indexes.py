@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_partition_audit_logs"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(
+                fields=["clinic", "resource_type", "resource_id", "timestamp", "id"],
+                name="audit_logs_report_resource_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="auditlog",
+            index=models.Index(
+                fields=["clinic", "user", "timestamp", "id"],
+                name="audit_logs_report_user_idx",
+            ),
+        ),
+    ]
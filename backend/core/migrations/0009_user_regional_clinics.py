@@ -0,0 +1,20 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_audit_report_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="regional_clinics",
+            field=models.ManyToManyField(
+                blank=True, related_name="regional_users", to="core.clinic"
+            ),
+        ),
+    ]
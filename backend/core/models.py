@@ -78,6 +78,8 @@ class User(AbstractUser):
     
     # Clinic association (multi-tenant)
     clinic = models.ForeignKey(Clinic, on_delete=models.CASCADE, related_name='users')
+    # Additional clinics whose aggregate metrics this user may view (regional dashboard)
+    regional_clinics = models.ManyToManyField(Clinic, blank=True, related_name='regional_users')
     
     # Role-based access control
     ROLE_CHOICES = [
@@ -171,6 +173,10 @@ class AuditLog(models.Model):
     - When it occurred
     - Where (IP address)
     - Why (reason for access)
+
+    Storage: audit_logs is range-partitioned by month on timestamp (primary
+    key is (id, timestamp) in the database). Old partitions are moved to
+    compressed archive files; see core.audit_archive.
     """
     
     # Who
@@ -210,8 +216,8 @@ class AuditLog(models.Model):
     resource_id = models.IntegerField(null=True)
     resource_repr = models.CharField(max_length=255, blank=True)  # Human-readable representation
     
-    # When
-    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+    # When (set at log time, not insert time, so buffered writes keep event order)
+    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
     
     # Where
     ip_address = models.GenericIPAddressField()
@@ -231,6 +237,11 @@ class AuditLog(models.Model):
     metadata = models.JSONField(default=dict)
     
     # Integrity protection (tamper detection)
+    # Each clinic has its own hash chain; chain_id/sequence give its order.
+    # Rows written before per-clinic chains have chain_id NULL and form a
+    # single legacy chain ordered by id.
+    chain_id = models.BigIntegerField(null=True, blank=True)
+    sequence = models.BigIntegerField(null=True, blank=True)
     previous_log_hash = models.CharField(max_length=64, blank=True)
     log_hash = models.CharField(max_length=64, blank=True)
     
@@ -243,6 +254,12 @@ class AuditLog(models.Model):
             models.Index(fields=['resource_type', 'resource_id']),
             models.Index(fields=['action', 'timestamp']),
             models.Index(fields=['clinic', 'timestamp']),
+            # Access reports: keyset pagination on (timestamp, id) per clinic
+            models.Index(fields=['clinic', 'resource_type', 'resource_id', 'timestamp', 'id'], name='audit_logs_report_resource_idx'),
+            models.Index(fields=['clinic', 'user', 'timestamp', 'id'], name='audit_logs_report_user_idx'),
+            # Sequences are unique per chain (allocated under the chain head
+            # lock); a partitioned table cannot enforce that globally.
+            models.Index(fields=['chain_id', 'sequence'], name='audit_logs_chain_sequence_idx'),
         ]
         # Prevent deletion - audit logs must be retained
         permissions = [
@@ -252,18 +269,36 @@ class AuditLog(models.Model):
     def __str__(self):
         return f"{self.username} {self.action} {self.resource_type} at {self.timestamp}"
     
+    @staticmethod
+    def chain_for_clinic(clinic_id):
+        """Chain id for a clinic (0 = entries without a clinic)."""
+        return clinic_id or 0
+
+    @staticmethod
+    def hash_entry(username, action, resource_type, resource_id, timestamp, previous_log_hash, chain_id=None, sequence=None):
+        """SHA-256 over the chained fields (shared by writer and verifier)."""
+        hash_content = f"{username}{action}{resource_type}{resource_id}{timestamp}{previous_log_hash}"
+        if sequence is not None:
+            # Bind chain position so reordering or gaps are detectable
+            hash_content = f"{chain_id}:{sequence}|{hash_content}"
+        return hashlib.sha256(hash_content.encode()).hexdigest()
+
+    def compute_log_hash(self):
+        """Hash of this entry chained to previous_log_hash."""
+        return self.hash_entry(
+            self.username, self.action, self.resource_type, self.resource_id,
+            self.timestamp, self.previous_log_hash, self.chain_id, self.sequence,
+        )
+
     def save(self, *args, **kwargs):
         """Generate hash for tamper detection"""
-        if not self.log_hash:
-            # Get the hash of the previous log entry
-            last_log = AuditLog.objects.order_by('-id').first()
-            if last_log:
-                self.previous_log_hash = last_log.log_hash
-            
-            # Create hash of this log entry
-            hash_content = f"{self.username}{self.action}{self.resource_type}{self.resource_id}{self.timestamp}{self.previous_log_hash}"
-            self.log_hash = hashlib.sha256(hash_content.encode()).hexdigest()
-        
+        if not self.log_hash and self._state.adding:
+            # Chain through the batch writer so single saves and buffered
+            # flushes share the same chain heads.
+            from core.audit import write_audit_batch
+            write_audit_batch([self])
+            return
+
         super().save(*args, **kwargs)
     
     @classmethod
@@ -281,11 +316,24 @@ class AuditLog(models.Model):
                 user_agent=request.META.get('HTTP_USER_AGENT')
             )
         """
-        return cls.objects.create(
+        entry = cls.build_entry(
+            user, action, resource_type, resource_id=resource_id, resource_repr=resource_repr,
+            ip_address=ip_address, user_agent=user_agent, reason=reason, changes=changes, metadata=metadata,
+        )
+
+        # Inside a request this only enriches the request's audit context;
+        # AuditLoggingMiddleware writes one consolidated row per resource at the end.
+        from core.audit import submit_audit_entry
+        return submit_audit_entry(entry)
+
+    @classmethod
+    def build_entry(cls, user, action, resource_type, resource_id=None, resource_repr='', ip_address='', user_agent='', reason='', changes=None, metadata=None):
+        """Unsaved AuditLog instance for log_action / the audit middleware."""
+        return cls(
             user=user,
             username=user.username if user else 'anonymous',
             user_role=user.role if user and hasattr(user, 'role') else 'unknown',
-            clinic=user.clinic if user and hasattr(user, 'clinic') else None,
+            clinic_id=getattr(user, 'clinic_id', None) if user else None,
             action=action,
             resource_type=resource_type,
             resource_id=resource_id,
@@ -298,6 +346,52 @@ class AuditLog(models.Model):
         )
 
 
+class AuditChainHead(models.Model):
+    """
+    Tail of one audit hash chain (one per clinic).
+
+    Appends lock only the head row of their own chain, so writers for
+    different clinics never wait on each other.
+    """
+    chain_id = models.BigIntegerField(primary_key=True)
+    last_sequence = models.BigIntegerField(default=0)
+    last_hash = models.CharField(max_length=64, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'audit_chain_heads'
+
+    def __str__(self):
+        return f"chain {self.chain_id} @ {self.last_sequence}"
+
+
+class AuditArchive(models.Model):
+    """
+    One monthly audit_logs partition moved to a compressed JSONL archive file.
+    Audit rows are never deleted; this records where they now live.
+    """
+    partition_name = models.CharField(max_length=63, unique=True)
+    period_start = models.DateTimeField()
+    period_end = models.DateTimeField()
+
+    file_path = models.CharField(max_length=500)
+    row_count = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64)
+
+    # Each chain's last row in this archive ({chain: {'position', 'last_hash'}}),
+    # verified before leaving the database; verify_audit_chain --full starts after it.
+    chain_checkpoints = models.JSONField(default=dict)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'audit_archives'
+        ordering = ['period_start']
+
+    def __str__(self):
+        return f"{self.partition_name} ({self.row_count} rows)"
+
+
 class EncryptedField:
     """
     Utility class for encrypting sensitive fields (SSN, etc.)
@@ -0,0 +1,124 @@
+"""
+Prometheus metrics for the API (scraped at /metrics).
+
+PrometheusMetricsMiddleware records per-route latency, SQL query count
+and time, and response size for every request. Audit writes are timed
+where they happen (core.middleware / core.audit).
+
+With several gunicorn workers, set PROMETHEUS_MULTIPROC_DIR (see
+settings); each worker writes its samples there, and the exporter
+aggregates all workers when scraped.
+"""
+
+import hmac
+import os
+import time
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+AUDIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+
+REQUEST_LATENCY = Histogram(
+    'emr_http_request_duration_seconds',
+    'Request latency by route.',
+    ['method', 'route', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = Histogram(
+    'emr_http_request_db_queries',
+    'SQL queries executed per request.',
+    ['method', 'route'],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+REQUEST_QUERY_TIME = Histogram(
+    'emr_http_request_db_seconds',
+    'Time spent in SQL per request.',
+    ['method', 'route'],
+    buckets=LATENCY_BUCKETS,
+)
+RESPONSE_SIZE = Histogram(
+    'emr_http_response_size_bytes',
+    'Response body size (non-streaming responses).',
+    ['method', 'route'],
+    buckets=SIZE_BUCKETS,
+)
+AUDIT_WRITE_TIME = Histogram(
+    'emr_audit_write_seconds',
+    "Audit write time: 'request' is the per-request submit, 'batch' a chained bulk insert.",
+    ['stage'],
+    buckets=AUDIT_BUCKETS,
+)
+AUDIT_ENTRIES_WRITTEN = Counter(
+    'emr_audit_entries_written_total',
+    'Audit rows inserted.',
+)
+
+
+class QueryStats:
+    """connection.execute_wrapper that counts and times SQL statements."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+def route_label(request):
+    """Low-cardinality route name: URL name if available, else the URL pattern."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route or 'unnamed'
+
+
+def observe_request(request, response, duration, queries):
+    method = request.method
+    route = route_label(request)
+    REQUEST_LATENCY.labels(method, route, str(response.status_code)).observe(duration)
+    REQUEST_QUERIES.labels(method, route).observe(queries.count)
+    REQUEST_QUERY_TIME.labels(method, route).observe(queries.seconds)
+    if not response.streaming:
+        RESPONSE_SIZE.labels(method, route).observe(len(response.content))
+
+
+def _registry():
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def _scrape_allowed(request):
+    token = getattr(settings, 'PROMETHEUS_SCRAPE_TOKEN', '')
+    if token:
+        supplied = request.META.get('HTTP_AUTHORIZATION', '').removeprefix('Bearer ')
+        return hmac.compare_digest(supplied, token)
+    return request.META.get('REMOTE_ADDR') in ('127.0.0.1', '::1')
+
+
+def metrics_view(request):
+    """Prometheus text exposition (bearer token, or localhost when no token is set)."""
+    if not _scrape_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,51 @@
+"""
+StreamingHttpResponse that streams under both WSGI and ASGI.
+
+Django's ASGI handler consumes a synchronous streaming_content by
+buffering it whole before the first byte is sent, which defeats streaming
+a large export. Under ASGI the sync generator is therefore wrapped in an
+async iterator that pulls a few chunks at a time through sync_to_async
+(thread-sensitive, so a server-side cursor stays on the request's
+database connection).
+"""
+
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+
+CHUNKS_PER_HOP = 50
+
+
+def _next_chunks(iterator):
+    return ''.join(islice(iterator, CHUNKS_PER_HOP))
+
+
+def _close(iterator):
+    close = getattr(iterator, 'close', None)
+    if close:
+        close()
+
+
+async def _async_content(iterator):
+    try:
+        while True:
+            chunk = await sync_to_async(_next_chunks)(iterator)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        await sync_to_async(_close)(iterator)
+
+
+def is_asgi_request(request):
+    # DRF's Request proxies attribute access to the underlying HttpRequest.
+    return getattr(request, 'scope', None) is not None
+
+
+def streaming_response(request, content, **kwargs):
+    """StreamingHttpResponse over the str chunks of content (a sync iterator)."""
+    content = iter(content)
+    if is_asgi_request(request):
+        content = _async_content(content)
+    return StreamingHttpResponse(content, **kwargs)
@@ -0,0 +1,11 @@
+from celery import shared_task
+from django.core.management import call_command
+
+
+@shared_task
+def maintain_audit_partitions():
+    """
+    Monthly: create the upcoming audit_logs partitions and archive months
+    past AUDIT_HOT_RETENTION_MONTHS (manage.py archive_audit_logs).
+    """
+    call_command('archive_audit_logs')
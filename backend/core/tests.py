@@ -0,0 +1,238 @@
+import asyncio
+import json
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from core.audit import AuditContext, AuditJSONEncoder, AuditWriter, write_audit_batch
+from core.audit_archive import (
+    add_months, archive_partition, ensure_partitions, iter_archive_rows, list_partitions, month_start,
+)
+from core.management.commands.verify_audit_chain import archived_checkpoints, verify_chain
+from core.models import AuditArchive, AuditLog, Clinic, User
+from core.streaming import streaming_response
+
+
+def make_user(role=''):
+    clinic = Clinic.objects.create(name='Test Clinic', clinic_type='asc')
+    return User.objects.create(username='auditor', clinic=clinic, role=role)
+
+
+def log(user, resource_id):
+    return AuditLog.log_action(user=user, action='view', resource_type='patient', resource_id=resource_id)
+
+
+class AuditJSONEncoderTests(SimpleTestCase):
+    def test_timestamps_keep_microseconds(self):
+        ts = datetime(2026, 3, 1, 12, 30, 5, 123456, tzinfo=dt_timezone.utc)
+        self.assertEqual(json.loads(json.dumps(ts, cls=AuditJSONEncoder)), ts.isoformat())
+
+
+@mock.patch('core.management.commands.verify_audit_chain.connections')
+class AuditSpoolRecoveryTests(TestCase):
+    def test_recovered_entries_keep_timestamp_and_verify(self, _connections):
+        user = make_user()
+        ts = datetime(2026, 3, 1, 12, 30, 5, 123456, tzinfo=dt_timezone.utc)
+        with tempfile.TemporaryDirectory() as spool_dir:
+            crashed = AuditWriter(batch_size=1000, flush_interval=3600, spool_dir=spool_dir)
+            entry = AuditLog.build_entry(user, 'view', 'patient', resource_id=1)
+            entry.timestamp = ts
+            crashed.submit(entry)
+
+            # A restarted writer in the same process adopts the unflushed spool.
+            restarted = AuditWriter(batch_size=1000, flush_interval=3600, spool_dir=spool_dir)
+            restarted._ensure_started()
+            self.assertEqual(restarted.flush(), 1)
+
+        row = AuditLog.objects.get()
+        self.assertEqual(row.timestamp, ts)
+        result = verify_chain(AuditLog.chain_for_clinic(user.clinic_id))
+        self.assertIsNone(result['error'])
+        self.assertEqual(result['verified'], 1)
+
+
+class StreamingResponseTests(SimpleTestCase):
+    def chunks(self):
+        return (f'row {n}\n' for n in range(120))
+
+    def test_wsgi_keeps_sync_iterator(self):
+        response = streaming_response(SimpleNamespace(), self.chunks())
+        self.assertFalse(response.is_async)
+        self.assertEqual(b''.join(response.streaming_content).count(b'\n'), 120)
+
+    def test_asgi_gets_async_iterator(self):
+        response = streaming_response(SimpleNamespace(scope={'type': 'http'}), self.chunks())
+        self.assertTrue(response.is_async)
+
+        async def consume():
+            return [chunk async for chunk in response.streaming_content]
+
+        parts = asyncio.run(consume())
+        self.assertGreater(len(parts), 1)
+        self.assertEqual(b''.join(parts), ''.join(self.chunks()).encode())
+
+
+class AuditContextConsolidateTests(SimpleTestCase):
+    def base(self):
+        return AuditLog.build_entry(None, 'update', 'web_request', ip_address='10.0.0.1', metadata={'path': '/api/x/'})
+
+    def test_one_row_per_resource(self):
+        context = AuditContext()
+        for resource_type, resource_id, action in [
+            ('patient_checkin', 1, 'update'),
+            ('appointment', 7, 'update'),
+            ('patient_checkin', 1, 'view'),
+        ]:
+            context.add(AuditLog.build_entry(None, action, resource_type, resource_id=resource_id))
+        context.enrich(reason='status change')
+
+        rows = context.consolidate(self.base())
+
+        self.assertEqual([(row.resource_type, row.resource_id) for row in rows], [('patient_checkin', 1), ('appointment', 7)])
+        self.assertEqual(rows[0].reason, 'status change')
+        self.assertEqual(rows[1].reason, '')
+        self.assertEqual(len(rows[0].metadata['related_events']), 1)
+        self.assertNotIn('related_events', rows[1].metadata)
+        self.assertTrue(all(row.ip_address == '10.0.0.1' and row.metadata['path'] == '/api/x/' for row in rows))
+
+    def test_no_view_entries_keeps_base(self):
+        base = self.base()
+        self.assertEqual(AuditContext().consolidate(base), [base])
+
+
+# verify_chain closes connections when done (it also runs in worker
+# processes), which would end the test transaction.
+@mock.patch('core.management.commands.verify_audit_chain.connections')
+@override_settings(AUDIT_BUFFERED_WRITES=False)
+class AuditChainTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.entries = [log(self.user, resource_id) for resource_id in (1, 2, 3)]
+        self.chain = AuditLog.chain_for_clinic(self.user.clinic_id)
+
+    def test_chain_verifies(self, _connections):
+        result = verify_chain(self.chain)
+        self.assertIsNone(result['error'])
+        self.assertEqual(result['verified'], 3)
+        self.assertEqual(result['last_hash'], AuditLog.objects.get(pk=self.entries[-1].pk).log_hash)
+
+    def test_edited_row_is_detected(self, _connections):
+        AuditLog.objects.filter(pk=self.entries[1].pk).update(resource_id=99)
+        result = verify_chain(self.chain)
+        self.assertEqual(result['verified'], 1)
+        self.assertIn('log_hash does not match', result['error'])
+
+
+@override_settings(AUDIT_BUFFERED_WRITES=False)
+class AuditArchiveTests(TestCase):
+    def test_archived_rows_still_verify(self):
+        user = make_user()
+        for resource_id in range(5):
+            log(user, resource_id)
+        start = month_start(datetime.now(dt_timezone.utc))
+        name = dict((start, name) for name, start in list_partitions())[start]
+        with connection.cursor() as cursor:
+            # Rows were inserted in this transaction; settle their deferred FK checks before DROP.
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+        with tempfile.TemporaryDirectory() as archive_dir, override_settings(AUDIT_ARCHIVE_DIR=archive_dir):
+            archive = archive_partition(name, start, {})
+            rows = list(iter_archive_rows(archive))
+
+        self.assertEqual(len(rows), archive.row_count)
+        self.assertTrue(any(row['timestamp'].microsecond % 1000 for row in rows))
+        for row in rows:
+            self.assertEqual(
+                AuditLog.hash_entry(
+                    row['username'], row['action'], row['resource_type'], row['resource_id'],
+                    row['timestamp'], row['previous_log_hash'], row['chain_id'], row['sequence'],
+                ),
+                row['log_hash'],
+            )
+
+
+@mock.patch('core.management.commands.verify_audit_chain.connections')
+@override_settings(AUDIT_BUFFERED_WRITES=False)
+class ArchiveCheckpointTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.chain = AuditLog.chain_for_clinic(self.user.clinic_id)
+        last_month = add_months(month_start(datetime.now(dt_timezone.utc)), -1)
+        ensure_partitions(0, now=last_month)
+        old = []
+        for resource_id in range(3):
+            entry = AuditLog.build_entry(self.user, 'view', 'patient', resource_id=resource_id)
+            entry.timestamp = last_month.replace(day=2, microsecond=resource_id)
+            old.append(entry)
+        write_audit_batch(old)
+        self.hot = [log(self.user, resource_id) for resource_id in (10, 11)]
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+    def archive(self):
+        with tempfile.TemporaryDirectory() as archive_dir, override_settings(AUDIT_ARCHIVE_DIR=archive_dir):
+            call_command('archive_audit_logs', older_than_months=0, months_ahead=0, stdout=mock.Mock())
+
+    def test_checkpoint_is_last_archived_row(self, _connections):
+        self.archive()
+
+        checkpoint = AuditArchive.objects.get().chain_checkpoints[str(self.chain)]
+        self.assertEqual(checkpoint['position'], 3)
+        self.assertEqual(archived_checkpoints()[self.chain], checkpoint)
+        result = verify_chain(self.chain, archived_checkpoints()[self.chain])
+        self.assertIsNone(result['error'])
+        self.assertEqual(result['verified'], len(self.hot))
+
+    def test_full_rechecks_rows_still_in_database(self, _connections):
+        self.archive()
+        AuditLog.objects.filter(pk=self.hot[0].pk).update(resource_id=99)
+        result = verify_chain(self.chain, archived_checkpoints()[self.chain])
+        self.assertIn('log_hash does not match', result['error'])
+
+
+@override_settings(AUDIT_BUFFERED_WRITES=False)
+class AccessReportPaginationTests(TestCase):
+    def setUp(self):
+        self.user = make_user(role='admin')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+        # Seven rows sharing one timestamp, so paging has to break ties on id.
+        tied = datetime(2026, 3, 1, 12, 0, tzinfo=dt_timezone.utc)
+        entries = []
+        for resource_id in range(7):
+            entry = AuditLog.build_entry(self.user, 'view', 'patient', resource_id=resource_id)
+            entry.timestamp = tied
+            entries.append(entry)
+        write_audit_batch(entries)
+
+    def page(self, **params):
+        return self.client.get('/api/audit/access-report/', {'resource_type': 'patient', **params})
+
+    def test_page_size_is_clamped(self):
+        for page_size in (0, -5):
+            response = self.page(page_size=page_size)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.data['results']), 1)
+            self.assertIsNotNone(response.data['next_cursor'])
+
+    def test_cursor_walks_every_row_once(self):
+        seen, cursor = [], None
+        while True:
+            params = {'page_size': 3, **({'cursor': cursor} if cursor else {})}
+            data = self.page(**params).data
+            seen.extend(row['id'] for row in data['results'])
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(seen, sorted(set(seen), reverse=True))
+
+    def test_bad_params_are_400(self):
+        self.assertEqual(self.page(page_size='x').status_code, 400)
+        self.assertEqual(self.page(cursor='not-a-cursor').status_code, 400)
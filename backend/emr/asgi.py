@@ -2,6 +2,8 @@
 ASGI config for emr project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Requests for the live board event stream (scheduling.live_events) are
+served directly as Server-Sent Events; everything else goes to Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -13,4 +15,12 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'emr.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from scheduling.live_events import LIVE_EVENTS_PATH, live_events_app  # noqa: E402  (needs apps loaded)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'] == LIVE_EVENTS_PATH and scope['method'] == 'GET':
+        return await live_events_app(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,19 @@
+"""
+Celery application for background and scheduled tasks.
+
+Periodic tasks are stored with django-celery-beat (DatabaseScheduler);
+the defaults in settings.CELERY_BEAT_SCHEDULE are synced into it.
+
+    celery -A emr worker -l info
+    celery -A emr beat -l info
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'emr.settings')
+
+app = Celery('emr')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
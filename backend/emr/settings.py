@@ -7,6 +7,7 @@ import os
 from pathlib import Path
 from datetime import timedelta
 from decouple import config
+from celery.schedules import crontab
 
 # Build paths
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -27,6 +28,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Third-party apps
     'rest_framework',
@@ -57,6 +59,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PrometheusMetricsMiddleware',  # Outermost: times the full stack
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # CORS before CommonMiddleware
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -192,6 +195,30 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+CELERY_BEAT_SCHEDULE = {
+    'refresh-metrics-rollups': {
+        'task': 'scheduling.tasks.refresh_metrics_rollups',
+        'schedule': crontab(hour=2, minute=15),
+    },
+    'extend-appointment-series': {
+        'task': 'scheduling.tasks.extend_appointment_series',
+        'schedule': crontab(hour=2, minute=45),
+    },
+    # Partitions are created 3 months ahead; rows past the last one would
+    # land in audit_logs_default and block creating that month later.
+    'maintain-audit-partitions': {
+        'task': 'core.tasks.maintain_audit_partitions',
+        'schedule': crontab(day_of_month=1, hour=3, minute=15),
+    },
+}
+
+# Days re-rolled by the nightly metrics rollup job (ending yesterday); older
+# days are re-rolled when an edit marks them dirty
+METRICS_ROLLUP_RECOMPUTE_DAYS = config('METRICS_ROLLUP_RECOMPUTE_DAYS', default=3, cast=int)
+
+# Recurring appointment series are materialized this many days ahead
+APPOINTMENT_SERIES_HORIZON_DAYS = config('APPOINTMENT_SERIES_HORIZON_DAYS', default=90, cast=int)
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
@@ -241,6 +268,7 @@ CORS_ALLOWED_ORIGINS = config(
     cast=lambda v: [s.strip() for s in v.split(',')]
 )
 CORS_ALLOW_CREDENTIALS = True
+CORS_EXPOSE_HEADERS = ['X-Sync-Cursor']
 
 # Logging Configuration - HIPAA requires comprehensive logging
 LOGGING = {
@@ -294,6 +322,75 @@ LOGGING = {
     },
 }
 
+# Buffered audit writes (core.audit.AuditWriter)
+# Entries are spooled to AUDIT_SPOOL_DIR and bulk inserted on size/time trigger.
+AUDIT_BUFFERED_WRITES = config('AUDIT_BUFFERED_WRITES', default=True, cast=bool)
+AUDIT_BATCH_SIZE = config('AUDIT_BATCH_SIZE', default=200, cast=int)
+AUDIT_FLUSH_INTERVAL_SECONDS = config('AUDIT_FLUSH_INTERVAL_SECONDS', default=2.0, cast=float)
+AUDIT_SPOOL_DIR = config('AUDIT_SPOOL_DIR', default=str(BASE_DIR / 'logs' / 'audit_spool'))
+AUDIT_SPOOL_FSYNC = config('AUDIT_SPOOL_FSYNC', default=False, cast=bool)
+
+# audit_logs is partitioned by month; partitions older than this are moved
+# to compressed archive files by `manage.py archive_audit_logs`.
+AUDIT_HOT_RETENTION_MONTHS = config('AUDIT_HOT_RETENTION_MONTHS', default=24, cast=int)
+AUDIT_ARCHIVE_DIR = config('AUDIT_ARCHIVE_DIR', default=str(BASE_DIR / 'audit_archive'))
+
+# Shared cache (live board / dashboard responses, per-clinic data versions).
+# Use Redis in any multi-worker deployment so every worker sees the same
+# data version; the local-memory fallback is per process.
+CACHE_URL = config('CACHE_URL', default='')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Upper bound on how long a cached live response is served; entries are
+# also invalidated immediately by writes (scheduling.live_cache).
+LIVE_DATA_CACHE_SECONDS = config('LIVE_DATA_CACHE_SECONDS', default=30, cast=int)
+
+# Largest ?since= delta served (changed rows or deleted ids); a client
+# further behind gets 410 and reloads the full list (scheduling.sync).
+SYNC_DELTA_MAX_ROWS = config('SYNC_DELTA_MAX_ROWS', default=1000, cast=int)
+
+# Live board push events (scheduling.live_events). The stream is only served
+# when running emr.asgi (see gunicorn.conf.py); under emr.wsgi boards fall
+# back to polling. 'memory' only reaches boards connected to the same
+# process, so LIVE_EVENTS_BROKER=redis is required with more than one worker.
+LIVE_EVENTS_BROKER = config('LIVE_EVENTS_BROKER', default='memory')
+LIVE_EVENTS_REDIS_URL = config('LIVE_EVENTS_REDIS_URL', default='redis://localhost:6379/2')
+# Lifetime of the single-use ticket a board exchanges for a stream connection.
+LIVE_EVENTS_TICKET_SECONDS = config('LIVE_EVENTS_TICKET_SECONDS', default=30, cast=int)
+
+# Regional dashboard: per-clinic metrics are built on a shared thread pool;
+# clinics slower than the timeout are reported as timed out.
+REGIONAL_METRICS_WORKERS = config('REGIONAL_METRICS_WORKERS', default=8, cast=int)
+REGIONAL_METRICS_TIMEOUT_SECONDS = config('REGIONAL_METRICS_TIMEOUT_SECONDS', default=5.0, cast=float)
+
+# Length assumed for appointments without an end time (bulk import, free-slot search).
+DEFAULT_APPOINTMENT_MINUTES = config('DEFAULT_APPOINTMENT_MINUTES', default=30, cast=int)
+
+# Bulk appointment import (POST /api/appointments/import/): rows per upload.
+APPOINTMENT_IMPORT_MAX_ROWS = config('APPOINTMENT_IMPORT_MAX_ROWS', default=2000, cast=int)
+
+# Prometheus metrics (core.prometheus), scraped at /metrics.
+# With multiple gunicorn workers, point PROMETHEUS_MULTIPROC_DIR at an empty
+# directory (cleared on deploy); it must be set before prometheus_client loads.
+PROMETHEUS_MULTIPROC_DIR = config('PROMETHEUS_MULTIPROC_DIR', default='')
+if PROMETHEUS_MULTIPROC_DIR:
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+    os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', PROMETHEUS_MULTIPROC_DIR)
+# Bearer token required to scrape; without one only localhost may scrape.
+PROMETHEUS_SCRAPE_TOKEN = config('PROMETHEUS_SCRAPE_TOKEN', default='')
+
 # Create logs directory
 os.makedirs(BASE_DIR / 'logs', exist_ok=True)
 
@@ -2,17 +2,24 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from core.api import clinic_config
+from core.audit_reports import access_report, access_report_export
+from core.prometheus import metrics_view
 from patients.recent import recent_patients
+from scheduling.live_events import live_events_ticket
 from django.conf import settings
 from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='prometheus_metrics'),
 
     # JWT auth for React
     path('api/auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/clinic/config/', clinic_config, name='clinic_config'),
+    path('api/live/ticket/', live_events_ticket, name='live_events_ticket'),
+    path('api/audit/access-report/', access_report, name='audit_access_report'),
+    path('api/audit/access-report/export/', access_report_export, name='audit_access_report_export'),
 
     # APIs
     path('api/', include('patients.urls')),
@@ -0,0 +1,23 @@
+"""
+gunicorn settings hooks.
+
+    PROMETHEUS_MULTIPROC_DIR=/run/emr/prometheus gunicorn emr.wsgi -c gunicorn.conf.py
+
+The live board event stream (scheduling.live_events) only exists under
+ASGI; serve emr.asgi with an ASGI worker class to enable it, and set
+LIVE_EVENTS_BROKER=redis when running more than one worker:
+
+    LIVE_EVENTS_BROKER=redis gunicorn emr.asgi -k uvicorn.workers.UvicornWorker -c gunicorn.conf.py
+
+Under emr.wsgi (or runserver) boards fall back to polling every 30 seconds.
+"""
+
+import os
+
+
+def child_exit(server, worker):
+    # Drop the exited worker's live samples from the Prometheus multiprocess dir.
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
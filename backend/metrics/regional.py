@@ -0,0 +1,90 @@
+"""
+Regional (multi-clinic) dashboard.
+
+Per-clinic dashboards are built concurrently on a shared, bounded thread
+pool. Each clinic goes through the same per-clinic response cache as
+/api/metrics/dashboard/, so a regional view of 20 sites costs about one
+clinic's latency. Clinics that miss the deadline are reported rather than
+holding up the response.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from core.models import Clinic
+from scheduling.counters import clinic_today
+from scheduling.live_cache import cached_live_response
+from scheduling.metrics import build_dashboard_metrics
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.REGIONAL_METRICS_WORKERS,
+                thread_name_prefix='regional-metrics',
+            )
+        return _executor
+
+
+def authorized_clinics(user):
+    """The user's own clinic plus any regional clinics granted to them (all for superusers)."""
+    if user.is_superuser:
+        return Clinic.objects.filter(is_active=True)
+    ids = {user.clinic_id, *user.regional_clinics.values_list('id', flat=True)}
+    return Clinic.objects.filter(id__in=ids, is_active=True)
+
+
+def _clinic_dashboard(clinic, date_str):
+    try:
+        return cached_live_response(
+            'dashboard',
+            clinic.id,
+            f'{clinic_today(clinic)}:{date_str or ""}',
+            lambda: build_dashboard_metrics(clinic, date_str=date_str),
+        )
+    finally:
+        # Pool threads each hold their own connection; don't leak it.
+        connections.close_all()
+
+
+def build_regional_metrics(clinics, date_str=None, timeout=None):
+    """
+    Dashboard metrics for each clinic, computed concurrently.
+    Returns {'clinics': [...], 'timed_out': [...], 'failed': [...]}.
+    """
+    timeout = settings.REGIONAL_METRICS_TIMEOUT_SECONDS if timeout is None else timeout
+    executor = _get_executor()
+    futures = {executor.submit(_clinic_dashboard, clinic, date_str): clinic for clinic in clinics}
+    done, not_done = wait(futures, timeout=timeout)
+
+    results, failed = [], []
+    for future, clinic in futures.items():
+        if future not in done:
+            future.cancel()
+            continue
+        try:
+            metrics = future.result()
+        except Exception:
+            logger.exception('Regional metrics failed for clinic %s', clinic.id)
+            failed.append({'clinic_id': clinic.id, 'clinic_name': clinic.name})
+            continue
+        results.append({'clinic_id': clinic.id, 'clinic_name': clinic.name, 'metrics': metrics})
+
+    return {
+        'generated_at': timezone.now().isoformat(),
+        'clinics': results,
+        'timed_out': [{'clinic_id': futures[f].id, 'clinic_name': futures[f].name} for f in not_done],
+        'failed': failed,
+    }
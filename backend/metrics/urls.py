@@ -1,6 +1,8 @@
 from django.urls import path
-from .views import dashboard_metrics
+from .views import dashboard_metrics, regional_dashboard_metrics, stage_analytics
 
 urlpatterns = [
     path('metrics/dashboard/', dashboard_metrics, name='metrics_dashboard'),
+    path('metrics/regional/', regional_dashboard_metrics, name='metrics_regional'),
+    path('metrics/stage-analytics/', stage_analytics, name='metrics_stage_analytics'),
 ]
@@ -1,7 +1,18 @@
+import time as time_module
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from core.conditional import conditional_response, make_etag
+from core.models import AuditLog
+from metrics.regional import authorized_clinics, build_regional_metrics
+from scheduling.analytics import stage_time_histograms
+from scheduling.counters import clinic_timezone, clinic_today
+from scheduling.live_cache import cached_live_response, data_version
 from scheduling.metrics import build_dashboard_metrics
 
 
@@ -9,5 +20,96 @@ from scheduling.metrics import build_dashboard_metrics
 @permission_classes([IsAuthenticated])
 def dashboard_metrics(request):
     date_str = request.query_params.get('date')  # optional: YYYY-MM-DD
-    data = build_dashboard_metrics(request.user.clinic, date_str=date_str)
+    clinic = request.user.clinic
+    day = f'{clinic_today(clinic)}:{date_str or ""}'
+
+    def build():
+        return cached_live_response(
+            'dashboard', clinic.id, day,
+            lambda: build_dashboard_metrics(clinic, date_str=date_str),
+        )
+
+    # Minutes-in-status move with the clock, so the tag also rolls over
+    # once per cache lifetime.
+    window = int(time_module.time() // settings.LIVE_DATA_CACHE_SECONDS)
+    etag = make_etag('dashboard', clinic.id, data_version(clinic.id), day, window)
+    return conditional_response(request, etag, build)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def stage_analytics(request):
+    """
+    Time-in-stage statistics and histograms from check-in status events.
+    Query params: start_date, end_date (YYYY-MM-DD, clinic-local, inclusive),
+    group_by (hour | provider | room), bin_minutes, max_minutes.
+    """
+    clinic = request.user.clinic
+    params = request.query_params
+    clinic_tz = clinic_timezone(clinic)
+
+    try:
+        start_date = date.fromisoformat(params.get('start_date', ''))
+        end_date = date.fromisoformat(params.get('end_date', ''))
+        bin_minutes = int(params.get('bin_minutes') or 15)
+        max_minutes = int(params.get('max_minutes') or 240)
+    except ValueError:
+        return Response({'detail': 'start_date and end_date (YYYY-MM-DD) are required'}, status=400)
+    if end_date < start_date or bin_minutes <= 0 or max_minutes < bin_minutes:
+        return Response({'detail': 'Invalid range or bin settings.'}, status=400)
+
+    group_by = params.get('group_by') or 'hour'
+    start = datetime.combine(start_date, time.min).replace(tzinfo=clinic_tz)
+    end = datetime.combine(end_date + timedelta(days=1), time.min).replace(tzinfo=clinic_tz)
+
+    try:
+        groups = stage_time_histograms(
+            clinic, start, end,
+            group_by=group_by, bin_minutes=bin_minutes, max_minutes=max_minutes,
+        )
+    except ValueError as exc:
+        return Response({'detail': str(exc)}, status=400)
+
+    return Response({
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'group_by': group_by,
+        'bin_minutes': bin_minutes,
+        'max_minutes': max_minutes,
+        'groups': groups,
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def regional_dashboard_metrics(request):
+    """
+    Dashboard metrics for several clinics at once.
+    Query params: clinics (comma-separated ids; default all the user may
+    view), date (optional YYYY-MM-DD).
+    """
+    clinics = authorized_clinics(request.user)
+    requested = request.query_params.get('clinics')
+    if requested:
+        try:
+            ids = {int(part) for part in requested.split(',') if part.strip()}
+        except ValueError:
+            return Response({'detail': 'clinics must be comma-separated ids'}, status=400)
+        allowed = set(clinics.values_list('id', flat=True))
+        if not ids <= allowed:
+            return Response({'detail': 'Not authorized for one or more clinics.'}, status=403)
+        clinics = clinics.filter(id__in=ids)
+
+    clinics = list(clinics.order_by('name'))
+    data = build_regional_metrics(clinics, date_str=request.query_params.get('date'))
+
+    # Includes other clinics' longest-waiter lists (patient names / MRNs)
+    AuditLog.log_action(
+        user=request.user,
+        action='view',
+        resource_type='regional_metrics',
+        changes={'clinic_ids': [clinic.id for clinic in clinics]},
+        ip_address=request.META.get('REMOTE_ADDR', ''),
+        user_agent=request.META.get('HTTP_USER_AGENT', ''),
+    )
     return Response(data)
@@ -0,0 +1,120 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_recent_patients(apps, schema_editor):
+    """Seed the MRU table from the last 30 days of chart-view audit rows."""
+    from datetime import timedelta
+    from django.utils import timezone
+
+    AuditLog = apps.get_model("core", "AuditLog")
+    Patient = apps.get_model("patients", "Patient")
+    RecentPatient = apps.get_model("patients", "RecentPatient")
+
+    limit = 10
+    seen = {}
+    logs = (
+        AuditLog.objects.filter(
+            resource_type="patient",
+            action="view",
+            user__isnull=False,
+            resource_id__isnull=False,
+            timestamp__gte=timezone.now() - timedelta(days=30),
+        )
+        .order_by("-timestamp")
+        .values_list("user_id", "resource_id", "timestamp")
+        .iterator(chunk_size=5000)
+    )
+    for user_id, patient_id, viewed_at in logs:
+        per_user = seen.setdefault(user_id, {})
+        if len(per_user) < limit and patient_id not in per_user:
+            per_user[patient_id] = viewed_at
+
+    patient_clinics = dict(
+        Patient.objects.filter(
+            id__in={pid for per_user in seen.values() for pid in per_user}
+        ).values_list("id", "clinic_id")
+    )
+    RecentPatient.objects.bulk_create(
+        [
+            RecentPatient(
+                user_id=user_id,
+                patient_id=patient_id,
+                clinic_id=patient_clinics[patient_id],
+                viewed_at=viewed_at,
+            )
+            for user_id, per_user in seen.items()
+            for patient_id, viewed_at in per_user.items()
+            if patient_id in patient_clinics
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_audit_report_indexes"),
+        ("patients", "0002_patient_ethnicity_patient_gender_identity_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecentPatient",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("viewed_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "clinic",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="core.clinic"
+                    ),
+                ),
+                (
+                    "patient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="patients.patient",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="recent_patients",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "recent_patients",
+                "indexes": [
+                    models.Index(
+                        fields=["user", "-viewed_at"],
+                        name="recent_pati_user_id_77fb0a_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="recentpatient",
+            constraint=models.UniqueConstraint(
+                fields=("user", "patient"), name="recent_patients_user_patient_uniq"
+            ),
+        ),
+        migrations.RunPython(backfill_recent_patients, migrations.RunPython.noop),
+    ]
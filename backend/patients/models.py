@@ -417,3 +417,40 @@ class SocialHistory(models.Model):
     
     def __str__(self):
         return f"Social history for {self.patient}"
+
+
+class RecentPatient(models.Model):
+    """
+    Per-user most-recently-viewed patients (powers /api/recent-patients/).
+    Upserted when a chart is opened and capped at MAX_PER_USER rows per user.
+    """
+    MAX_PER_USER = 10
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='recent_patients')
+    clinic = models.ForeignKey(Clinic, on_delete=models.CASCADE)
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='+')
+    viewed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'recent_patients'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'patient'], name='recent_patients_user_patient_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-viewed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} viewed {self.patient_id} at {self.viewed_at}"
+
+    @classmethod
+    def touch(cls, user, patient):
+        """Record a chart view: one upsert, then trim the user's list to MAX_PER_USER."""
+        cls.objects.bulk_create(
+            [cls(user=user, clinic_id=patient.clinic_id, patient=patient, viewed_at=timezone.now())],
+            update_conflicts=True,
+            unique_fields=['user', 'patient'],
+            update_fields=['viewed_at', 'clinic'],
+        )
+        keep = cls.objects.filter(user=user).order_by('-viewed_at').values('pk')[:cls.MAX_PER_USER]
+        cls.objects.filter(user=user).exclude(pk__in=keep).delete()
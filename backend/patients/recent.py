@@ -2,8 +2,7 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from core.models import AuditLog
-from .models import Patient
+from .models import RecentPatient
 from .serializers import PatientSerializer
 
 @api_view(['GET'])
@@ -11,33 +10,20 @@ from .serializers import PatientSerializer
 def recent_patients(request):
     """
     Return recently viewed patients for the logged-in user.
-    Uses AuditLog entries (resource_type='patient', action='view').
+    Reads the per-user RecentPatient MRU table (maintained by
+    PatientViewSet.retrieve) in one indexed query joined to Patient.
     Clinic-scoped for HIPAA multi-tenant safety.
     """
-    logs = AuditLog.objects.filter(
-        user=request.user,
-        resource_type='patient',
-        action='view'
-    ).order_by('-timestamp')[:100]
-
-    ids = []
-    for log in logs:
-        rid = str(log.resource_id or '').strip()
-        if rid.isdigit():
-            pid = int(rid)
-            if pid not in ids:
-                ids.append(pid)
-        if len(ids) >= 10:
-            break
-
-    patients = Patient.objects.filter(
-        clinic=request.user.clinic,
-        is_active=True,
-        id__in=ids
+    recent = (
+        RecentPatient.objects.filter(
+            user=request.user,
+            clinic=request.user.clinic,
+            patient__clinic=request.user.clinic,
+            patient__is_active=True,
+        )
+        .select_related('patient')
+        .order_by('-viewed_at')[:RecentPatient.MAX_PER_USER]
     )
+    patients = [r.patient for r in recent]
 
-    # Preserve original order from logs
-    by_id = {p.id: p for p in patients}
-    ordered = [by_id[i] for i in ids if i in by_id]
-
-    return Response(PatientSerializer(ordered, many=True, context={'request': request}).data)
+    return Response(PatientSerializer(patients, many=True, context={'request': request}).data)
@@ -3,9 +3,11 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
 
-from .models import Patient
+from .models import Patient, RecentPatient
 from .serializers import PatientSerializer
 from core.models import AuditLog
+from scheduling.live_cache import bump_data_version
+from scheduling.sync import touch_patient_rows
 
 
 class PatientViewSet(viewsets.ModelViewSet):
@@ -33,6 +35,13 @@ class PatientViewSet(viewsets.ModelViewSet):
             ip_address=self.request.META.get('REMOTE_ADDR', ''),
             user_agent=self.request.META.get('HTTP_USER_AGENT', ''),
         )
+    def perform_update(self, serializer):
+        shown = (serializer.instance.full_name, serializer.instance.medical_record_number)
+        patient = serializer.save()
+        # Names and MRNs appear on the live board and today's schedule.
+        bump_data_version(patient.clinic_id)
+        if (patient.full_name, patient.medical_record_number) != shown:
+            touch_patient_rows(patient)
 
     def retrieve(self, request, *args, **kwargs):
         patient = self.get_object()
@@ -46,6 +55,7 @@ class PatientViewSet(viewsets.ModelViewSet):
             ip_address=request.META.get('REMOTE_ADDR', ''),
             user_agent=request.META.get('HTTP_USER_AGENT', ''),
         )
+        RecentPatient.touch(request.user, patient)
 
         return super().retrieve(request, *args, **kwargs)
 
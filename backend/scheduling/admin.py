@@ -1,3 +1,16 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import AppointmentSeries, WaitTimeAlertThreshold
+
+
+@admin.register(WaitTimeAlertThreshold)
+class WaitTimeAlertThresholdAdmin(admin.ModelAdmin):
+    list_display = ('clinic', 'status', 'minutes')
+    list_filter = ('clinic', 'status')
+
+
+@admin.register(AppointmentSeries)
+class AppointmentSeriesAdmin(admin.ModelAdmin):
+    list_display = ('patient', 'clinic', 'frequency', 'interval', 'first_start', 'next_index', 'is_active')
+    list_filter = ('clinic', 'frequency', 'is_active')
+    raw_id_fields = ('patient', 'provider', 'created_by')
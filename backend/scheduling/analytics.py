@@ -0,0 +1,128 @@
+"""
+Stage analytics over the CheckInStatusEvent stream.
+
+Events are turned into stays (one row per visit to a stage) with SQL
+window functions: LAG collapses repeated events for the same status,
+LEAD gives each stay's exit time and the stage that followed. Unlike the
+single pre_op_at / pacu_at columns, a patient who goes back to the OR
+and returns to PACU yields two PACU stays, and the backward move is
+counted. Time-in-stage statistics and histograms are grouped by
+hour-of-day (clinic-local entry time), provider or room, all in one
+query.
+"""
+
+from django.db import connection
+
+from scheduling.models import CheckInStatusEvent, PatientCheckIn
+
+STAGE_ORDER = [status for status, _ in PatientCheckIn.STATUS_CHOICES]
+
+GROUP_BY_SQL = {
+    'hour': 'EXTRACT(HOUR FROM st.entered_at AT TIME ZONE %(tz)s)::int',
+    'provider': "c.provider_name",
+    'room': "c.room",
+}
+
+STAGE_ANALYTICS_SQL = """
+WITH scoped AS (
+    SELECT DISTINCT checkin_id
+    FROM {events}
+    WHERE clinic_id = %(clinic_id)s AND occurred_at >= %(start)s AND occurred_at < %(end)s
+),
+marked AS (
+    SELECT e.id, e.checkin_id, e.status, e.occurred_at,
+           LAG(e.status) OVER (PARTITION BY e.checkin_id ORDER BY e.occurred_at, e.id) AS prev_status
+    FROM {events} e
+    JOIN scoped s ON s.checkin_id = e.checkin_id
+),
+stays AS (
+    SELECT checkin_id,
+           status AS stage,
+           occurred_at AS entered_at,
+           LEAD(occurred_at) OVER w AS exited_at,
+           LEAD(status) OVER w AS next_stage
+    FROM marked
+    WHERE prev_status IS DISTINCT FROM status
+    WINDOW w AS (PARTITION BY checkin_id ORDER BY occurred_at, id)
+),
+intervals AS (
+    SELECT {group_by} AS bucket,
+           st.stage,
+           EXTRACT(EPOCH FROM st.exited_at - st.entered_at) / 60.0 AS minutes,
+           FLOOR(LEAST(EXTRACT(EPOCH FROM st.exited_at - st.entered_at) / 60.0, %(max_minutes)s)
+                 / %(bin_minutes)s)::int AS bin,
+           array_position(%(stage_order)s::text[], st.next_stage::text)
+               < array_position(%(stage_order)s::text[], st.stage::text) AS is_backward
+    FROM stays st
+    JOIN {checkins} c ON c.id = st.checkin_id
+    WHERE st.exited_at IS NOT NULL
+      AND st.entered_at >= %(start)s AND st.entered_at < %(end)s
+)
+SELECT bucket,
+       stage,
+       bin,
+       GROUPING(bin) = 1 AS is_summary,
+       COUNT(*),
+       AVG(minutes),
+       PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY minutes),
+       PERCENTILE_CONT(0.9) WITHIN GROUP (ORDER BY minutes),
+       MAX(minutes),
+       COUNT(*) FILTER (WHERE is_backward)
+FROM intervals
+GROUP BY GROUPING SETS ((bucket, stage), (bucket, stage, bin))
+ORDER BY bucket NULLS LAST, stage, bin NULLS FIRST
+"""
+
+
+def _minutes(value):
+    return int(value) if value is not None else None
+
+
+def stage_time_histograms(clinic, start, end, group_by='hour', bin_minutes=15, max_minutes=240):
+    """
+    Time-in-stage for stays entered in [start, end) (aware datetimes).
+
+    Returns [{'bucket', 'stages': {stage: {'count', 'avg', 'p50', 'p90',
+    'max', 'backward_transitions', 'histogram': [{'from_minutes', 'count'}]}}}].
+    The last histogram bin collects every stay of max_minutes or longer.
+    Open stays (the patient's current stage) are not included.
+    """
+    if group_by not in GROUP_BY_SQL:
+        raise ValueError(f'group_by must be one of {sorted(GROUP_BY_SQL)}')
+
+    sql = STAGE_ANALYTICS_SQL.format(
+        events=CheckInStatusEvent._meta.db_table,
+        checkins=PatientCheckIn._meta.db_table,
+        group_by=GROUP_BY_SQL[group_by],
+    )
+    params = {
+        'clinic_id': clinic.id,
+        'start': start,
+        'end': end,
+        'tz': getattr(clinic, 'timezone', None) or 'America/Chicago',
+        'bin_minutes': bin_minutes,
+        'max_minutes': max_minutes,
+        'stage_order': STAGE_ORDER,
+    }
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    groups = {}
+    for bucket, stage, bin_index, is_summary, count, avg, p50, p90, max_value, backward in rows:
+        stages = groups.setdefault(bucket, {})
+        if is_summary:
+            stages[stage] = {
+                'count': count,
+                'avg': _minutes(avg),
+                'p50': _minutes(p50),
+                'p90': _minutes(p90),
+                'max': _minutes(max_value),
+                'backward_transitions': backward,
+                'histogram': [],
+            }
+        else:
+            stages[stage]['histogram'].append({'from_minutes': bin_index * bin_minutes, 'count': count})
+
+    return [{'bucket': bucket, 'stages': stages} for bucket, stages in groups.items()]
@@ -0,0 +1,150 @@
+"""
+Provider free-slot search (GET /api/appointments/free-slots/).
+
+Busy intervals for every requested provider come from one query. Each
+(provider, day) pair is a group with its clinic-local working window;
+busy intervals are split across the days they touch, clipped to the
+window and merged per group with NumPy: a running maximum of end times
+over intervals sorted by start gives the covered prefix, and every start
+beyond it opens a gap. Groups are kept apart by offsetting their times,
+so all providers and days are merged in one pass.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+from rest_framework.fields import DateTimeField
+
+from scheduling.conflicts import BOOKED_STATUSES
+from scheduling.counters import clinic_timezone
+from scheduling.models import Appointment
+
+_datetime = DateTimeField()
+
+
+def free_windows(window_starts, window_ends, busy_groups, busy_starts, busy_ends, min_length):
+    """
+    Free [start, end) gaps of at least min_length inside each group's window.
+
+    window_starts / window_ends: int64 arrays, one entry per group.
+    busy_*: int64 arrays, one entry per busy interval (group index, start, end),
+    already clipped to the group's window. Returns (groups, starts, ends).
+    """
+    ngroups = len(window_starts)
+    # Sentinels pin each group's merge to its window edges.
+    groups = np.concatenate([busy_groups, np.arange(ngroups), np.arange(ngroups)])
+    starts = np.concatenate([busy_starts, window_starts, window_ends])
+    ends = np.concatenate([busy_ends, window_starts, window_ends])
+
+    # Shift each group past the previous one so one running max serves all.
+    span = int(max(window_ends.max() - window_starts.min(), 1)) + 1
+    offset = groups * span - window_starts.min()
+    starts = starts + offset
+    ends = ends + offset
+
+    order = np.lexsort((starts, groups))
+    groups, starts, ends = groups[order], starts[order], ends[order]
+    covered = np.maximum.accumulate(ends)
+
+    gap_starts = covered[:-1]
+    gap_ends = starts[1:]
+    keep = (groups[1:] == groups[:-1]) & (gap_ends - gap_starts >= min_length)
+    gap_groups = groups[1:][keep]
+    unshift = gap_groups * span - window_starts.min()
+    return gap_groups, gap_starts[keep] - unshift, gap_ends[keep] - unshift
+
+
+def _epoch_seconds(value):
+    return int(value.timestamp())
+
+
+def _render(seconds):
+    return _datetime.to_representation(datetime.fromtimestamp(int(seconds), tz=dt_timezone.utc))
+
+
+def find_free_slots(clinic, providers, start_date, end_date, duration_minutes, day_start, day_end, now=None):
+    """
+    Free windows of at least duration_minutes for each provider on the
+    clinic-local dates start_date..end_date between day_start and day_end
+    (datetime.time), never earlier than now. Appointments without an end
+    are taken to last DEFAULT_APPOINTMENT_MINUTES.
+
+    Returns [{'provider', 'provider_name', 'first_available', 'free': [{'start', 'end'}]}].
+    """
+    tz = clinic_timezone(clinic)
+    now = _epoch_seconds(now or timezone.now())
+    days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+
+    day_starts = np.array([_epoch_seconds(datetime.combine(day, day_start, tzinfo=tz)) for day in days], dtype=np.int64)
+    day_ends = np.array([_epoch_seconds(datetime.combine(day, day_end, tzinfo=tz)) for day in days], dtype=np.int64)
+    day_starts = np.maximum(day_starts, np.minimum(now, day_ends))
+
+    provider_index = {provider.id: i for i, provider in enumerate(providers)}
+    name_index = {provider.display_name.lower(): i for i, provider in enumerate(providers)}
+
+    search_start = datetime.fromtimestamp(int(day_starts.min()), tz=dt_timezone.utc)
+    search_end = datetime.fromtimestamp(int(day_ends.max()), tz=dt_timezone.utc)
+    busy = (
+        Appointment.objects.annotate(provider_name_lower=Lower('provider_name'))
+        .filter(
+            clinic=clinic,
+            status__in=BOOKED_STATUSES,
+            period__overlap=DateTimeTZRange(search_start, search_end),
+        )
+        .filter(
+            # Open-ended rows count as DEFAULT_APPOINTMENT_MINUTES long here.
+            Q(scheduled_end__isnull=False)
+            | Q(scheduled_start__gt=search_start - timedelta(minutes=settings.DEFAULT_APPOINTMENT_MINUTES))
+        )
+        .filter(
+            Q(provider_id__in=list(provider_index))
+            | Q(provider__isnull=True, provider_name_lower__in=list(name_index))
+        )
+        .values_list('provider_id', 'provider_name_lower', 'scheduled_start', 'scheduled_end')
+    )
+
+    default_length = settings.DEFAULT_APPOINTMENT_MINUTES * 60
+    rows = []
+    for provider_id, name, start, end in busy:
+        index = provider_index[provider_id] if provider_id else name_index[name]
+        start = _epoch_seconds(start)
+        rows.append((index, start, _epoch_seconds(end) if end else start + default_length))
+    rows = np.array(rows, dtype=np.int64).reshape(-1, 3)
+    provider_of, busy_starts, busy_ends = rows[:, 0], rows[:, 1], rows[:, 2]
+
+    # Split each interval over the days whose window it touches.
+    first_day = np.searchsorted(day_ends, busy_starts, side='right')
+    last_day = np.searchsorted(day_starts, busy_ends, side='left') - 1
+    repeats = np.clip(last_day - first_day + 1, 0, None)
+    day_of = np.repeat(first_day, repeats) + (
+        np.arange(repeats.sum()) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    )
+    provider_of = np.repeat(provider_of, repeats)
+    busy_starts = np.maximum(np.repeat(busy_starts, repeats), day_starts[day_of])
+    busy_ends = np.minimum(np.repeat(busy_ends, repeats), day_ends[day_of])
+
+    ndays = len(days)
+    gap_groups, gap_starts, gap_ends = free_windows(
+        np.tile(day_starts, len(providers)),
+        np.tile(day_ends, len(providers)),
+        provider_of * ndays + day_of,
+        busy_starts,
+        busy_ends,
+        duration_minutes * 60,
+    )
+
+    results = [
+        {'provider': provider.id, 'provider_name': provider.display_name, 'free': []}
+        for provider in providers
+    ]
+    for group, start, end in zip(gap_groups.tolist(), gap_starts.tolist(), gap_ends.tolist()):
+        entry = results[group // ndays]
+        entry['free'].append({'start': _render(start), 'end': _render(end)})
+    for entry in results:
+        entry['first_available'] = entry['free'][0]['start'] if entry['free'] else None
+    return results
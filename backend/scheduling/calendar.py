@@ -0,0 +1,133 @@
+"""
+Compact read path for the calendar endpoints (/appointments/range/, /today/).
+
+Rows carry the AppointmentSerializer keys but come from a single values()
+query joined to patient and provider, so there are no per-row lookups.
+Range responses stream the JSON array from a server-side cursor, keeping
+memory flat however many appointments a month holds (under ASGI too, see
+core.streaming).
+
+Month / week views only need badges, so /appointments/summary/ returns
+counts per clinic-local day, provider and status instead of rows: read
+from the ClinicDayCounter rollup, or grouped in SQL with a time-zone aware
+date truncation when ?source=live.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from rest_framework.fields import DateTimeField
+
+from core.streaming import streaming_response
+
+from scheduling.counters import APPOINTMENT, clinic_timezone
+from scheduling.models import Appointment, ClinicDayCounter
+
+CALENDAR_COLUMNS = (
+    'id',
+    'patient_id',
+    'patient__first_name',
+    'patient__middle_name',
+    'patient__last_name',
+    'patient__medical_record_number',
+    'scheduled_start',
+    'scheduled_end',
+    'provider_id',
+    'provider__display_name',
+    'provider_name',
+    'reason_for_visit',
+    'status',
+    'series_id',
+    'series_index',
+)
+STREAM_CHUNK_SIZE = 2000
+WRITE_BATCH_ROWS = 500
+MAX_SUMMARY_DAYS = 366
+SUMMARY_SOURCES = ('rollup', 'live')
+
+# Same datetime rendering as the serializers.
+_datetime = DateTimeField()
+
+
+def _render(value):
+    return _datetime.to_representation(value) if value is not None else None
+
+
+def calendar_rows(queryset):
+    """Iterate AppointmentSerializer-shaped dicts for queryset, one query."""
+    rows = queryset.values_list(*CALENDAR_COLUMNS).iterator(chunk_size=STREAM_CHUNK_SIZE)
+    for (pk, patient_id, first, middle, last, mrn, start, end,
+         provider_id, provider_display, provider_name, reason, status, series_id, series_index) in rows:
+        yield {
+            'id': pk,
+            'patient': patient_id,
+            'patient_name': f'{first} {middle} {last}' if middle else f'{first} {last}',
+            'mrn': mrn,
+            'scheduled_start': _render(start),
+            'scheduled_end': _render(end),
+            'provider': provider_id,
+            'provider_display_name': provider_display or provider_name or '',
+            'provider_name': provider_name,
+            'reason_for_visit': reason,
+            'status': status,
+            'series': series_id,
+            'series_index': series_index,
+        }
+
+
+def _json_array(rows):
+    """Encode rows as one JSON array, a few hundred rows per chunk."""
+    encoder = DjangoJSONEncoder()
+    chunk = ['[']
+    for index, row in enumerate(rows):
+        chunk.append((',' if index else '') + encoder.encode(row))
+        if len(chunk) >= WRITE_BATCH_ROWS:
+            yield ''.join(chunk)
+            chunk = []
+    chunk.append(']')
+    yield ''.join(chunk)
+
+
+def streaming_calendar_response(request, queryset):
+    return streaming_response(request, _json_array(calendar_rows(queryset)), content_type='application/json')
+
+
+def _summary_counts(clinic, start_date, end_date, source):
+    """(local date, provider_name, status, count) rows, one query."""
+    if source == 'rollup':
+        return ClinicDayCounter.objects.filter(
+            clinic=clinic, kind=APPOINTMENT, date__gte=start_date, date__lte=end_date, count__gt=0,
+        ).values_list('date', 'provider_name', 'status', 'count')
+
+    tz = clinic_timezone(clinic)
+    return (
+        Appointment.objects.filter(
+            clinic=clinic,
+            scheduled_start__gte=datetime.combine(start_date, time.min, tzinfo=tz),
+            scheduled_start__lt=datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=tz),
+        )
+        .annotate(day=TruncDate('scheduled_start', tzinfo=tz))
+        .values('day', 'provider_name', 'status')
+        .annotate(n=Count('id'))
+        .order_by()
+        .values_list('day', 'provider_name', 'status', 'n')
+    )
+
+
+def calendar_summary(clinic, start_date, end_date, source='rollup'):
+    """
+    Appointment counts for the clinic-local dates start_date..end_date
+    (inclusive), for month / week badges:
+    [{'date', 'total', 'by_status': {status: n}, 'by_provider': {name: {status: n}}}],
+    one entry per day that has appointments, in date order.
+    """
+    days = {}
+    for day, provider_name, status, count in _summary_counts(clinic, start_date, end_date, source):
+        entry = days.setdefault(day, {'date': day.isoformat(), 'total': 0, 'by_status': {}, 'by_provider': {}})
+        entry['total'] += count
+        entry['by_status'][status] = entry['by_status'].get(status, 0) + count
+        provider = entry['by_provider'].setdefault(provider_name or '', {})
+        provider[status] = provider.get(status, 0) + count
+    return [days[day] for day in sorted(days)]
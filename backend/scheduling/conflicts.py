@@ -0,0 +1,99 @@
+"""
+Appointment overlap checks on Appointment.period (tstzrange, GiST index).
+
+find_conflicts answers "does this patient already have a booking that
+day?" and "is the provider busy then?" with a single query.
+
+Conflicts are advisory by default. PROVIDER_OVERLAP_CONSTRAINT makes the
+database reject double-booking a provider; it is installed per deployment
+with `manage.py provider_overlap_constraint` rather than in a migration.
+Provider equality is written as a degenerate int8range so the constraint
+needs no btree_gist extension.
+"""
+
+from datetime import datetime, time, timedelta
+from functools import reduce
+from operator import or_
+
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import BigIntegerRangeField, RangeOperators
+from django.db import connection
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import BooleanField, ExpressionWrapper, F, Func, Q, Value
+from rest_framework.exceptions import ValidationError
+
+from scheduling.counters import clinic_timezone
+from scheduling.models import Appointment
+
+BOOKED_STATUSES = ['scheduled', 'checked_in', 'in_progress']
+
+PROVIDER_OVERLAP_CONSTRAINT = ExclusionConstraint(
+    name='appointment_provider_no_overlap',
+    expressions=[
+        (
+            Func(F('provider_id'), F('provider_id'), Value('[]'), function='int8range',
+                 output_field=BigIntegerRangeField()),
+            RangeOperators.OVERLAPS,
+        ),
+        ('period', RangeOperators.OVERLAPS),
+    ],
+    condition=Q(status__in=BOOKED_STATUSES, provider__isnull=False),
+)
+
+
+def find_conflicts(clinic, start, end, patient_id=None, provider_id=None, provider_name='',
+                   exclude_id=None, limit=10):
+    """
+    Booked appointments that are the patient's on start's clinic-local day
+    (duplicates) or the provider's overlapping [start, end) (conflicts;
+    provider_id first, provider_name fallback). end=None means open-ended.
+    Returns (duplicates, conflicts), each at most limit long.
+    """
+    tz = clinic_timezone(clinic)
+    day_start = datetime.combine(start.astimezone(tz).date(), time.min).replace(tzinfo=tz)
+
+    checks = {}
+    if patient_id:
+        checks['is_duplicate'] = Q(
+            patient_id=patient_id,
+            scheduled_start__gte=day_start,
+            scheduled_start__lt=day_start + timedelta(days=1),
+        )
+    provider_match = None
+    if provider_id:
+        provider_match = Q(provider_id=provider_id)
+    elif provider_name:
+        provider_match = Q(provider_name__iexact=provider_name)
+    if provider_match is not None:
+        checks['is_conflict'] = provider_match & Q(period__overlap=DateTimeTZRange(start, end, '[)'))
+    if not checks:
+        return [], []
+
+    qs = (
+        Appointment.objects.filter(clinic=clinic, status__in=BOOKED_STATUSES)
+        .filter(reduce(or_, checks.values()))
+        .annotate(**{name: ExpressionWrapper(q, output_field=BooleanField()) for name, q in checks.items()})
+        .select_related('patient', 'provider')
+        .order_by('scheduled_start')
+    )
+    if exclude_id:
+        qs = qs.exclude(pk=exclude_id)
+
+    rows = list(qs)
+    duplicates = [appt for appt in rows if getattr(appt, 'is_duplicate', False)]
+    conflicts = [appt for appt in rows if getattr(appt, 'is_conflict', False)]
+    return duplicates[:limit], conflicts[:limit]
+
+
+def provider_overlap_enforced():
+    """True if PROVIDER_OVERLAP_CONSTRAINT is installed on this database."""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_constraint WHERE conname = %s', [PROVIDER_OVERLAP_CONSTRAINT.name])
+        return cursor.fetchone() is not None
+
+
+def raise_for_provider_overlap(exc):
+    """Turn a PROVIDER_OVERLAP_CONSTRAINT violation into a 400; re-raise anything else."""
+    if PROVIDER_OVERLAP_CONSTRAINT.name in str(exc):
+        raise ValidationError({'provider': 'Provider already has an appointment at this time.'})
+    raise exc
@@ -0,0 +1,206 @@
+"""
+Incremental per-clinic day counters (ClinicDayCounter) for the dashboard.
+
+Writers snapshot an object's bucket before changing it and report the
+change afterwards, inside the same transaction:
+
+    before = checkin_bucket(checkin)
+    ...modify + save...
+    record_change(before, checkin_bucket(checkin))
+
+Only the buckets that actually moved are touched, one UPDATE each.
+Past days a change lands on are also flagged for the metrics rollups
+(mark_rollups_dirty).
+"""
+
+from collections import Counter
+from datetime import date
+from zoneinfo import ZoneInfo
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from scheduling.live_cache import bump_data_version
+from scheduling.models import Appointment, ClinicDayCounter, DailyMetricsRollup, PatientCheckIn
+
+APPOINTMENT = 'appointment'
+LIVE_CHECKIN = 'live_checkin'
+
+
+def clinic_timezone(clinic):
+    return ZoneInfo(getattr(clinic, 'timezone', None) or 'America/Chicago')
+
+
+def clinic_today(clinic):
+    return timezone.now().astimezone(clinic_timezone(clinic)).date()
+
+
+def appointment_bucket(appt):
+    """(clinic_id, local date, kind, status, provider_name) for an appointment."""
+    if appt is None or appt.pk is None or appt.scheduled_start is None:
+        return None
+    local_date = appt.scheduled_start.astimezone(clinic_timezone(appt.clinic)).date()
+    return (appt.clinic_id, local_date, APPOINTMENT, appt.status, appt.provider_name or '')
+
+
+def checkin_date(checkin):
+    """Clinic-local date a check-in is counted on, live or not."""
+    return checkin.check_in_time.astimezone(clinic_timezone(checkin.clinic)).date()
+
+
+def checkin_bucket(checkin):
+    """Bucket for a check-in while it is live (active and not checked out)."""
+    if checkin is None or checkin.pk is None or not checkin.is_active or checkin.check_out_time:
+        return None
+    return (checkin.clinic_id, checkin_date(checkin), LIVE_CHECKIN, checkin.status, checkin.provider_name or '')
+
+
+def mark_rollups_dirty(buckets):
+    """
+    Flag the stored DailyMetricsRollup days of buckets ((clinic_id, date, ...)
+    tuples) as edited. Only past days have rollup rows, so writes to today
+    and later match nothing.
+    """
+    dates = {}
+    for bucket in buckets:
+        if bucket is not None:
+            dates.setdefault(bucket[0], set()).add(bucket[1])
+    for clinic_id, days in dates.items():
+        DailyMetricsRollup.objects.filter(clinic_id=clinic_id, date__in=days, dirty=False).update(dirty=True)
+
+
+def record_change(before, after):
+    """
+    Move one unit from the before bucket to the after bucket (either may be
+    None). Every appointment / check-in write reports here, so this also
+    invalidates the clinic's cached live responses and marks the days'
+    rollups dirty.
+    """
+    for bucket in {before, after} - {None}:
+        bump_data_version(bucket[0])
+    mark_rollups_dirty([before, after])
+    if before == after:
+        return
+    if before is not None:
+        _bump(before, -1)
+    if after is not None:
+        _bump(after, 1)
+
+
+def record_created(buckets):
+    """record_change(None, bucket) for many new objects, as one upsert."""
+    counts = Counter(bucket for bucket in buckets if bucket is not None)
+    for clinic_id in {bucket[0] for bucket in counts}:
+        bump_data_version(clinic_id)
+    mark_rollups_dirty(counts)
+    _upsert_deltas(counts)
+
+
+def record_changes(changes):
+    """record_change for several (before, after) pairs, as one upsert."""
+    deltas = Counter()
+    for clinic_id in {bucket[0] for pair in changes for bucket in pair if bucket is not None}:
+        bump_data_version(clinic_id)
+    mark_rollups_dirty([bucket for pair in changes for bucket in pair])
+    for before, after in changes:
+        if before == after:
+            continue
+        if before is not None:
+            deltas[before] -= 1
+        if after is not None:
+            deltas[after] += 1
+    _upsert_deltas(deltas)
+
+
+def _upsert_deltas(deltas):
+    deltas = {bucket: n for bucket, n in deltas.items() if n}
+    if not deltas:
+        return
+    now = timezone.now()
+    params = []
+    # Sorted so concurrent upserts lock counter rows in the same order.
+    for bucket, n in sorted(deltas.items()):
+        params.extend([*bucket, n, now])
+    table = ClinicDayCounter._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (clinic_id, date, kind, status, provider_name, count, updated_at) '
+            f'VALUES {", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(deltas))} '
+            f'ON CONFLICT (clinic_id, date, kind, status, provider_name) '
+            f'DO UPDATE SET count = {table}.count + EXCLUDED.count, updated_at = EXCLUDED.updated_at',
+            params,
+        )
+
+
+def _bump(bucket, delta):
+    clinic_id, day, kind, status, provider_name = bucket
+    lookup = {
+        'clinic_id': clinic_id,
+        'date': day,
+        'kind': kind,
+        'status': status,
+        'provider_name': provider_name,
+    }
+    if ClinicDayCounter.objects.filter(**lookup).update(count=F('count') + delta, updated_at=timezone.now()):
+        return
+    try:
+        with transaction.atomic():
+            ClinicDayCounter.objects.create(count=delta, **lookup)
+    except IntegrityError:
+        # A concurrent writer created the row first.
+        ClinicDayCounter.objects.filter(**lookup).update(count=F('count') + delta, updated_at=timezone.now())
+
+
+def read_day_counters(clinic, dates):
+    """All non-zero counters for the given local dates, in one query."""
+    return list(
+        ClinicDayCounter.objects.filter(clinic=clinic, date__in=set(dates), count__gt=0)
+        .values_list('date', 'kind', 'status', 'provider_name', 'count')
+    )
+
+
+def rebuild_day_counters(clinic, start_date=None, end_date=None):
+    """
+    Recompute a clinic's counters from Appointment / PatientCheckIn rows.
+    Dates are clinic-local and inclusive; omit them to rebuild everything.
+    Returns the number of counter rows written.
+    """
+    tz = clinic_timezone(clinic)
+
+    appts = Appointment.objects.filter(clinic=clinic).annotate(day=TruncDate('scheduled_start', tzinfo=tz))
+    live = PatientCheckIn.objects.filter(
+        clinic=clinic, is_active=True, check_out_time__isnull=True,
+    ).annotate(day=TruncDate('check_in_time', tzinfo=tz))
+
+    counters = ClinicDayCounter.objects.filter(clinic=clinic)
+    if start_date:
+        appts, live, counters = appts.filter(day__gte=start_date), live.filter(day__gte=start_date), counters.filter(date__gte=start_date)
+    if end_date:
+        appts, live, counters = appts.filter(day__lte=end_date), live.filter(day__lte=end_date), counters.filter(date__lte=end_date)
+
+    rows = []
+    for kind, qs in ((APPOINTMENT, appts), (LIVE_CHECKIN, live)):
+        for row in qs.values('day', 'status', 'provider_name').annotate(n=Count('id')).order_by():
+            rows.append(ClinicDayCounter(
+                clinic=clinic,
+                date=row['day'],
+                kind=kind,
+                status=row['status'],
+                provider_name=row['provider_name'] or '',
+                count=row['n'],
+            ))
+
+    with transaction.atomic():
+        counters.delete()
+        ClinicDayCounter.objects.bulk_create(rows, batch_size=1000)
+        bump_data_version(clinic.id)
+    return len(rows)
+
+
+def parse_local_date(value, default):
+    try:
+        return date.fromisoformat(value) if value else default
+    except ValueError:
+        return default
@@ -0,0 +1,238 @@
+"""
+Bulk appointment import (POST /api/appointments/import/).
+
+Rows come from a CSV / XLSX upload (read with pandas) or a JSON list:
+    mrn               required; patient medical record number
+    scheduled_start   required; clinic-local unless it carries an offset
+    scheduled_end     optional
+    duration_minutes  optional; used when scheduled_end is blank
+    provider          optional; provider id or display name
+    provider_name     optional; free-text provider that is not a Provider
+    reason_for_visit  optional
+
+The batch is validated with a fixed number of queries (patients by MRN,
+the clinic's providers, booked appointments in the batch's time span);
+provider overlaps and same-day duplicates are then found in memory,
+against existing bookings and earlier rows of the same batch. Valid rows
+are inserted with one bulk_create; invalid rows are reported and skipped.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.utils.dateparse import parse_datetime
+
+from patients.models import Patient
+from providers.models import Provider
+from scheduling.conflicts import BOOKED_STATUSES
+from scheduling.counters import appointment_bucket, clinic_timezone, record_created
+from scheduling.models import Appointment
+
+SPREADSHEET_DATETIME_FORMATS = ['%m/%d/%Y %H:%M', '%m/%d/%Y %I:%M %p', '%m/%d/%Y %H:%M:%S']
+
+
+class ImportFileError(ValueError):
+    pass
+
+
+def read_upload(upload):
+    """Rows (dicts keyed by lower_snake column name) from a .csv or .xlsx upload."""
+    import pandas  # only needed for uploads
+
+    name = upload.name.lower()
+    try:
+        if name.endswith('.csv'):
+            frame = pandas.read_csv(upload, dtype=str, keep_default_na=False)
+        elif name.endswith(('.xlsx', '.xlsm')):
+            frame = pandas.read_excel(upload, dtype=str, keep_default_na=False, engine='openpyxl')
+        else:
+            raise ImportFileError('Upload a .csv or .xlsx file')
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ImportFileError(f'Could not read {upload.name}: {exc}')
+
+    frame.columns = [str(column).strip().lower().replace(' ', '_') for column in frame.columns]
+    return frame.to_dict('records')
+
+
+def _parse_datetime(value, tz):
+    """Aware datetime, or None if value is blank or not a real date/time."""
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value)
+    except ValueError:
+        # Well-formed but impossible, e.g. 2026-02-30.
+        return None
+    if parsed is None:
+        for fmt in SPREADSHEET_DATETIME_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+    if parsed is not None and parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=tz)
+    return parsed
+
+
+class _Bookings:
+    """Booked intervals per provider and booked (patient, local day) pairs."""
+
+    def __init__(self, tz):
+        self.tz = tz
+        self.by_provider = defaultdict(list)
+        self.patient_days = set()
+
+    @staticmethod
+    def _key(provider_id, provider_name):
+        # Same matching as find_conflicts: provider FK first, name fallback.
+        if provider_id:
+            return ('id', provider_id)
+        if provider_name:
+            return ('name', provider_name.lower())
+        return None
+
+    def add(self, patient_id, provider_id, provider_name, start, end):
+        self.patient_days.add((patient_id, start.astimezone(self.tz).date()))
+        if provider_id:
+            self.by_provider[('id', provider_id)].append((start, end))
+        if provider_name:
+            self.by_provider[('name', provider_name.lower())].append((start, end))
+
+    def has_patient_day(self, patient_id, start):
+        return (patient_id, start.astimezone(self.tz).date()) in self.patient_days
+
+    def provider_busy(self, provider_id, provider_name, start, end):
+        key = self._key(provider_id, provider_name)
+        if key is None:
+            return False
+        # None means open-ended, as in Appointment.period.
+        return any(
+            (end is None or other_start < end) and (other_end is None or other_end > start)
+            for other_start, other_end in self.by_provider.get(key, ())
+        )
+
+
+def _clean(raw):
+    return {
+        str(key).strip().lower(): '' if value is None else str(value).strip()
+        for key, value in raw.items()
+    }
+
+
+def import_appointments(clinic, rows, dry_run=False):
+    """
+    Validate rows and create the valid ones. Returns
+    {'received', 'created', 'dry_run', 'appointment_ids', 'errors'}, where
+    errors is [{'row', 'mrn', 'errors': {field: message}}] and row is the
+    1-based position among the data rows.
+    """
+    tz = clinic_timezone(clinic)
+    default_minutes = settings.DEFAULT_APPOINTMENT_MINUTES
+
+    parsed = []
+    for number, raw in enumerate(rows, start=1):
+        row = _clean(raw)
+        problems = {}
+        if not row.get('mrn'):
+            problems['mrn'] = 'Required'
+
+        start = _parse_datetime(row.get('scheduled_start'), tz)
+        if start is None:
+            problems['scheduled_start'] = 'Required; use YYYY-MM-DD HH:MM'
+
+        end = _parse_datetime(row.get('scheduled_end'), tz)
+        if row.get('scheduled_end') and end is None:
+            problems['scheduled_end'] = 'Invalid datetime'
+        elif start and end is None:
+            try:
+                end = start + timedelta(minutes=int(float(row.get('duration_minutes') or default_minutes)))
+            except (ValueError, OverflowError):
+                problems['duration_minutes'] = 'Must be a number of minutes'
+        if start and end and end <= start:
+            problems['scheduled_end'] = 'Must be after scheduled_start'
+
+        parsed.append({'number': number, 'row': row, 'start': start, 'end': end, 'problems': problems})
+
+    mrns = {item['row']['mrn'] for item in parsed if item['row'].get('mrn')}
+    patients = {
+        patient.medical_record_number: patient
+        for patient in Patient.objects.filter(clinic=clinic, is_active=True, medical_record_number__in=mrns)
+    }
+    providers_by_id = {}
+    providers_by_name = {}
+    for provider in Provider.objects.filter(clinic=clinic, is_active=True):
+        providers_by_id[str(provider.id)] = provider
+        providers_by_name[provider.display_name.lower()] = provider
+
+    bookings = _Bookings(tz)
+    starts = [item['start'] for item in parsed if item['start'] and item['end']]
+    if starts:
+        first_day = min(starts).astimezone(tz).date()
+        last_day = max(item['end'] for item in parsed if item['start'] and item['end']).astimezone(tz).date()
+        span = DateTimeTZRange(
+            datetime.combine(first_day, time.min).replace(tzinfo=tz),
+            datetime.combine(last_day + timedelta(days=1), time.min).replace(tzinfo=tz),
+        )
+        existing = Appointment.objects.filter(
+            clinic=clinic, status__in=BOOKED_STATUSES, period__overlap=span,
+        ).values_list('patient_id', 'provider_id', 'provider_name', 'scheduled_start', 'scheduled_end')
+        for booking in existing:
+            bookings.add(*booking)
+
+    appointments = []
+    errors = []
+    for item in parsed:
+        row, start, end, problems = item['row'], item['start'], item['end'], item['problems']
+
+        patient = patients.get(row.get('mrn'))
+        if row.get('mrn') and patient is None:
+            problems['mrn'] = 'No active patient with this MRN'
+
+        provider = None
+        provider_name = row.get('provider_name', '')
+        if row.get('provider'):
+            provider = providers_by_id.get(row['provider']) or providers_by_name.get(row['provider'].lower())
+            if provider is None:
+                problems['provider'] = 'Unknown provider'
+            else:
+                provider_name = provider.display_name
+
+        if not problems:
+            provider_id = provider.id if provider else None
+            if bookings.has_patient_day(patient.id, start):
+                problems['scheduled_start'] = 'Patient already has an appointment that day'
+            elif bookings.provider_busy(provider_id, provider_name, start, end):
+                problems['provider'] = 'Provider already has an appointment at this time'
+            else:
+                bookings.add(patient.id, provider_id, provider_name, start, end)
+
+        if problems:
+            errors.append({'row': item['number'], 'mrn': row.get('mrn', ''), 'errors': problems})
+            continue
+
+        appointments.append(Appointment(
+            clinic=clinic,
+            patient=patient,
+            provider=provider,
+            provider_name=provider_name,
+            scheduled_start=start,
+            scheduled_end=end,
+            reason_for_visit=row.get('reason_for_visit', '')[:255],
+        ))
+
+    if appointments and not dry_run:
+        with transaction.atomic():
+            Appointment.objects.bulk_create(appointments, batch_size=500)
+            record_created(appointment_bucket(appt) for appt in appointments)
+
+    return {
+        'received': len(parsed),
+        'created': 0 if dry_run else len(appointments),
+        'dry_run': dry_run,
+        'appointment_ids': [] if dry_run else [appt.id for appt in appointments],
+        'errors': errors,
+    }
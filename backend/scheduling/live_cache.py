@@ -0,0 +1,78 @@
+"""
+Per-clinic data version and shared cache for polled live endpoints
+(/api/metrics/dashboard/, /api/checkins/live/).
+
+Every appointment or check-in write bumps the clinic's data version once
+its transaction commits. Responses are cached under
+(endpoint, clinic, version, date), so a write makes the next poll rebuild
+and everything else is served from the cache. When an entry is missing,
+one worker rebuilds it under a short lock while the others wait for the
+result.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'clinic-data-version:{clinic_id}'
+LOCK_TIMEOUT_SECONDS = 10
+WAIT_TIMEOUT_SECONDS = 5
+WAIT_POLL_SECONDS = 0.05
+
+
+def _initial_version():
+    # Time-based so a version key lost to eviction never reuses old keys.
+    return int(time.time() * 1000)
+
+
+def data_version(clinic_id):
+    key = VERSION_KEY.format(clinic_id=clinic_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_data_version(clinic_id):
+    """Invalidate the clinic's cached live responses after the current transaction commits."""
+    key = VERSION_KEY.format(clinic_id=clinic_id)
+
+    def _bump():
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_version(), timeout=None)
+
+    transaction.on_commit(_bump)
+
+
+def cached_live_response(endpoint, clinic_id, day, build):
+    """
+    Return build() for (endpoint, clinic, data version, day), computing it
+    at most once per version across workers. build must return picklable data.
+    """
+    key = f'live:{endpoint}:{clinic_id}:{data_version(clinic_id)}:{day}'
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT_SECONDS):
+        try:
+            value = build()
+            cache.set(key, value, timeout=settings.LIVE_DATA_CACHE_SECONDS)
+            return value
+        finally:
+            cache.delete(lock_key)
+
+    # Another worker is rebuilding this entry; wait for its result.
+    deadline = time.monotonic() + WAIT_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_POLL_SECONDS)
+        value = cache.get(key)
+        if value is not None:
+            return value
+    return build()
@@ -0,0 +1,302 @@
+"""
+Push channel for the live patient board (Server-Sent Events over ASGI).
+
+Check-in writes publish a per-clinic event after commit:
+    {"type": "upsert", "checkin": {...PatientCheckInSerializer...}}
+    {"type": "remove", "id": <checkin id>}
+Connected boards apply these diffs instead of re-downloading the board.
+
+live_events_app is mounted at LIVE_EVENTS_PATH by emr/asgi.py. Brokers:
+- 'memory': in-process pub/sub (single worker, development, tests)
+- 'redis':  Redis pub/sub on LIVE_EVENTS_REDIS_URL, shared by all workers;
+            required when more than one worker serves the stream
+
+EventSource cannot send an Authorization header, so a board first POSTs
+to /api/live/ticket/ for a short-lived, single-use signed ticket and opens
+LIVE_EVENTS_PATH?ticket=<ticket>; the JWT never appears in a URL. The
+stream ends when the access token it was issued for expires, and the board
+reconnects with a fresh ticket.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+LIVE_EVENTS_PATH = '/api/live/events/'
+TICKET_SALT = 'scheduling.live_events.ticket'
+HEARTBEAT_SECONDS = 15
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def channel_name(clinic_id):
+    return f'live-board:{clinic_id}'
+
+
+class MemorySubscription:
+    def __init__(self, broker, clinic_id):
+        self.broker = broker
+        self.clinic_id = clinic_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def offer(self, message):
+        # Runs on the subscriber's loop; a board this far behind resyncs on reconnect.
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            logger.warning('Dropping live event for slow subscriber (clinic %s)', self.clinic_id)
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker._unsubscribe(self)
+
+
+class MemoryBroker:
+    """In-process pub/sub; publish() may be called from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def publish(self, clinic_id, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(clinic_id, ()))
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(subscription.offer, message)
+
+    async def subscribe(self, clinic_id):
+        subscription = MemorySubscription(self, clinic_id)
+        with self._lock:
+            self._subscribers.setdefault(clinic_id, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.clinic_id, set())
+            subscribers.discard(subscription)
+            if not subscribers:
+                self._subscribers.pop(subscription.clinic_id, None)
+
+
+class RedisSubscription:
+    def __init__(self, client, pubsub):
+        self.client = client
+        self.pubsub = pubsub
+
+    async def get(self, timeout):
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        return message['data'].decode() if message else None
+
+    async def close(self):
+        await self.pubsub.aclose()
+        await self.client.aclose()
+
+
+class RedisBroker:
+    """Redis pub/sub; every worker's subscribers see every worker's events."""
+
+    def __init__(self, url):
+        import redis
+
+        self.url = url
+        self._client = redis.Redis.from_url(url)
+
+    def publish(self, clinic_id, message):
+        self._client.publish(channel_name(clinic_id), message)
+
+    async def subscribe(self, clinic_id):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(channel_name(clinic_id))
+        return RedisSubscription(client, pubsub)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            if settings.LIVE_EVENTS_BROKER == 'redis':
+                _broker = RedisBroker(settings.LIVE_EVENTS_REDIS_URL)
+            else:
+                _broker = MemoryBroker()
+        return _broker
+
+
+def publish_checkin_event(checkin):
+    """Queue a board diff for this check-in, sent once the transaction commits."""
+    from scheduling.serializers import PatientCheckInSerializer
+
+    if checkin.is_active:
+        event = {'type': 'upsert', 'checkin': PatientCheckInSerializer(checkin).data}
+    else:
+        event = {'type': 'remove', 'id': checkin.id}
+    message = json.dumps(event, cls=DjangoJSONEncoder)
+    clinic_id = checkin.clinic_id
+
+    def _publish():
+        try:
+            get_broker().publish(clinic_id, message)
+        except Exception:
+            # Boards fall back to their periodic refresh.
+            logger.exception('Failed to publish live board event for clinic %s', clinic_id)
+
+    transaction.on_commit(_publish)
+
+
+# --- ASGI endpoint ---
+
+# --- Stream tickets ---
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def live_events_ticket(request):
+    """Single-use ticket for GET LIVE_EVENTS_PATH?ticket=..., valid LIVE_EVENTS_TICKET_SECONDS."""
+    token = request.auth
+    if token is not None and 'exp' in getattr(token, 'payload', {}):
+        expires_at = int(token.payload['exp'])
+    else:
+        expires_at = int(time.time() + settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds())
+    ticket = signing.dumps({'user': request.user.id, 'exp': expires_at}, salt=TICKET_SALT)
+    return Response({'ticket': ticket, 'expires_in': settings.LIVE_EVENTS_TICKET_SECONDS})
+
+
+def _redeem_ticket(ticket):
+    """(user, access token expiry) for a fresh, unused ticket, else (None, None)."""
+    from core.models import User
+
+    try:
+        data = signing.loads(ticket, salt=TICKET_SALT, max_age=settings.LIVE_EVENTS_TICKET_SECONDS)
+    except signing.BadSignature:
+        return None, None
+    used_key = 'live-ticket:' + hashlib.sha1(ticket.encode()).hexdigest()
+    if not cache.add(used_key, 1, timeout=settings.LIVE_EVENTS_TICKET_SECONDS + 5):
+        return None, None
+    user = User.objects.filter(pk=data['user'], is_active=True, clinic__isnull=False).first()
+    return (user, data['exp']) if user else (None, None)
+
+
+def _authenticate(raw_token):
+    """(user, expiry) for an Authorization: Bearer access token, else (None, None)."""
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+    from rest_framework.exceptions import AuthenticationFailed
+
+    auth = JWTAuthentication()
+    try:
+        token = auth.get_validated_token(raw_token)
+        user = auth.get_user(token)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None, None
+    return (user, int(token['exp'])) if user.is_active and user.clinic_id else (None, None)
+
+
+def _audit_subscription(user, client_ip, user_agent):
+    from core.models import AuditLog
+
+    AuditLog.log_action(
+        user=user,
+        action='view',
+        resource_type='live_board_stream',
+        changes={'detail': 'Subscribed to live board events'},
+        ip_address=client_ip,
+        user_agent=user_agent,
+    )
+
+
+def _cors_headers(headers):
+    origin = headers.get(b'origin', b'').decode()
+    if origin and origin in settings.CORS_ALLOWED_ORIGINS:
+        return [(b'access-control-allow-origin', origin.encode()), (b'vary', b'Origin')]
+    return []
+
+
+async def _wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+async def live_events_app(scope, receive, send):
+    """
+    GET LIVE_EVENTS_PATH?ticket=<from /api/live/ticket/>; an
+    Authorization: Bearer header also works for non-browser clients.
+    """
+    headers = dict(scope.get('headers') or [])
+    ticket = parse_qs(scope.get('query_string', b'').decode()).get('ticket', [''])[0]
+    raw_token = headers.get(b'authorization', b'').decode().removeprefix('Bearer ').strip()
+
+    user, expires_at = None, None
+    if ticket:
+        user, expires_at = await sync_to_async(_redeem_ticket)(ticket)
+    elif raw_token:
+        user, expires_at = await sync_to_async(_authenticate)(raw_token)
+    if user is None:
+        await send({
+            'type': 'http.response.start',
+            'status': 401,
+            'headers': [(b'content-type', b'application/json')] + _cors_headers(headers),
+        })
+        await send({'type': 'http.response.body', 'body': b'{"detail": "Authentication required"}'})
+        return
+
+    client_ip = (scope.get('client') or ('', 0))[0]
+    await sync_to_async(_audit_subscription)(user, client_ip, headers.get(b'user-agent', b'').decode())
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ] + _cors_headers(headers),
+    })
+    await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+
+    subscription = await get_broker().subscribe(user.clinic_id)
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        while not disconnected.done():
+            # Stop at token expiry; the board reconnects with a new ticket.
+            remaining = expires_at - time.time()
+            if remaining <= 0:
+                break
+            next_message = asyncio.ensure_future(subscription.get(min(HEARTBEAT_SECONDS, remaining)))
+            await asyncio.wait({next_message, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected.done():
+                next_message.cancel()
+                break
+            message = next_message.result()
+            body = f'data: {message}\n\n' if message is not None else ': keepalive\n\n'
+            await send({'type': 'http.response.body', 'body': body.encode(), 'more_body': True})
+    finally:
+        disconnected.cancel()
+        await subscription.close()
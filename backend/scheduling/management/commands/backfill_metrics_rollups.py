@@ -0,0 +1,51 @@
+"""
+Backfill DailyMetricsRollup for historical days, in chunks.
+
+Each chunk is one set of aggregate queries over chunk-days of data, so a
+multi-year backfill doesn't hold one long-running scan:
+    python manage.py backfill_metrics_rollups --start 2024-01-01
+    python manage.py backfill_metrics_rollups --clinic 3 --start 2025-01-01 --end 2025-06-30 --chunk-days 14
+"""
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Clinic
+from scheduling.counters import clinic_today
+from scheduling.rollups import refresh_daily_rollups
+
+
+class Command(BaseCommand):
+    help = 'Compute daily metrics rollups for a date range (defaults to up to yesterday).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', required=True, help='First clinic-local date (YYYY-MM-DD).')
+        parser.add_argument('--end', help='Last clinic-local date (YYYY-MM-DD); default yesterday.')
+        parser.add_argument('--clinic', type=int, action='append', help='Clinic id; repeatable. Default: all.')
+        parser.add_argument('--chunk-days', type=int, default=31)
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start'])
+            end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if options['chunk_days'] < 1:
+            raise CommandError('--chunk-days must be at least 1')
+
+        clinics = Clinic.objects.all()
+        if options['clinic']:
+            clinics = clinics.filter(id__in=options['clinic'])
+
+        for clinic in clinics.order_by('id'):
+            last = end or clinic_today(clinic) - timedelta(days=1)
+            chunk_start = start
+            written = 0
+            while chunk_start <= last:
+                chunk_end = min(chunk_start + timedelta(days=options['chunk_days'] - 1), last)
+                written += refresh_daily_rollups(clinic, chunk_start, chunk_end)
+                chunk_start = chunk_end + timedelta(days=1)
+            self.stdout.write(f'{clinic}: {written} days rolled up')
+
+        self.stdout.write(self.style.SUCCESS('Metrics rollups backfilled'))
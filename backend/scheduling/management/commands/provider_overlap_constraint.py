@@ -0,0 +1,48 @@
+"""
+Install or remove the database constraint that rejects overlapping booked
+appointments for the same provider (scheduling.conflicts):
+    python manage.py provider_overlap_constraint
+    python manage.py provider_overlap_constraint --drop
+
+Existing overlaps must be resolved first; they are listed if installing fails.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection, transaction
+
+from scheduling.conflicts import BOOKED_STATUSES, PROVIDER_OVERLAP_CONSTRAINT
+from scheduling.models import Appointment
+
+OVERLAPS_SQL = """
+SELECT a.id, b.id, a.provider_id
+FROM {table} a
+JOIN {table} b ON a.provider_id = b.provider_id AND a.id < b.id AND a.period && b.period
+WHERE a.status = ANY(%(statuses)s) AND b.status = ANY(%(statuses)s)
+ORDER BY a.provider_id, a.id
+LIMIT 50
+"""
+
+
+class Command(BaseCommand):
+    help = 'Enforce (or stop enforcing) no overlapping appointments per provider.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--drop', action='store_true', help='Remove the constraint.')
+
+    def handle(self, *args, **options):
+        if options['drop']:
+            with connection.schema_editor() as editor:
+                editor.remove_constraint(Appointment, PROVIDER_OVERLAP_CONSTRAINT)
+            self.stdout.write(self.style.SUCCESS('Provider overlap constraint removed'))
+            return
+
+        try:
+            with transaction.atomic(), connection.schema_editor(atomic=False) as editor:
+                editor.add_constraint(Appointment, PROVIDER_OVERLAP_CONSTRAINT)
+        except IntegrityError:
+            with connection.cursor() as cursor:
+                cursor.execute(OVERLAPS_SQL.format(table=Appointment._meta.db_table), {'statuses': BOOKED_STATUSES})
+                for first, second, provider_id in cursor.fetchall():
+                    self.stderr.write(f'provider {provider_id}: appointments {first} and {second} overlap')
+            raise CommandError('Existing appointments overlap; resolve them and retry.')
+        self.stdout.write(self.style.SUCCESS('Provider overlap constraint installed'))
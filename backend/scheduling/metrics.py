@@ -1,21 +1,99 @@
-from datetime import datetime, time, timedelta
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from django.utils import timezone
-from django.db.models import Count
-from scheduling.models import Appointment, PatientCheckIn
-
-ALERT_THRESHOLDS_MINUTES = {
+from django.db.models import (
+    Aggregate, Avg, Case, Count, F, FloatField, Func, IntegerField, Max, OuterRef, Q, Subquery, Value, When,
+)
+from django.db.models.functions import Cast, Coalesce, Floor
+from scheduling.counters import APPOINTMENT, LIVE_CHECKIN, parse_local_date, read_day_counters
+from scheduling.models import PatientCheckIn, WaitTimeAlertThreshold
+
+# Used for statuses a clinic has no WaitTimeAlertThreshold row for
+DEFAULT_ALERT_THRESHOLDS_MINUTES = {
     'checked_in':     15,
     'pre_op':         30,
     'operating_room': 90,
     'pacu':           45,
 }
 
+# (stage, start column, end column) on PatientCheckIn
+STAGE_INTERVALS = [
+    ('checked_in',     'check_in_time',     'pre_op_at'),
+    ('pre_op',         'pre_op_at',         'operating_room_at'),
+    ('operating_room', 'operating_room_at', 'pacu_at'),
+    ('pacu',           'pacu_at',           'discharged_at'),
+    ('total_visit',    'check_in_time',     'discharged_at'),
+]
+
 def minutes_between(a, b):
     if not a or not b:
         return None
     return int((b - a).total_seconds() // 60)
 
+class MinutesBetween(Func):
+    """Minutes from start to end, computed in the database."""
+    template = 'EXTRACT(EPOCH FROM (%(expressions)s)) / 60.0'
+    arg_joiner = ' - '
+    output_field = FloatField()
+
+    def __init__(self, start, end, **extra):
+        super().__init__(end, start, **extra)
+
+class PercentileCont(Aggregate):
+    function = 'PERCENTILE_CONT'
+    template = '%(function)s(%(fraction)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+    output_field = FloatField()
+
+    def __init__(self, expression, fraction, **extra):
+        super().__init__(expression, fraction=float(fraction), **extra)
+
+def stage_duration_stats(checkins_qs):
+    """
+    Per-stage durations (minutes) for a PatientCheckIn queryset in a single
+    aggregate query: {stage: {'count', 'avg', 'p50', 'p90', 'max'}}.
+    A stage counts only for check-ins with both timestamps, in order.
+    """
+    aggregates = {}
+    for stage, start, end in STAGE_INTERVALS:
+        minutes = MinutesBetween(start, end)
+        valid = Q(**{f'{start}__isnull': False, f'{end}__gte': F(start)})
+        aggregates[f'{stage}__count'] = Count('id', filter=valid)
+        aggregates[f'{stage}__avg'] = Avg(minutes, filter=valid)
+        aggregates[f'{stage}__p50'] = PercentileCont(minutes, 0.5, filter=valid)
+        aggregates[f'{stage}__p90'] = PercentileCont(minutes, 0.9, filter=valid)
+        aggregates[f'{stage}__max'] = Max(minutes, filter=valid)
+
+    row = checkins_qs.aggregate(**aggregates)
+
+    stats = {}
+    for stage, _, _ in STAGE_INTERVALS:
+        stats[stage] = {'count': row[f'{stage}__count']}
+        for stat in ('avg', 'p50', 'p90', 'max'):
+            value = row[f'{stage}__{stat}']
+            stats[stage][stat] = int(value) if value is not None else None
+    return stats
+
+def alert_thresholds(clinic):
+    """Effective {status: minutes} wait-time thresholds for a clinic."""
+    thresholds = dict(DEFAULT_ALERT_THRESHOLDS_MINUTES)
+    thresholds.update(
+        WaitTimeAlertThreshold.objects.filter(clinic=clinic).values_list('status', 'minutes')
+    )
+    return thresholds
+
+def alert_threshold_expression():
+    """Per-row threshold for a PatientCheckIn queryset: clinic row, else the default."""
+    clinic_threshold = WaitTimeAlertThreshold.objects.filter(
+        clinic=OuterRef('clinic'),
+        status=OuterRef('status'),
+    ).values('minutes')[:1]
+    default = Case(
+        *[When(status=status, then=Value(minutes)) for status, minutes in DEFAULT_ALERT_THRESHOLDS_MINUTES.items()],
+        default=None,
+        output_field=IntegerField(),
+    )
+    return Coalesce(Subquery(clinic_threshold, output_field=IntegerField()), default)
+
 def build_dashboard_metrics(clinic, date_str=None):
     now = timezone.now()
 
@@ -31,146 +109,127 @@ def build_dashboard_metrics(clinic, date_str=None):
         check_in_time__gte=start_of_today,
     )
 
-    by_status = list(
-        live_qs.values('status')
-        .annotate(count=Count('id'))
-        .order_by('status')
-    )
-
-    by_provider = list(
-        live_qs.values('provider_name')
-        .annotate(count=Count('id'))
-        .order_by('-count')
-    )
-
-    # Today's appointments (clinic-local timezone)
-    clinic_tz = ZoneInfo(getattr(clinic, 'timezone', None) or 'America/Chicago')
-    now_local = now.astimezone(clinic_tz)
-
-    target_date = now_local.date()
-    if date_str:
-        try:
-            from datetime import date
-            target_date = date.fromisoformat(date_str)
-        except Exception:
-            pass
-
-    start_utc = datetime.combine(target_date, time.min).replace(tzinfo=clinic_tz).astimezone(ZoneInfo("UTC"))
-    end_utc   = datetime.combine(target_date, time.max).replace(tzinfo=clinic_tz).astimezone(ZoneInfo("UTC"))
-
-    today_appts_qs = Appointment.objects.filter(
-        clinic=clinic,
-        scheduled_start__range=(start_utc, end_utc),
-    )
-
-    today_outcomes = list(
-        today_appts_qs.values('status')
-        .annotate(count=Count('id'))
-        .order_by('status')
-    )
+    # Live board counts (today) and appointment outcomes (target date)
+    # come precomputed from ClinicDayCounter in one query.
+    today = now_local.date()
+    target_date = parse_local_date(date_str, today)
+
+    live_by_status, live_by_provider = {}, {}
+    outcomes, outcomes_by_provider = {}, {}
+    for day, kind, status, provider_name, count in read_day_counters(clinic, [today, target_date]):
+        if kind == LIVE_CHECKIN and day == today:
+            live_by_status[status] = live_by_status.get(status, 0) + count
+            live_by_provider[provider_name] = live_by_provider.get(provider_name, 0) + count
+        elif kind == APPOINTMENT and day == target_date:
+            outcomes[status] = outcomes.get(status, 0) + count
+            key = (provider_name, status)
+            outcomes_by_provider[key] = outcomes_by_provider.get(key, 0) + count
+
+    by_status = [{'status': k, 'count': v} for k, v in sorted(live_by_status.items())]
+    by_provider = [
+        {'provider_name': k, 'count': v}
+        for k, v in sorted(live_by_provider.items(), key=lambda item: -item[1])
+    ]
+    today_outcomes = [{'status': k, 'count': v} for k, v in sorted(outcomes.items())]
+    today_by_provider = [
+        {'provider_name': provider_name, 'status': status, 'count': v}
+        for (provider_name, status), v in sorted(outcomes_by_provider.items())
+    ]
 
-    today_by_provider = list(
-        today_appts_qs.values('provider_name', 'status')
-        .annotate(count=Count('id'))
-        .order_by('provider_name', 'status')
+    # Longest waiters: elapsed minutes and thresholds computed in the query
+    waiter_rows = (
+        live_qs.annotate(
+            minutes_in_status=Cast(
+                Floor(MinutesBetween(Coalesce('status_changed_at', 'check_in_time'), Value(now))),
+                IntegerField(),
+            ),
+            threshold_minutes=alert_threshold_expression(),
+        )
+        .order_by('status_changed_at')
+        .values(
+            'id', 'patient_id', 'status', 'minutes_in_status', 'threshold_minutes',
+            'patient__first_name', 'patient__middle_name', 'patient__last_name',
+            'patient__medical_record_number',
+        )[:10]
     )
-
-    # Longest waiters
     waiters = []
-    for c in live_qs.select_related('patient').order_by('status_changed_at')[:50]:
-        mins = minutes_between(c.status_changed_at or c.check_in_time, now) or 0
-        threshold = ALERT_THRESHOLDS_MINUTES.get(c.status)
+    for row in waiter_rows:
+        name_parts = [row['patient__first_name'], row['patient__middle_name'], row['patient__last_name']]
+        mins = max(row['minutes_in_status'] or 0, 0)
+        threshold = row['threshold_minutes']
         waiters.append({
-            'checkin_id':        c.id,
-            'patient_id':        c.patient_id,
-            'patient_name':      c.patient.full_name,
-            'mrn':               c.patient.medical_record_number,
-            'status':            c.status,
+            'checkin_id':        row['id'],
+            'patient_id':        row['patient_id'],
+            'patient_name':      ' '.join(part for part in name_parts if part),
+            'mrn':               row['patient__medical_record_number'],
+            'status':            row['status'],
             'minutes_in_status': mins,
             'alert':             threshold is not None and mins >= threshold,
             'threshold_minutes': threshold,
         })
 
-    # Average total visit duration for discharged patients today
-    discharged_today = PatientCheckIn.objects.filter(
+    # Stage / total visit durations for today's check-ins
+    stage_durations = stage_duration_stats(PatientCheckIn.objects.filter(
         clinic=clinic,
-        discharged_at__isnull=False,
         check_in_time__gte=start_of_today,
-    )
-
-    durations = [
-        d for d in (
-            minutes_between(c.check_in_time, c.discharged_at)
-            for c in discharged_today
-        ) if d is not None
-    ]
-    avg_total = int(sum(durations) / len(durations)) if durations else None
+    ))
 
     return {
         'generated_at':                      now.isoformat(),
         'live_counts_by_status':             by_status,
         'live_counts_by_provider_name':      by_provider,
-        'avg_total_visit_minutes_today':     avg_total,
-        'wait_time_alert_thresholds_minutes': ALERT_THRESHOLDS_MINUTES,
-        'longest_waiters':                   waiters[:10],
-        'today_total_appointments':          today_appts_qs.count(),
+        'avg_total_visit_minutes_today':     stage_durations['total_visit']['avg'],
+        'stage_durations_minutes_today':     stage_durations,
+        'wait_time_alert_thresholds_minutes': alert_thresholds(clinic),
+        'longest_waiters':                   waiters,
+        'today_total_appointments':          sum(outcomes.values()),
         'today_outcomes_by_status':          today_outcomes,
         'today_outcomes_by_provider':        today_by_provider,
     }
 
 def build_range_metrics(clinic, start_str, end_str):
-    """Aggregate appointment outcomes across a date range."""
+    """
+    Aggregate appointment outcomes and stage durations across a date range.
+
+    Past days come from DailyMetricsRollup; only the current day (and days
+    not rolled up yet) is computed live. Percentiles over a range are
+    estimated from the rollup histograms (5-minute resolution).
+    """
     from datetime import date
-    clinic_tz = ZoneInfo(getattr(clinic, 'timezone', None) or 'America/Chicago')
+    from scheduling.rollups import load_range_rollups, merge_stage_durations, summarize_stage_durations
 
     try:
         start_date = date.fromisoformat(start_str)
         end_date = date.fromisoformat(end_str)
     except Exception:
         return None
+    if end_date < start_date:
+        return None
 
-    start_utc = datetime.combine(start_date, time.min).replace(tzinfo=clinic_tz).astimezone(ZoneInfo("UTC"))
-    end_utc = datetime.combine(end_date, time.max).replace(tzinfo=clinic_tz).astimezone(ZoneInfo("UTC"))
-
-    appts_qs = Appointment.objects.filter(
-        clinic=clinic,
-        scheduled_start__range=(start_utc, end_utc),
-    )
-
-    outcomes = list(
-        appts_qs.values('status')
-        .annotate(count=Count('id'))
-        .order_by('status')
-    )
-
-    by_provider = list(
-        appts_qs.values('provider_name', 'status')
-        .annotate(count=Count('id'))
-        .order_by('provider_name', 'status')
-    )
+    days = load_range_rollups(clinic, start_date, end_date).values()
 
-    discharged_qs = PatientCheckIn.objects.filter(
-        clinic=clinic,
-        discharged_at__isnull=False,
-        check_in_time__gte=start_utc,
-        check_in_time__lte=end_utc,
-    )
+    by_status, by_provider_status = {}, {}
+    for data in days:
+        for provider_name, status, count in data['outcomes']:
+            by_status[status] = by_status.get(status, 0) + count
+            key = (provider_name, status)
+            by_provider_status[key] = by_provider_status.get(key, 0) + count
 
-    durations = [
-        d for d in (
-            minutes_between(c.check_in_time, c.discharged_at)
-            for c in discharged_qs
-        ) if d is not None
+    outcomes = [{'status': k, 'count': v} for k, v in sorted(by_status.items())]
+    by_provider = [
+        {'provider_name': provider_name, 'status': status, 'count': v}
+        for (provider_name, status), v in sorted(by_provider_status.items())
     ]
-    avg_total = int(sum(durations) / len(durations)) if durations else None
+    stage_durations = summarize_stage_durations(merge_stage_durations(days))
 
     return {
         'generated_at': timezone.now().isoformat(),
         'start_date': start_str,
         'end_date': end_str,
-        'total_appointments': appts_qs.count(),
+        'total_appointments': sum(by_status.values()),
         'outcomes_by_status': outcomes,
         'outcomes_by_provider': by_provider,
-        'avg_total_visit_minutes': avg_total,
-        'total_discharged': discharged_qs.count(),
+        'avg_total_visit_minutes': stage_durations['total_visit']['avg'],
+        'stage_durations_minutes': stage_durations,
+        'total_discharged': stage_durations['total_visit']['count'],
     }
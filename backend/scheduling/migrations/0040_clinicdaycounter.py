@@ -0,0 +1,108 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_day_counters(apps, schema_editor):
+    """Seed counters from existing appointments and live check-ins."""
+    from zoneinfo import ZoneInfo
+    from django.db.models import Count
+    from django.db.models.functions import TruncDate
+
+    Clinic = apps.get_model("core", "Clinic")
+    Appointment = apps.get_model("scheduling", "Appointment")
+    PatientCheckIn = apps.get_model("scheduling", "PatientCheckIn")
+    ClinicDayCounter = apps.get_model("scheduling", "ClinicDayCounter")
+
+    for clinic in Clinic.objects.all():
+        tz = ZoneInfo(clinic.timezone or "America/Chicago")
+        sources = (
+            ("appointment", Appointment.objects.filter(clinic=clinic), "scheduled_start"),
+            (
+                "live_checkin",
+                PatientCheckIn.objects.filter(
+                    clinic=clinic, is_active=True, check_out_time__isnull=True
+                ),
+                "check_in_time",
+            ),
+        )
+        rows = []
+        for kind, qs, field in sources:
+            grouped = (
+                qs.annotate(day=TruncDate(field, tzinfo=tz))
+                .values("day", "status", "provider_name")
+                .annotate(n=Count("id"))
+                .order_by()
+            )
+            rows.extend(
+                ClinicDayCounter(
+                    clinic=clinic,
+                    date=row["day"],
+                    kind=kind,
+                    status=row["status"],
+                    provider_name=row["provider_name"] or "",
+                    count=row["n"],
+                )
+                for row in grouped
+            )
+        ClinicDayCounter.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_audit_report_indexes"),
+        ("scheduling", "0039_clean_appointment_status_choices"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClinicDayCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("appointment", "Appointment"),
+                            ("live_checkin", "Live Check-In"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("status", models.CharField(max_length=20)),
+                (
+                    "provider_name",
+                    models.CharField(blank=True, default="", max_length=200),
+                ),
+                ("count", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "clinic",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="day_counters",
+                        to="core.clinic",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="clinicdaycounter",
+            constraint=models.UniqueConstraint(
+                fields=("clinic", "date", "kind", "status", "provider_name"),
+                name="clinic_day_counter_uniq",
+            ),
+        ),
+        migrations.RunPython(backfill_day_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:28
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_audit_report_indexes"),
+        ("scheduling", "0040_clinicdaycounter"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyMetricsRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("outcomes", models.JSONField(default=list)),
+                ("stage_durations", models.JSONField(default=dict)),
+                (
+                    "computed_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "clinic",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_metrics_rollups",
+                        to="core.clinic",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="dailymetricsrollup",
+            constraint=models.UniqueConstraint(
+                fields=("clinic", "date"), name="daily_metrics_rollup_uniq"
+            ),
+        ),
+    ]
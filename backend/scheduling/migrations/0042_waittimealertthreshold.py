@@ -0,0 +1,57 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_audit_report_indexes"),
+        ("scheduling", "0041_dailymetricsrollup"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WaitTimeAlertThreshold",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("checked_in", "Checked In"),
+                            ("pre_op", "Pre-Op"),
+                            ("operating_room", "Operating Room"),
+                            ("pacu", "PACU"),
+                            ("discharged", "Discharged"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("minutes", models.PositiveIntegerField()),
+                (
+                    "clinic",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="wait_time_alert_thresholds",
+                        to="core.clinic",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="waittimealertthreshold",
+            constraint=models.UniqueConstraint(
+                fields=("clinic", "status"), name="wait_time_alert_threshold_uniq"
+            ),
+        ),
+    ]
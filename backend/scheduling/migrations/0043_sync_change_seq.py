@@ -0,0 +1,131 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:35
+
+import django.db.models.deletion
+import django.db.models.functions.datetime
+from django.conf import settings
+from django.db import migrations, models
+
+SYNC_TRIGGERS_SQL = """
+CREATE FUNCTION scheduling_sync_stamp() RETURNS trigger AS $$
+BEGIN
+    NEW.change_seq := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION scheduling_sync_tombstone() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO scheduling_synctombstone (clinic_id, kind, object_id, change_seq)
+    VALUES (OLD.clinic_id, TG_ARGV[0], OLD.id, pg_current_xact_id()::text::bigint);
+    RETURN OLD;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER scheduling_appointment_sync_stamp
+    BEFORE INSERT OR UPDATE ON scheduling_appointment
+    FOR EACH ROW EXECUTE FUNCTION scheduling_sync_stamp();
+CREATE TRIGGER scheduling_appointment_sync_tombstone
+    AFTER DELETE ON scheduling_appointment
+    FOR EACH ROW EXECUTE FUNCTION scheduling_sync_tombstone('appointment');
+CREATE TRIGGER scheduling_patientcheckin_sync_stamp
+    BEFORE INSERT OR UPDATE ON scheduling_patientcheckin
+    FOR EACH ROW EXECUTE FUNCTION scheduling_sync_stamp();
+CREATE TRIGGER scheduling_patientcheckin_sync_tombstone
+    AFTER DELETE ON scheduling_patientcheckin
+    FOR EACH ROW EXECUTE FUNCTION scheduling_sync_tombstone('checkin');
+"""
+
+DROP_SYNC_TRIGGERS_SQL = """
+DROP TRIGGER IF EXISTS scheduling_appointment_sync_stamp ON scheduling_appointment;
+DROP TRIGGER IF EXISTS scheduling_appointment_sync_tombstone ON scheduling_appointment;
+DROP TRIGGER IF EXISTS scheduling_patientcheckin_sync_stamp ON scheduling_patientcheckin;
+DROP TRIGGER IF EXISTS scheduling_patientcheckin_sync_tombstone ON scheduling_patientcheckin;
+DROP FUNCTION IF EXISTS scheduling_sync_stamp();
+DROP FUNCTION IF EXISTS scheduling_sync_tombstone();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_user_regional_clinics"),
+        ("patients", "0003_recentpatient"),
+        ("providers", "0001_initial"),
+        ("scheduling", "0042_waittimealertthreshold"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncTombstone",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("appointment", "Appointment"),
+                            ("checkin", "Check-In"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                ("change_seq", models.BigIntegerField()),
+                (
+                    "deleted_at",
+                    models.DateTimeField(
+                        db_default=django.db.models.functions.datetime.Now()
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="appointment",
+            name="change_seq",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="patientcheckin",
+            name="change_seq",
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["clinic", "change_seq"], name="scheduling__clinic__a23efe_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="patientcheckin",
+            index=models.Index(
+                fields=["clinic", "change_seq"], name="scheduling__clinic__fd334c_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="synctombstone",
+            name="clinic",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="+",
+                to="core.clinic",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="synctombstone",
+            index=models.Index(
+                fields=["clinic", "kind", "change_seq"],
+                name="scheduling__clinic__8a9b58_idx",
+            ),
+        ),
+        migrations.RunSQL(SYNC_TRIGGERS_SQL, DROP_SYNC_TRIGGERS_SQL),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:37
+
+import django.contrib.postgres.fields.ranges
+import django.contrib.postgres.indexes
+import scheduling.models
+from django.db import migrations, models
+
+# period is TSTZRANGE(start, end), which raises for end < start; clamp such
+# rows to an empty range first.
+CLAMP_REVERSED_SQL = """
+UPDATE scheduling_appointment SET scheduled_end = scheduled_start
+WHERE scheduled_end < scheduled_start;
+"""
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scheduling", "0043_sync_change_seq"),
+    ]
+
+    operations = [
+        migrations.RunSQL(CLAMP_REVERSED_SQL, migrations.RunSQL.noop),
+        migrations.AddField(
+            model_name="appointment",
+            name="period",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=scheduling.models.TsTzRange(
+                    "scheduled_start", "scheduled_end", models.Value("[)")
+                ),
+                output_field=django.contrib.postgres.fields.ranges.DateTimeRangeField(),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=django.contrib.postgres.indexes.GistIndex(
+                fields=["period"], name="appointment_period_gist"
+            ),
+        ),
+    ]
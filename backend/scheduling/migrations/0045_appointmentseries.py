@@ -0,0 +1,119 @@
+# Generated by Django 5.0.1 on 2026-10-17 04:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_user_regional_clinics"),
+        ("patients", "0003_recentpatient"),
+        ("providers", "0001_initial"),
+        ("scheduling", "0044_appointment_period"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="appointment",
+            name="series_index",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name="AppointmentSeries",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("provider_name", models.CharField(blank=True, max_length=200)),
+                ("reason_for_visit", models.CharField(blank=True, max_length=255)),
+                (
+                    "frequency",
+                    models.CharField(
+                        choices=[
+                            ("daily", "Daily"),
+                            ("weekly", "Weekly"),
+                            ("monthly", "Monthly"),
+                        ],
+                        default="weekly",
+                        max_length=10,
+                    ),
+                ),
+                ("interval", models.PositiveSmallIntegerField(default=1)),
+                ("first_start", models.DateTimeField()),
+                ("duration_minutes", models.PositiveIntegerField(default=30)),
+                ("until", models.DateField(blank=True, null=True)),
+                ("count", models.PositiveIntegerField(blank=True, null=True)),
+                ("next_index", models.PositiveIntegerField(default=0)),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "clinic",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="appointment_series",
+                        to="core.clinic",
+                    ),
+                ),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "patient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="appointment_series",
+                        to="patients.patient",
+                    ),
+                ),
+                (
+                    "provider",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="appointment_series",
+                        to="providers.provider",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="appointment",
+            name="series",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="occurrences",
+                to="scheduling.appointmentseries",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="appointment",
+            constraint=models.UniqueConstraint(
+                fields=("series", "series_index"), name="appointment_series_index_uniq"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointmentseries",
+            index=models.Index(
+                fields=["clinic", "is_active"], name="scheduling__clinic__28848e_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.0.1 on 2026-10-17 09:10
+
+from django.db import migrations
+
+# Check-ins created before the initial event was recorded start their event
+# stream at the first transition; give them the checked_in entry.
+BACKFILL_SQL = """
+INSERT INTO scheduling_checkinstatusevent (clinic_id, checkin_id, status, occurred_at, actor_id)
+SELECT c.clinic_id, c.id, 'checked_in', c.check_in_time, c.checked_in_by_id
+FROM scheduling_patientcheckin c
+WHERE NOT EXISTS (
+    SELECT 1 FROM scheduling_checkinstatusevent e
+    WHERE e.checkin_id = c.id AND e.occurred_at <= c.check_in_time
+);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scheduling", "0045_appointmentseries"),
+    ]
+
+    operations = [
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-17 05:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_user_regional_clinics"),
+        ("scheduling", "0046_initial_checkin_status_events"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dailymetricsrollup",
+            name="dirty",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name="dailymetricsrollup",
+            index=models.Index(
+                condition=models.Q(("dirty", True)),
+                fields=["clinic", "date"],
+                name="daily_metrics_rollup_dirty",
+            ),
+        ),
+    ]
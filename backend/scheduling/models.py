@@ -1,7 +1,10 @@
 import hashlib
 import json
 
+from django.contrib.postgres.fields import DateTimeRangeField
+from django.contrib.postgres.indexes import GistIndex
 from django.db import models
+from django.db.models.functions import Now
 from django.conf import settings
 from patients.models import Patient
 from core.models import Clinic
@@ -1143,6 +1146,66 @@ class ImplantBillableInformation(models.Model):
     def __str__(self):
         return f"Implant/Billable Info – CheckIn #{self.checkin_id}"
 
+class TsTzRange(models.Func):
+    function = 'TSTZRANGE'
+    output_field = DateTimeRangeField()
+
+
+class AppointmentSeries(models.Model):
+    """
+    Recurring appointments for one patient. Occurrences are ordinary
+    Appointment rows (series, series_index), materialized ahead over a
+    rolling horizon by scheduling.series.
+    """
+    FREQUENCY_CHOICES = [
+        ('daily', 'Daily'),
+        ('weekly', 'Weekly'),
+        ('monthly', 'Monthly'),
+    ]
+
+    clinic = models.ForeignKey(Clinic, on_delete=models.CASCADE, related_name='appointment_series')
+    patient = models.ForeignKey(Patient, on_delete=models.CASCADE, related_name='appointment_series')
+    provider = models.ForeignKey(
+        Provider,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='appointment_series'
+    )
+    provider_name = models.CharField(max_length=200, blank=True)
+    reason_for_visit = models.CharField(max_length=255, blank=True)
+
+    # Recurrence rule: every `interval` days / weeks / months from first_start,
+    # at first_start's clinic-local time, up to `until` or `count` occurrences.
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default='weekly')
+    interval = models.PositiveSmallIntegerField(default=1)
+    first_start = models.DateTimeField()
+    duration_minutes = models.PositiveIntegerField(default=30)
+    until = models.DateField(null=True, blank=True)
+    count = models.PositiveIntegerField(null=True, blank=True)
+
+    # Index of the next occurrence to materialize.
+    next_index = models.PositiveIntegerField(default=0)
+    is_active = models.BooleanField(default=True)
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['clinic', 'is_active']),
+        ]
+
+    def __str__(self):
+        return f"{self.patient.full_name} — every {self.interval} {self.frequency}"
+
+
 class Appointment(models.Model):
     """
     Represents a scheduled patient appointment.
@@ -1192,11 +1255,35 @@ class Appointment(models.Model):
         related_name='appointments'
     )
 
+    series = models.ForeignKey(
+        AppointmentSeries,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='occurrences'
+    )
+    series_index = models.PositiveIntegerField(null=True, blank=True)
+
+    # Set by a database trigger on every insert/update; see scheduling.sync.
+    change_seq = models.BigIntegerField(default=0, editable=False)
+
+    # [scheduled_start, scheduled_end); no end means open-ended.
+    period = models.GeneratedField(
+        expression=TsTzRange('scheduled_start', 'scheduled_end', models.Value('[)')),
+        output_field=DateTimeRangeField(),
+        db_persist=True,
+    )
+
     class Meta:
         ordering = ['scheduled_start']
         indexes = [
             models.Index(fields=['clinic', 'scheduled_start']),
             models.Index(fields=['clinic', 'status', 'scheduled_start']),
+            models.Index(fields=['clinic', 'change_seq']),
+            GistIndex(fields=['period'], name='appointment_period_gist'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['series', 'series_index'], name='appointment_series_index_uniq'),
         ]
 
     def __str__(self):
@@ -1253,10 +1340,14 @@ class PatientCheckIn(models.Model):
 
     is_active = models.BooleanField(default=True)
 
+    # Set by a database trigger on every insert/update; see scheduling.sync.
+    change_seq = models.BigIntegerField(default=0, editable=False)
+
     class Meta:
         indexes = [
             models.Index(fields=['clinic', 'is_active']),
             models.Index(fields=['clinic', 'status', 'check_in_time']),
+            models.Index(fields=['clinic', 'change_seq']),
         ]
 
     def __str__(self):
@@ -1289,6 +1380,85 @@ class CheckInStatusEvent(models.Model):
     def __str__(self):
         return f"{self.checkin_id} {self.status} @ {self.occurred_at}"
 
+class ClinicDayCounter(models.Model):
+    """
+    Precomputed per-clinic, per-day counts behind the metrics dashboard.
+
+    - kind='appointment': appointments by clinic-local scheduled date
+    - kind='live_checkin': active check-ins by clinic-local check-in date
+    broken down by status and provider_name. Kept current by
+    scheduling.counters in the same transaction as the underlying write.
+    """
+    KIND_CHOICES = [
+        ('appointment', 'Appointment'),
+        ('live_checkin', 'Live Check-In'),
+    ]
+
+    clinic = models.ForeignKey(Clinic, on_delete=models.CASCADE, related_name='day_counters')
+    date = models.DateField()
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20)
+    provider_name = models.CharField(max_length=200, blank=True, default='')
+    count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['clinic', 'date', 'kind', 'status', 'provider_name'],
+                name='clinic_day_counter_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.clinic_id} {self.date} {self.kind} {self.status} {self.provider_name}: {self.count}"
+
+class WaitTimeAlertThreshold(models.Model):
+    """
+    Per-clinic "waiting too long" threshold for a live check-in status.
+    Statuses without a row use scheduling.metrics.DEFAULT_ALERT_THRESHOLDS_MINUTES.
+    """
+    clinic = models.ForeignKey(Clinic, on_delete=models.CASCADE, related_name='wait_time_alert_thresholds')
+    status = models.CharField(max_length=20, choices=PatientCheckIn.STATUS_CHOICES)
+    minutes = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['clinic', 'status'], name='wait_time_alert_threshold_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.clinic_id} {self.status}: {self.minutes} min"
+
+class DailyMetricsRollup(models.Model):
+    """
+    One clinic-local day of range-metrics inputs, precomputed by the nightly
+    rollup job (scheduling.rollups).
+
+    outcomes:        [[provider_name, status, count], ...] for appointments
+    stage_durations: {stage: {'count', 'sum', 'max', 'bins': {bin: count}}}
+                     minutes, with mergeable fixed-width histogram bins
+    dirty:           the day was edited after it was rolled up; reads
+                     compute it live until the nightly job re-rolls it
+    """
+    clinic = models.ForeignKey(Clinic, on_delete=models.CASCADE, related_name='daily_metrics_rollups')
+    date = models.DateField()
+    outcomes = models.JSONField(default=list)
+    stage_durations = models.JSONField(default=dict)
+    computed_at = models.DateTimeField(default=timezone.now)
+    dirty = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['clinic', 'date'], name='daily_metrics_rollup_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['clinic', 'date'], condition=models.Q(dirty=True), name='daily_metrics_rollup_dirty'),
+        ]
+
+    def __str__(self):
+        return f"{self.clinic_id} {self.date}"
+
 class PacuMobilityAssessment(models.Model):
     """
     PACU Mobility Assessment (paper-matching) with tablet signature + audit-safe locking.
@@ -1363,3 +1533,28 @@ class PacuMobilityAssessment(models.Model):
 
     def __str__(self):
         return f"PACU Mobility Assessment (CheckIn #{self.checkin_id})"
+
+class SyncTombstone(models.Model):
+    """
+    Deleted appointment / check-in ids for delta sync clients, written by a
+    database trigger (see scheduling.sync). clinic has no FK constraint so
+    tombstones never block deleting a clinic.
+    """
+    KIND_CHOICES = [
+        ('appointment', 'Appointment'),
+        ('checkin', 'Check-In'),
+    ]
+
+    clinic = models.ForeignKey(Clinic, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    change_seq = models.BigIntegerField()
+    deleted_at = models.DateTimeField(db_default=Now())
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['clinic', 'kind', 'change_seq']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} deleted @ {self.change_seq}"
@@ -0,0 +1,190 @@
+"""
+Daily metrics rollups (DailyMetricsRollup) behind build_range_metrics.
+
+A nightly django-celery-beat job (scheduling.tasks.refresh_metrics_rollups)
+recomputes the last few clinic-local days plus every day marked dirty by
+an edit since it was rolled up (scheduling.counters.mark_rollups_dirty);
+backfill_metrics_rollups fills history in chunks. Range queries merge
+stored days and compute the current day, dirty days and any day not
+rolled up yet live, with the same code.
+
+Stage durations are kept as count / sum / max plus a fixed-width minute
+histogram, so days can be merged exactly and percentiles estimated from
+the merged histogram.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, IntegerField, Max, Q, F, Sum
+from django.db.models.functions import Cast, Floor, Least, TruncDate
+from django.utils import timezone
+
+from scheduling.counters import clinic_timezone, clinic_today
+from scheduling.metrics import STAGE_INTERVALS, MinutesBetween
+from scheduling.models import Appointment, DailyMetricsRollup, PatientCheckIn
+
+SKETCH_BIN_MINUTES = 5
+SKETCH_BINS = 144  # 12 hours; the last bin collects longer stays
+
+
+def _date_range(start_date, end_date):
+    day = start_date
+    while day <= end_date:
+        yield day
+        day += timedelta(days=1)
+
+
+def _utc_bounds(clinic, start_date, end_date):
+    """[start, end) datetimes covering clinic-local dates start_date..end_date."""
+    tz = clinic_timezone(clinic)
+    start = datetime.combine(start_date, time.min).replace(tzinfo=tz)
+    end = datetime.combine(end_date + timedelta(days=1), time.min).replace(tzinfo=tz)
+    return start, end
+
+
+def compute_daily_rollups(clinic, start_date, end_date):
+    """
+    Compute rollup data for every clinic-local date in start_date..end_date.
+    Returns {date: {'outcomes': [...], 'stage_durations': {...}}}.
+    """
+    tz = clinic_timezone(clinic)
+    start, end = _utc_bounds(clinic, start_date, end_date)
+    days = {day: {'outcomes': [], 'stage_durations': {}} for day in _date_range(start_date, end_date)}
+
+    outcomes = (
+        Appointment.objects.filter(clinic=clinic, scheduled_start__gte=start, scheduled_start__lt=end)
+        .annotate(day=TruncDate('scheduled_start', tzinfo=tz))
+        .values('day', 'provider_name', 'status')
+        .annotate(n=Count('id'))
+        .order_by('day', 'provider_name', 'status')
+    )
+    for row in outcomes:
+        days[row['day']]['outcomes'].append([row['provider_name'], row['status'], row['n']])
+
+    checkins = PatientCheckIn.objects.filter(clinic=clinic, check_in_time__gte=start, check_in_time__lt=end)
+    for stage, start_field, end_field in STAGE_INTERVALS:
+        minutes = MinutesBetween(start_field, end_field)
+        rows = (
+            checkins.filter(Q(**{f'{start_field}__isnull': False, f'{end_field}__gte': F(start_field)}))
+            .annotate(
+                day=TruncDate('check_in_time', tzinfo=tz),
+                bin=Least(Cast(Floor(minutes / SKETCH_BIN_MINUTES), IntegerField()), SKETCH_BINS - 1),
+            )
+            .values('day', 'bin')
+            .annotate(n=Count('id'), total=Sum(minutes), longest=Max(minutes))
+            .order_by()
+        )
+        for row in rows:
+            stats = days[row['day']]['stage_durations'].setdefault(
+                stage, {'count': 0, 'sum': 0.0, 'max': 0.0, 'bins': {}}
+            )
+            stats['count'] += row['n']
+            stats['sum'] += row['total']
+            stats['max'] = max(stats['max'], row['longest'])
+            stats['bins'][str(row['bin'])] = row['n']
+
+    return days
+
+
+def refresh_daily_rollups(clinic, start_date, end_date):
+    """Recompute and store rollups for start_date..end_date. Returns the number of days written."""
+    # Cleared before reading, so an edit committed meanwhile marks the day again.
+    DailyMetricsRollup.objects.filter(
+        clinic=clinic, date__gte=start_date, date__lte=end_date, dirty=True,
+    ).update(dirty=False)
+    now = timezone.now()
+    rollups = [
+        DailyMetricsRollup(
+            clinic=clinic,
+            date=day,
+            outcomes=data['outcomes'],
+            stage_durations=data['stage_durations'],
+            computed_at=now,
+        )
+        for day, data in compute_daily_rollups(clinic, start_date, end_date).items()
+    ]
+    DailyMetricsRollup.objects.bulk_create(
+        rollups,
+        update_conflicts=True,
+        unique_fields=['clinic', 'date'],
+        update_fields=['outcomes', 'stage_durations', 'computed_at'],
+        batch_size=500,
+    )
+    return len(rollups)
+
+
+def refresh_dirty_rollups(clinic):
+    """Re-roll the clinic's dirty days, one computation per run of consecutive days."""
+    dates = sorted(DailyMetricsRollup.objects.filter(clinic=clinic, dirty=True).values_list('date', flat=True))
+    written = 0
+    run_start = None
+    for index, day in enumerate(dates):
+        run_start = run_start or day
+        if index + 1 == len(dates) or dates[index + 1] != day + timedelta(days=1):
+            written += refresh_daily_rollups(clinic, run_start, day)
+            run_start = None
+    return written
+
+
+def load_range_rollups(clinic, start_date, end_date):
+    """
+    Rollup data for start_date..end_date: stored rows for past days, live
+    computation for the current day, future days, dirty days and days not
+    rolled up yet.
+    """
+    today = clinic_today(clinic)
+    days = {}
+    if start_date < today:
+        stored = DailyMetricsRollup.objects.filter(
+            clinic=clinic, date__gte=start_date, date__lte=min(end_date, today - timedelta(days=1)), dirty=False,
+        ).values_list('date', 'outcomes', 'stage_durations')
+        days = {day: {'outcomes': o, 'stage_durations': d} for day, o, d in stored}
+
+    missing = [day for day in _date_range(start_date, end_date) if day not in days]
+    if missing:
+        days.update(compute_daily_rollups(clinic, min(missing), max(missing)))
+    return {day: days[day] for day in _date_range(start_date, end_date)}
+
+
+def merge_stage_durations(days):
+    merged = {}
+    for data in days:
+        for stage, stats in data['stage_durations'].items():
+            into = merged.setdefault(stage, {'count': 0, 'sum': 0.0, 'max': 0.0, 'bins': {}})
+            into['count'] += stats['count']
+            into['sum'] += stats['sum']
+            into['max'] = max(into['max'], stats['max'])
+            for bin_index, n in stats['bins'].items():
+                into['bins'][bin_index] = into['bins'].get(bin_index, 0) + n
+    return merged
+
+
+def sketch_percentile(stats, fraction):
+    """Percentile estimate from histogram bins, interpolated within the bin."""
+    target = fraction * stats['count']
+    seen = 0
+    for bin_index in sorted(stats['bins'], key=int):
+        n = stats['bins'][bin_index]
+        if seen + n >= target:
+            lower = int(bin_index) * SKETCH_BIN_MINUTES
+            return min(lower + (target - seen) / n * SKETCH_BIN_MINUTES, stats['max'])
+        seen += n
+    return stats['max']
+
+
+def summarize_stage_durations(merged):
+    """{stage: {'count', 'avg', 'p50', 'p90', 'max'}} in whole minutes, like stage_duration_stats."""
+    summary = {}
+    for stage, _, _ in STAGE_INTERVALS:
+        stats = merged.get(stage)
+        if not stats or not stats['count']:
+            summary[stage] = {'count': 0, 'avg': None, 'p50': None, 'p90': None, 'max': None}
+            continue
+        summary[stage] = {
+            'count': stats['count'],
+            'avg': int(stats['sum'] / stats['count']),
+            'p50': int(sketch_percentile(stats, 0.5)),
+            'p90': int(sketch_percentile(stats, 0.9)),
+            'max': int(stats['max']),
+        }
+    return summary
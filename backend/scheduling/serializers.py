@@ -3,6 +3,7 @@ from django.utils import timezone
 from .models import SurgeryCase
 from .models import (
     Appointment,
+    AppointmentSeries,
     PatientCheckIn,
     PacuRecord,
     ImmediatePostOpProgressNote,
@@ -302,8 +303,64 @@ class AppointmentSerializer(serializers.ModelSerializer):
             'provider_name',
             'reason_for_visit',
             'status',
+            'series',
+            'series_index',
         ]
-        read_only_fields = ['id']
+        read_only_fields = ['id', 'series', 'series_index']
+
+    def validate(self, attrs):
+        # Appointment.period is a [start, end) range; the database rejects end < start.
+        start = attrs.get('scheduled_start', getattr(self.instance, 'scheduled_start', None))
+        end = attrs.get('scheduled_end', getattr(self.instance, 'scheduled_end', None))
+        if start and end and end <= start:
+            raise serializers.ValidationError({'scheduled_end': 'Must be after scheduled_start.'})
+        return attrs
+
+
+class AppointmentSeriesSerializer(serializers.ModelSerializer):
+    patient_name = serializers.CharField(source='patient.full_name', read_only=True)
+
+    class Meta:
+        model = AppointmentSeries
+        fields = [
+            'id',
+            'patient',
+            'patient_name',
+            'provider',
+            'provider_name',
+            'reason_for_visit',
+            'frequency',
+            'interval',
+            'first_start',
+            'duration_minutes',
+            'until',
+            'count',
+            'next_index',
+            'is_active',
+            'created_at',
+        ]
+        read_only_fields = ['id', 'next_index', 'is_active', 'created_at']
+
+    def validate_patient(self, value):
+        if value.clinic_id != self.context['request'].user.clinic_id:
+            raise serializers.ValidationError('Patient not found.')
+        return value
+
+    def validate_provider(self, value):
+        if value and value.clinic_id != self.context['request'].user.clinic_id:
+            raise serializers.ValidationError('Provider not found.')
+        return value
+
+    def validate(self, attrs):
+        if attrs.get('interval', 1) < 1:
+            raise serializers.ValidationError({'interval': 'Must be at least 1.'})
+        if attrs.get('duration_minutes', 30) < 1:
+            raise serializers.ValidationError({'duration_minutes': 'Must be at least 1.'})
+        if attrs.get('count') == 0:
+            raise serializers.ValidationError({'count': 'Must be at least 1.'})
+        if attrs.get('provider') and not attrs.get('provider_name'):
+            attrs['provider_name'] = attrs['provider'].display_name
+        return attrs
 
 
 class PatientCheckInSerializer(serializers.ModelSerializer):
@@ -326,7 +383,8 @@ class PatientCheckInSerializer(serializers.ModelSerializer):
             'assigned_staff_name',
             'provider_name',
         ]
-        read_only_fields = ['id', 'check_in_time', 'status_changed_at']
+        # Status moves only through set-status / complete (scheduling.workflow).
+        read_only_fields = ['id', 'check_in_time', 'is_active', 'status', 'status_changed_at']
 
 # --- Exparel Billing Worksheet (CPT C9290) ---
 
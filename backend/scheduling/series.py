@@ -0,0 +1,257 @@
+"""
+Recurring appointment series (AppointmentSeries).
+
+Occurrences are materialized as Appointment rows with one bulk_create,
+up to APPOINTMENT_SERIES_HORIZON_DAYS ahead; the nightly
+extend_appointment_series task keeps the horizon rolling. Occurrence
+times follow the series' clinic-local wall clock, so a 09:00 weekly
+visit stays at 09:00 across DST changes.
+
+Conflicts for a whole batch of occurrences (provider or patient already
+booked) come from one query matching period against an array of ranges.
+"""
+
+import calendar
+import logging
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.postgresql.psycopg_any import DateTimeTZRange
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from scheduling.conflicts import BOOKED_STATUSES
+from scheduling.counters import (
+    appointment_bucket,
+    clinic_timezone,
+    clinic_today,
+    mark_rollups_dirty,
+    rebuild_day_counters,
+    record_created,
+)
+from scheduling.live_cache import bump_data_version
+from scheduling.models import Appointment, AppointmentSeries
+
+logger = logging.getLogger(__name__)
+
+MAX_OCCURRENCES_PER_RUN = 400
+
+
+def _add_months(day, months):
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def occurrence_start(series, index):
+    """Start of occurrence `index` (0 = first_start)."""
+    tz = clinic_timezone(series.clinic)
+    first = series.first_start.astimezone(tz)
+    step = index * series.interval
+    if series.frequency == 'monthly':
+        day = _add_months(first.date(), step)
+    else:
+        day = first.date() + timedelta(days=step * (7 if series.frequency == 'weekly' else 1))
+    return datetime.combine(day, first.timetz().replace(tzinfo=None), tzinfo=tz)
+
+
+def pending_occurrences(series, through):
+    """[(index, start, end)] from next_index up to clinic-local date `through`."""
+    tz = clinic_timezone(series.clinic)
+    if series.until:
+        through = min(through, series.until)
+    length = timedelta(minutes=series.duration_minutes)
+
+    occurrences = []
+    index = series.next_index
+    while len(occurrences) < MAX_OCCURRENCES_PER_RUN:
+        if series.count is not None and index >= series.count:
+            break
+        start = occurrence_start(series, index)
+        if start.astimezone(tz).date() > through:
+            break
+        occurrences.append((index, start, start + length))
+        index += 1
+    return occurrences
+
+
+def find_series_conflicts(series, occurrences, provider_id=None, provider_name=None):
+    """
+    {index: [appointment ids]} for occurrences [(index, start, end)] that
+    overlap a booked appointment of the provider or the patient (outside
+    this series), in one query.
+    """
+    if not occurrences:
+        return {}
+    provider_id = series.provider_id if provider_id is None else provider_id
+    provider_name = series.provider_name if provider_name is None else provider_name
+
+    match = Q(patient_id=series.patient_id)
+    if provider_id:
+        match |= Q(provider_id=provider_id)
+    elif provider_name:
+        match |= Q(provider_name__iexact=provider_name)
+
+    table = Appointment._meta.db_table
+    ranges = [DateTimeTZRange(start, end, '[)') for _, start, end in occurrences]
+    booked = (
+        Appointment.objects.filter(clinic_id=series.clinic_id, status__in=BOOKED_STATUSES)
+        .filter(match)
+        .filter(RawSQL(f'"{table}"."period" && ANY(%s::tstzrange[])', (ranges,), output_field=BooleanField()))
+    )
+    if series.pk:
+        booked = booked.exclude(series=series)
+
+    conflicts = {}
+    for pk, other_start, other_end in booked.values_list('id', 'scheduled_start', 'scheduled_end'):
+        for index, start, end in occurrences:
+            if other_start < end and (other_end is None or other_end > start):
+                conflicts.setdefault(index, []).append(pk)
+    return conflicts
+
+
+def materialize_series(series, through=None, skip_conflicts=True):
+    """
+    Create the series' occurrences up to `through` (default: the rolling
+    horizon) with one bulk_create. Conflicting occurrences are skipped
+    when skip_conflicts, otherwise nothing is created.
+    Returns (created appointments, {index: conflicting appointment ids}).
+    IntegrityError propagates if PROVIDER_OVERLAP_CONSTRAINT rejects an
+    occurrence booked against since the check; nothing is created then.
+    """
+    with transaction.atomic():
+        series = AppointmentSeries.objects.select_for_update().select_related('clinic').get(pk=series.pk)
+        if not series.is_active:
+            return [], {}
+        if through is None:
+            through = clinic_today(series.clinic) + timedelta(days=settings.APPOINTMENT_SERIES_HORIZON_DAYS)
+
+        occurrences = pending_occurrences(series, through)
+        conflicts = find_series_conflicts(series, occurrences)
+        if conflicts and not skip_conflicts:
+            return [], conflicts
+
+        appointments = [
+            Appointment(
+                clinic=series.clinic,
+                patient_id=series.patient_id,
+                provider_id=series.provider_id,
+                provider_name=series.provider_name,
+                reason_for_visit=series.reason_for_visit,
+                scheduled_start=start,
+                scheduled_end=end,
+                series=series,
+                series_index=index,
+            )
+            for index, start, end in occurrences
+            if index not in conflicts
+        ]
+        Appointment.objects.bulk_create(appointments, batch_size=500)
+        record_created(appointment_bucket(appt) for appt in appointments)
+
+        if occurrences:
+            series.next_index = occurrences[-1][0] + 1
+            series.save(update_fields=['next_index', 'updated_at'])
+
+    if conflicts:
+        logger.info('Series %s: skipped %d conflicting occurrence(s)', series.pk, len(conflicts))
+    return appointments, conflicts
+
+
+def update_following(series, from_index, changes, force=False):
+    """
+    Apply changes to occurrence from_index and every later one that is
+    still 'scheduled', in one UPDATE, and to the series template used for
+    occurrences not materialized yet. changes may hold start_time
+    (datetime.time, clinic-local), duration_minutes, provider,
+    provider_name, reason_for_visit and cancel (ends the series).
+
+    Returns (updated count, conflicts); with conflicts and not force,
+    nothing is changed. IntegrityError propagates if
+    PROVIDER_OVERLAP_CONSTRAINT rejects the UPDATE.
+    """
+    tz_name = str(clinic_timezone(series.clinic))
+    with transaction.atomic():
+        series = AppointmentSeries.objects.select_for_update().select_related('clinic').get(pk=series.pk)
+        following = Appointment.objects.filter(series=series, series_index__gte=from_index, status='scheduled')
+
+        start_time = changes.get('start_time')
+        duration = changes.get('duration_minutes')
+        provider = changes.get('provider', series.provider)
+        provider_name = changes.get('provider_name', provider.display_name if provider else series.provider_name)
+        cancel = changes.get('cancel', False)
+
+        rows = list(following.values_list('series_index', 'scheduled_start', 'scheduled_end'))
+        if not cancel and rows and (start_time or duration or 'provider' in changes or 'provider_name' in changes):
+            tz = clinic_timezone(series.clinic)
+            moved = []
+            for index, start, end in rows:
+                new_start = start
+                if start_time:
+                    new_start = datetime.combine(start.astimezone(tz).date(), start_time, tzinfo=tz)
+                length = timedelta(minutes=duration) if duration else (end or start) - start
+                moved.append((index, new_start, new_start + length))
+            conflicts = find_series_conflicts(
+                series, moved,
+                provider_id=provider.id if provider else 0,
+                provider_name=provider_name,
+            )
+            if conflicts and not force:
+                return 0, conflicts
+        else:
+            conflicts = {}
+
+        update = {}
+        if cancel:
+            update['status'] = 'cancelled'
+        else:
+            if 'provider' in changes or 'provider_name' in changes:
+                update['provider'] = provider
+                update['provider_name'] = provider_name
+            if 'reason_for_visit' in changes:
+                update['reason_for_visit'] = changes['reason_for_visit']
+            # SET expressions read the old row, so the end is derived from the new start.
+            start_sql, start_params = 'scheduled_start', ()
+            if start_time:
+                start_sql = '((scheduled_start AT TIME ZONE %s)::date + %s::time) AT TIME ZONE %s'
+                start_params = (tz_name, start_time, tz_name)
+                update['scheduled_start'] = RawSQL(start_sql, start_params)
+            if duration:
+                update['scheduled_end'] = RawSQL(f"({start_sql}) + %s * interval '1 minute'", (*start_params, duration))
+            elif start_time:
+                update['scheduled_end'] = RawSQL(
+                    f"({start_sql}) + (scheduled_end - scheduled_start)", start_params,
+                )
+        if update:
+            update['updated_at'] = timezone.now()
+        updated = following.update(**update) if update and rows else 0
+
+        # Template for occurrences materialized later.
+        if cancel:
+            series.count = from_index
+            series.is_active = False
+        else:
+            if 'provider' in update:
+                series.provider, series.provider_name = provider, provider_name
+            if 'reason_for_visit' in update:
+                series.reason_for_visit = update['reason_for_visit']
+            if start_time:
+                first = series.first_start.astimezone(clinic_timezone(series.clinic))
+                series.first_start = datetime.combine(first.date(), start_time, tzinfo=first.tzinfo)
+            if duration:
+                series.duration_minutes = duration
+        series.save()
+
+        if updated:
+            tz = clinic_timezone(series.clinic)
+            days = sorted({start.astimezone(tz).date() for _, start, _ in rows})
+            # Bypasses record_change, so flag the metrics rollups here.
+            mark_rollups_dirty([(series.clinic_id, day) for day in days])
+            if 'status' in update or 'provider_name' in update:
+                rebuild_day_counters(series.clinic, days[0], days[-1])
+            else:
+                bump_data_version(series.clinic_id)
+
+    return updated, conflicts
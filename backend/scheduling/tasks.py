@@ -0,0 +1,47 @@
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.db import IntegrityError
+
+from core.models import Clinic
+from scheduling.counters import clinic_today
+from scheduling.models import AppointmentSeries
+from scheduling.rollups import refresh_daily_rollups, refresh_dirty_rollups
+from scheduling.series import materialize_series
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def refresh_metrics_rollups(days=None):
+    """
+    Nightly: recompute the last few clinic-local days of DailyMetricsRollup
+    for every clinic, then any older day edited since it was rolled up.
+    """
+    days = days or settings.METRICS_ROLLUP_RECOMPUTE_DAYS
+    written = 0
+    for clinic in Clinic.objects.order_by('id'):
+        yesterday = clinic_today(clinic) - timedelta(days=1)
+        written += refresh_daily_rollups(clinic, yesterday - timedelta(days=days - 1), yesterday)
+        written += refresh_dirty_rollups(clinic)
+    return written
+
+
+@shared_task
+def extend_appointment_series():
+    """
+    Nightly: materialize recurring appointments up to the rolling horizon
+    (APPOINTMENT_SERIES_HORIZON_DAYS). Conflicting occurrences are skipped.
+    """
+    created = 0
+    for series in AppointmentSeries.objects.filter(is_active=True).order_by('id'):
+        try:
+            appointments, _ = materialize_series(series)
+        except IntegrityError:
+            # Lost a race with a booking under the overlap constraint; retried next run.
+            logger.exception('Could not extend appointment series %s', series.pk)
+            continue
+        created += len(appointments)
+    return created
@@ -1,3 +1,480 @@
-from django.test import TestCase
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from unittest import mock
+from zoneinfo import ZoneInfo
 
-# Create your tests here.
+import numpy as np
+from django.core import signing
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from core.models import AuditLog, Clinic, User
+from patients.models import Patient
+from providers.models import Provider
+from scheduling import live_events
+from scheduling.availability import free_windows
+from scheduling.conflicts import PROVIDER_OVERLAP_CONSTRAINT
+from scheduling.counters import appointment_bucket, clinic_today, record_change
+from scheduling.imports import _parse_datetime, import_appointments
+from scheduling.models import Appointment, AppointmentSeries, CheckInStatusEvent, DailyMetricsRollup, PatientCheckIn
+from scheduling.rollups import load_range_rollups, refresh_daily_rollups
+from scheduling.series import _add_months, materialize_series, occurrence_start, update_following
+from scheduling.tasks import extend_appointment_series, refresh_metrics_rollups
+from scheduling.workflow import checkin_workflow, next_stage
+
+CHICAGO = ZoneInfo('America/Chicago')
+
+
+def make_clinic(**kwargs):
+    return Clinic.objects.create(name='Test Clinic', clinic_type='asc', **kwargs)
+
+
+def make_user(clinic, username='nurse'):
+    return User.objects.create(username=username, clinic=clinic)
+
+
+def make_patient(clinic, mrn='MRN1', **kwargs):
+    return Patient.objects.create(
+        clinic=clinic,
+        medical_record_number=mrn,
+        first_name='Pat',
+        last_name='Test',
+        date_of_birth=date(1980, 1, 1),
+        gender='F',
+        **kwargs,
+    )
+
+
+class ParseDatetimeTests(SimpleTestCase):
+    def test_naive_value_is_clinic_local(self):
+        parsed = _parse_datetime('2026-03-02 09:30', CHICAGO)
+        self.assertEqual(parsed.tzinfo, CHICAGO)
+        self.assertEqual((parsed.hour, parsed.minute), (9, 30))
+
+    def test_spreadsheet_format(self):
+        self.assertEqual(_parse_datetime('03/02/2026 2:15 PM', CHICAGO).hour, 14)
+
+    def test_impossible_date_is_none(self):
+        self.assertIsNone(_parse_datetime('2026-02-30 10:00', CHICAGO))
+
+    def test_garbage_and_blank_are_none(self):
+        self.assertIsNone(_parse_datetime('next tuesday', CHICAGO))
+        self.assertIsNone(_parse_datetime('', CHICAGO))
+
+
+class ImportRowErrorTests(TestCase):
+    def setUp(self):
+        self.clinic = make_clinic()
+        make_patient(self.clinic)
+
+    def test_bad_cells_are_row_errors(self):
+        rows = [
+            {'mrn': 'MRN1', 'scheduled_start': '2026-02-30 10:00'},
+            {'mrn': 'MRN1', 'scheduled_start': '2026-03-02 10:00', 'duration_minutes': 'inf'},
+            {'mrn': 'MRN1', 'scheduled_start': '2026-03-02 10:00', 'duration_minutes': 'abc'},
+            {'mrn': 'MRN1', 'scheduled_start': '2026-03-02 10:00', 'scheduled_end': '2026-03-02 25:00'},
+            {'mrn': 'MRN1', 'scheduled_start': '2026-03-03 10:00', 'duration_minutes': '45'},
+        ]
+        result = import_appointments(self.clinic, rows)
+
+        self.assertEqual(result['created'], 1)
+        errors = {error['row']: error['errors'] for error in result['errors']}
+        self.assertIn('scheduled_start', errors[1])
+        self.assertIn('duration_minutes', errors[2])
+        self.assertIn('duration_minutes', errors[3])
+        self.assertIn('scheduled_end', errors[4])
+
+
+def _run_stream(query_string):
+    """Run live_events_app to completion; returns the ASGI messages sent."""
+    sent = []
+
+    async def receive():
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {'type': 'http', 'method': 'GET', 'path': live_events.LIVE_EVENTS_PATH,
+             'query_string': query_string.encode(), 'headers': []}
+    asyncio.run(asyncio.wait_for(live_events.live_events_app(scope, receive, send), 5))
+    return sent
+
+
+class LiveEventsTicketTests(TestCase):
+    def setUp(self):
+        self.user = make_user(make_clinic())
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+
+    def test_ticket_is_single_use(self):
+        ticket = self.client.post('/api/live/ticket/').data['ticket']
+        user, expires_at = live_events._redeem_ticket(ticket)
+        self.assertEqual(user, self.user)
+        self.assertGreater(expires_at, time.time())
+        self.assertEqual(live_events._redeem_ticket(ticket), (None, None))
+
+    def test_expired_ticket_is_rejected(self):
+        ticket = signing.dumps({'user': self.user.id, 'exp': time.time() + 60}, salt=live_events.TICKET_SALT)
+        with mock.patch('django.core.signing.time.time', return_value=time.time() + 3600):
+            self.assertEqual(live_events._redeem_ticket(ticket), (None, None))
+
+    def test_anonymous_cannot_get_ticket(self):
+        self.assertEqual(APIClient(SERVER_NAME='localhost').post('/api/live/ticket/').status_code, 401)
+
+
+class LiveEventsStreamTests(SimpleTestCase):
+    def test_token_in_query_string_is_not_accepted(self):
+        sent = _run_stream('token=abc')
+        self.assertEqual(sent[0]['status'], 401)
+
+    def test_stream_ends_when_token_expires(self):
+        user = mock.Mock(clinic_id=1)
+        with mock.patch.object(live_events, '_redeem_ticket', return_value=(user, time.time() + 0.2)), \
+                mock.patch.object(live_events, '_audit_subscription'):
+            sent = _run_stream('ticket=t')
+        self.assertEqual(sent[0]['status'], 200)
+        self.assertTrue(all(message.get('more_body') for message in sent[1:]))
+
+
+class AppointmentValidationTests(TestCase):
+    def setUp(self):
+        self.clinic = make_clinic()
+        self.patient = make_patient(self.clinic)
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(make_user(self.clinic))
+        self.start = datetime(2026, 3, 2, 9, 0, tzinfo=CHICAGO)
+
+    def post(self, end):
+        return self.client.post('/api/appointments/', {
+            'patient': self.patient.id, 'scheduled_start': self.start.isoformat(), 'scheduled_end': end.isoformat(),
+        }, format='json')
+
+    def test_end_before_start_is_400(self):
+        response = self.post(self.start - timedelta(minutes=30))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('scheduled_end', response.data)
+        self.assertFalse(Appointment.objects.exists())
+
+    def test_patch_start_past_end_is_400(self):
+        appointment_id = self.post(self.start + timedelta(minutes=30)).data['id']
+        response = self.client.patch(
+            f'/api/appointments/{appointment_id}/', {'scheduled_start': (self.start + timedelta(hours=1)).isoformat()},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class DeltaSyncLimitTests(TestCase):
+    def setUp(self):
+        clinic = make_clinic()
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(make_user(clinic))
+        for mrn in ('MRN1', 'MRN2', 'MRN3'):
+            PatientCheckIn.objects.create(clinic=clinic, patient=make_patient(clinic, mrn=mrn))
+
+    def test_small_delta_is_served(self):
+        with self.settings(SYNC_DELTA_MAX_ROWS=3):
+            response = self.client.get('/api/checkins/live/', {'since': 0})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 3)
+
+    def test_old_cursor_asks_for_resync(self):
+        with self.settings(SYNC_DELTA_MAX_ROWS=2):
+            response = self.client.get('/api/checkins/live/', {'since': 0})
+        self.assertEqual(response.status_code, 410)
+        self.assertTrue(response.data['resync'])
+
+
+class FreeWindowsTests(SimpleTestCase):
+    def windows(self, busy, min_length=1, window_starts=(0, 100), window_ends=(60, 160)):
+        groups, starts, ends = (np.array(column, dtype=np.int64) for column in (zip(*busy) if busy else ([], [], [])))
+        result = free_windows(
+            np.array(window_starts, dtype=np.int64), np.array(window_ends, dtype=np.int64),
+            groups, starts, ends, min_length,
+        )
+        return [tuple(int(value) for value in row) for row in zip(*result)]
+
+    def test_no_busy_time_frees_whole_windows(self):
+        self.assertEqual(self.windows([]), [(0, 0, 60), (1, 100, 160)])
+
+    def test_overlapping_and_nested_busy_merge(self):
+        busy = [(0, 10, 30), (0, 20, 25), (0, 25, 40), (1, 100, 110)]
+        self.assertEqual(self.windows(busy), [(0, 0, 10), (0, 40, 60), (1, 110, 160)])
+
+    def test_groups_do_not_leak_into_each_other(self):
+        # Group 0 is busy to its window end; group 1's window is untouched.
+        self.assertEqual(self.windows([(0, 0, 60)]), [(1, 100, 160)])
+
+    def test_short_gaps_are_dropped(self):
+        busy = [(0, 0, 20), (0, 25, 50), (1, 100, 150)]
+        self.assertEqual(self.windows(busy, min_length=10), [(0, 50, 60), (1, 150, 160)])
+
+
+class OccurrenceStartTests(SimpleTestCase):
+    def series(self, frequency, first_start, interval=1):
+        clinic = SimpleNamespace(timezone='America/Chicago')
+        return SimpleNamespace(clinic=clinic, frequency=frequency, interval=interval, first_start=first_start)
+
+    def test_add_months_clamps_to_month_end(self):
+        self.assertEqual(_add_months(date(2026, 1, 31), 1), date(2026, 2, 28))
+        self.assertEqual(_add_months(date(2026, 11, 30), 3), date(2027, 2, 28))
+        self.assertEqual(_add_months(date(2028, 1, 31), 1), date(2028, 2, 29))
+
+    def test_weekly_keeps_wall_clock_across_dst(self):
+        # 2026-03-08 is the US spring-forward Sunday.
+        series = self.series('weekly', datetime(2026, 3, 2, 9, 0, tzinfo=CHICAGO))
+        before, after = occurrence_start(series, 0), occurrence_start(series, 1)
+        self.assertEqual(after.astimezone(CHICAGO).hour, 9)
+        # Same-tzinfo subtraction is wall-clock; compare the real instants.
+        utc = ZoneInfo('UTC')
+        self.assertEqual(after.astimezone(utc) - before.astimezone(utc), timedelta(days=7, hours=-1))
+
+    def test_daily_interval_and_monthly(self):
+        self.assertEqual(
+            occurrence_start(self.series('daily', datetime(2026, 10, 30, 8, 0, tzinfo=CHICAGO), 2), 2).date(),
+            date(2026, 11, 3),
+        )
+        self.assertEqual(
+            occurrence_start(self.series('monthly', datetime(2026, 1, 31, 8, 0, tzinfo=CHICAGO)), 1).date(),
+            date(2026, 2, 28),
+        )
+
+
+class SeriesOverlapConstraintTests(TestCase):
+    def setUp(self):
+        self.clinic = make_clinic()
+        self.user = make_user(self.clinic)
+        self.patient = make_patient(self.clinic)
+        self.other = make_patient(self.clinic, mrn='MRN2')
+        self.provider = Provider.objects.create(clinic=self.clinic, display_name='Dr Test')
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+        with connection.schema_editor() as editor:
+            editor.add_constraint(Appointment, PROVIDER_OVERLAP_CONSTRAINT)
+        self.first = datetime.combine(date.today() + timedelta(days=2), datetime.min.time(), tzinfo=CHICAGO).replace(hour=9)
+
+    def create_series(self, **extra):
+        body = {
+            'patient': self.patient.id, 'provider': self.provider.id, 'frequency': 'weekly',
+            'first_start': self.first.isoformat(), 'duration_minutes': 30, 'count': 4, **extra,
+        }
+        return self.client.post('/api/appointment-series/', body, format='json')
+
+    def at(self, weeks, hour=9):
+        """Clinic-local wall-clock time `weeks` after the first occurrence."""
+        return datetime.combine(self.first.date() + timedelta(weeks=weeks), datetime.min.time(), tzinfo=CHICAGO).replace(hour=hour)
+
+    def block(self, start):
+        return Appointment.objects.create(
+            clinic=self.clinic, patient=self.other, provider=self.provider, provider_name='Dr Test',
+            scheduled_start=start, scheduled_end=start + timedelta(minutes=30),
+        )
+
+    def test_race_with_booking_is_400_and_leaves_no_series(self):
+        self.block(self.at(1))
+        with mock.patch('scheduling.views.find_series_conflicts', return_value={}), \
+                mock.patch('scheduling.series.find_series_conflicts', return_value={}):
+            response = self.create_series()
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(AppointmentSeries.objects.exists())
+
+    def test_other_clinics_provider_is_400(self):
+        other_clinic = Clinic.objects.create(name='Other Clinic', clinic_type='asc')
+        foreign = Provider.objects.create(clinic=other_clinic, display_name='Dr Elsewhere')
+        response = self.create_series(provider=foreign.id)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('provider', response.data)
+        self.assertFalse(AppointmentSeries.objects.exists())
+
+    def test_force_is_rejected_while_constraint_installed(self):
+        series_id = self.create_series().data['id']
+        self.block(self.at(2, hour=10))
+        response = self.client.post(
+            f'/api/appointment-series/{series_id}/update-following/',
+            {'from_index': 1, 'start_time': '10:00', 'force': True}, format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_task_continues_past_failing_series(self):
+        failing = self.create_series(count=None).data['id']
+        working = self.create_series(count=None, first_start=(self.first + timedelta(hours=3)).isoformat()).data['id']
+        AppointmentSeries.objects.filter(pk__in=[failing, working]).update(count=20)
+        materialized = Appointment.objects.filter(series_id=failing).count()
+        self.block(self.at(18))  # beyond the horizon of the first run
+        with mock.patch('scheduling.series.find_series_conflicts', return_value={}), \
+                self.settings(APPOINTMENT_SERIES_HORIZON_DAYS=200):
+            created = extend_appointment_series()
+        self.assertEqual(created, 20 - materialized)
+        self.assertEqual(Appointment.objects.filter(series_id=failing).count(), materialized)
+        self.assertEqual(AppointmentSeries.objects.get(pk=failing).next_index, materialized)
+        self.assertEqual(Appointment.objects.filter(series_id=working).count(), 20)
+
+
+class CheckinWorkflowTests(SimpleTestCase):
+    def test_disabled_stages_are_skipped(self):
+        clinic = SimpleNamespace(workflow_labels={'operating_room': None, 'checked_in': None})
+        workflow = checkin_workflow(clinic)
+        self.assertEqual(workflow, ['checked_in', 'pre_op', 'pacu', 'discharged'])
+        self.assertEqual(next_stage(workflow, 'pre_op'), 'pacu')
+        self.assertIsNone(next_stage(workflow, 'discharged'))
+
+    def test_missing_labels_enable_everything(self):
+        workflow = checkin_workflow(SimpleNamespace(workflow_labels=None))
+        self.assertEqual(next_stage(workflow, 'checked_in'), 'pre_op')
+        # A status the clinic has since switched off still moves forward.
+        self.assertEqual(next_stage(['checked_in', 'pacu', 'discharged'], 'operating_room'), 'pacu')
+
+
+@override_settings(AUDIT_BUFFERED_WRITES=False)
+class CheckinTransitionTests(TestCase):
+    def setUp(self):
+        self.clinic = make_clinic()
+        self.user = make_user(self.clinic)
+        patient = make_patient(self.clinic)
+        start = datetime.now(CHICAGO).replace(microsecond=0)
+        self.appointment = Appointment.objects.create(
+            clinic=self.clinic, patient=patient, scheduled_start=start,
+            scheduled_end=start + timedelta(minutes=30), status='checked_in',
+        )
+        self.checkin = PatientCheckIn.objects.create(clinic=self.clinic, patient=patient, appointment=self.appointment)
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(self.user)
+
+    def set_status(self, status, from_status):
+        return self.client.post(
+            f'/api/checkins/{self.checkin.id}/set-status/', {'status': status, 'from_status': from_status}, format='json',
+        )
+
+    def test_transition_syncs_appointment_and_audits(self):
+        # Written by a path that used to leave updated_at alone.
+        Appointment.objects.filter(pk=self.appointment.pk).update(status='scheduled')
+
+        response = self.set_status('pre_op', 'checked_in')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Appointment.objects.get(pk=self.appointment.pk).status, 'in_progress')
+        self.assertTrue(CheckInStatusEvent.objects.filter(checkin=self.checkin, status='pre_op').exists())
+        self.assertTrue(AuditLog.objects.filter(
+            resource_type='checkin', resource_id=str(self.checkin.id), changes__from_status='checked_in',
+        ).exists())
+
+    def test_stale_from_status_is_409(self):
+        self.assertEqual(self.set_status('pre_op', 'checked_in').status_code, 200)
+        response = self.set_status('pre_op', 'checked_in')
+        self.assertEqual(response.status_code, 200)  # already there: no-op
+        response = self.set_status('operating_room', 'checked_in')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['status'], 'pre_op')
+        self.assertEqual(CheckInStatusEvent.objects.filter(checkin=self.checkin, status='operating_room').count(), 0)
+
+    def test_skipping_a_stage_is_400(self):
+        self.assertEqual(self.set_status('pacu', 'checked_in').status_code, 400)
+
+    def test_plain_update_cannot_change_status(self):
+        response = self.client.patch(
+            f'/api/checkins/{self.checkin.id}/', {'status': 'discharged', 'is_active': False, 'room': 'OR 2'}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        checkin = PatientCheckIn.objects.get(pk=self.checkin.pk)
+        self.assertEqual((checkin.status, checkin.is_active, checkin.room), ('checked_in', True, 'OR 2'))
+
+
+@override_settings(AUDIT_BUFFERED_WRITES=False)
+class CheckinCreatedEventTests(TestCase):
+    def setUp(self):
+        self.clinic = make_clinic()
+        self.patient = make_patient(self.clinic)
+        self.client = APIClient(SERVER_NAME='localhost')
+        self.client.force_authenticate(make_user(self.clinic))
+
+    def assert_initial_event(self, checkin_id):
+        checkin = PatientCheckIn.objects.get(pk=checkin_id)
+        event = CheckInStatusEvent.objects.get(checkin=checkin)
+        self.assertEqual((event.status, event.occurred_at), ('checked_in', checkin.check_in_time))
+
+    def test_create_records_initial_event(self):
+        response = self.client.post('/api/checkins/', {'patient': self.patient.id}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assert_initial_event(response.data['id'])
+
+    def test_surgery_case_autofill_error_does_not_break_checkin(self):
+        start = datetime.now(CHICAGO).replace(microsecond=0)
+        appointment = Appointment.objects.create(
+            clinic=self.clinic, patient=self.patient, scheduled_start=start, scheduled_end=start + timedelta(minutes=30),
+        )
+
+        def failing_query(*args, **kwargs):
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1 / 0')
+
+        with mock.patch('scheduling.views.SurgeryCase.objects.filter', side_effect=failing_query):
+            response = self.client.post(f'/api/appointments/{appointment.id}/checkin/')
+        self.assertEqual(response.status_code, 200)
+        self.assert_initial_event(response.data['checkin_id'])
+        self.assertEqual(Appointment.objects.get(pk=appointment.pk).status, 'checked_in')
+
+    def test_appointment_checkin_records_initial_event(self):
+        start = datetime.now(CHICAGO).replace(microsecond=0)
+        appointment = Appointment.objects.create(
+            clinic=self.clinic, patient=self.patient, scheduled_start=start, scheduled_end=start + timedelta(minutes=30),
+        )
+        response = self.client.post(f'/api/appointments/{appointment.id}/checkin/')
+        self.assertEqual(response.status_code, 200)
+        self.assert_initial_event(response.data['checkin_id'])
+
+
+class DirtyRollupTests(TestCase):
+    def setUp(self):
+        self.clinic = make_clinic()
+        self.day = clinic_today(self.clinic) - timedelta(days=30)
+        start = datetime.combine(self.day, datetime.min.time(), tzinfo=CHICAGO).replace(hour=9)
+        self.appointment = Appointment.objects.create(
+            clinic=self.clinic, patient=make_patient(self.clinic), scheduled_start=start,
+            scheduled_end=start + timedelta(minutes=30), status='scheduled',
+        )
+        refresh_daily_rollups(self.clinic, self.day, self.day)
+
+    def complete_appointment(self):
+        before = appointment_bucket(self.appointment)
+        self.appointment.status = 'completed'
+        self.appointment.save(update_fields=['status', 'updated_at'])
+        record_change(before, appointment_bucket(self.appointment))
+
+    def outcomes(self):
+        return load_range_rollups(self.clinic, self.day, self.day)[self.day]['outcomes']
+
+    def test_old_edit_is_read_live_then_rerolled(self):
+        self.complete_appointment()
+        self.assertTrue(DailyMetricsRollup.objects.get(clinic=self.clinic, date=self.day).dirty)
+        self.assertEqual(self.outcomes(), [['', 'completed', 1]])
+
+        refresh_metrics_rollups(days=1)
+
+        rollup = DailyMetricsRollup.objects.get(clinic=self.clinic, date=self.day)
+        self.assertFalse(rollup.dirty)
+        self.assertEqual(rollup.outcomes, [['', 'completed', 1]])
+
+
+class SeriesRollupTests(TestCase):
+    def test_update_following_marks_past_days_dirty(self):
+        clinic = make_clinic()
+        today = clinic_today(clinic)
+        first = datetime.combine(today - timedelta(weeks=4), datetime.min.time(), tzinfo=CHICAGO).replace(hour=9)
+        series = AppointmentSeries.objects.create(
+            clinic=clinic, patient=make_patient(clinic), frequency='weekly', first_start=first,
+            duration_minutes=30, count=3,
+        )
+        materialize_series(series)
+        days = [first.date() + timedelta(weeks=week) for week in range(3)]
+        refresh_daily_rollups(clinic, days[0], days[-1])
+
+        updated, _ = update_following(series, 1, {'cancel': True})
+
+        self.assertEqual(updated, 2)
+        dirty = set(DailyMetricsRollup.objects.filter(clinic=clinic, dirty=True).values_list('date', flat=True))
+        self.assertEqual(dirty, set(days[1:]))
+        self.assertEqual(load_range_rollups(clinic, days[1], days[1])[days[1]]['outcomes'], [['', 'cancelled', 1]])
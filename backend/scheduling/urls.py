@@ -3,6 +3,7 @@ from rest_framework.routers import DefaultRouter
 
 from .views import (
     AppointmentViewSet,
+    AppointmentSeriesViewSet,
     PatientCheckInViewSet,
     SurgeryCaseViewSet,
     OperatingRoomRecordViewSet,
@@ -34,6 +35,7 @@ from scheduling.pacu_progress_views import PacuProgressNotesViewSet
 
 router = DefaultRouter()
 router.register(r"appointments", AppointmentViewSet, basename="appointments")
+router.register(r"appointment-series", AppointmentSeriesViewSet, basename="appointment-series")
 router.register(r"checkins", PatientCheckInViewSet, basename="checkins")
 
 router.register(r"pre-op-phone-call", PreOpPhoneCallViewSet, basename="pre-op-phone-call")
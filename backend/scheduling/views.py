@@ -1,24 +1,25 @@
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
 from zoneinfo import ZoneInfo
 
 from rest_framework import status
 from django.db import IntegrityError
 
+from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 from rest_framework.permissions import IsAuthenticated
 
-from django.db.models import Q
 from django.utils.dateparse import parse_datetime
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
 
 from .models import (
     Appointment,
+    AppointmentSeries,
     PatientCheckIn,
     SurgeryCase,
-    CheckInStatusEvent,
     OperatingRoomRecord,
     AnesthesiaRecord,
     PacuRecord,
@@ -43,6 +44,7 @@ from .models import (
 
 from .serializers import (
     AppointmentSerializer,
+    AppointmentSeriesSerializer,
     PatientCheckInSerializer,
     SurgeryCaseSerializer,
     OperatingRoomRecordSerializer,
@@ -67,73 +69,28 @@ from .serializers import (
     PatientInstructionsSerializer,
 )
 
+from core.conditional import conditional_response, make_etag
 from core.models import AuditLog
+from providers.models import Provider
+from .availability import find_free_slots
+from .calendar import MAX_SUMMARY_DAYS, SUMMARY_SOURCES, calendar_rows, calendar_summary, streaming_calendar_response
+from .conflicts import find_conflicts, provider_overlap_enforced, raise_for_provider_overlap
+from .counters import (
+    appointment_bucket,
+    checkin_bucket,
+    checkin_date,
+    clinic_today,
+    mark_rollups_dirty,
+    parse_local_date,
+    record_change,
+)
+from .imports import ImportFileError, import_appointments, read_upload
+from .live_cache import cached_live_response, data_version
+from .live_events import publish_checkin_event
 from .metrics import build_dashboard_metrics
-
-def _apply_checkin_status_transition(*, checkin, new_status, actor):
-    """
-    Apply a status transition consistently:
-    - update status + status_changed_at
-    - set per-stage timestamp fields
-    - write immutable CheckInStatusEvent
-    """
-    now = timezone.now()
-
-    checkin.status = new_status
-    checkin.status_changed_at = now
-
-    # Stage timestamps (only set once)
-    if new_status == 'pre_op' and checkin.pre_op_at is None:
-        checkin.pre_op_at = now
-    if new_status == 'operating_room' and checkin.operating_room_at is None:
-        checkin.operating_room_at = now
-    if new_status == 'pacu' and checkin.pacu_at is None:
-        checkin.pacu_at = now
-    if new_status == 'discharged' and checkin.discharged_at is None:
-        checkin.discharged_at = now
-
-
-    checkin.save()
-
-    CheckInStatusEvent.objects.create(
-        clinic=checkin.clinic,
-        checkin=checkin,
-        status=new_status,
-        occurred_at=now,
-        actor=actor
-    )
-
-def _apply_checkin_status_transition(*, checkin, new_status, actor):
-    """
-    Apply a status transition consistently:
-    - update status + status_changed_at
-    - set per-stage timestamp fields
-    - write immutable CheckInStatusEvent
-    """
-    now = timezone.now()
-
-    checkin.status = new_status
-    checkin.status_changed_at = now
-
-    # Stage timestamps (set once)
-    if new_status == 'pre_op' and checkin.pre_op_at is None:
-        checkin.pre_op_at = now
-    elif new_status == 'operating_room' and checkin.operating_room_at is None:
-        checkin.operating_room_at = now
-    elif new_status == 'pacu' and checkin.pacu_at is None:
-        checkin.pacu_at = now
-    elif new_status == 'discharged' and checkin.discharged_at is None:
-        checkin.discharged_at = now
-
-    checkin.save()
-
-    CheckInStatusEvent.objects.create(
-        clinic=checkin.clinic,
-        checkin=checkin,
-        status=new_status,
-        occurred_at=now,
-        actor=actor
-    )
+from .series import find_series_conflicts, materialize_series, pending_occurrences, update_following
+from .sync import CURSOR_HEADER, DeltaSyncMixin, current_cursor
+from .workflow import StaleTransition, TransitionError, record_checkin_created, transition_checkin
 
 def apply_immediate_postop_defaults_to_pacu_record(note, pacu_record, request=None):
     """
@@ -173,9 +130,10 @@ def apply_immediate_postop_defaults_to_pacu_record(note, pacu_record, request=No
             user_agent=(request.META.get("HTTP_USER_AGENT", "") if request else ""),
         )
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+class AppointmentViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
     serializer_class = AppointmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    sync_kind = 'appointment'
 
     filterset_fields = ['patient', 'status']
     ordering_fields = ['scheduled_start', 'status']
@@ -186,7 +144,26 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         ).order_by('scheduled_start')
 
     def perform_create(self, serializer):
-        serializer.save(clinic=self.request.user.clinic)
+        try:
+            with transaction.atomic():
+                appt = serializer.save(clinic=self.request.user.clinic)
+                record_change(None, appointment_bucket(appt))
+        except IntegrityError as exc:
+            raise_for_provider_overlap(exc)
+
+    def perform_update(self, serializer):
+        try:
+            with transaction.atomic():
+                before = appointment_bucket(serializer.instance)
+                appt = serializer.save()
+                record_change(before, appointment_bucket(appt))
+        except IntegrityError as exc:
+            raise_for_provider_overlap(exc)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            record_change(appointment_bucket(instance), None)
+            instance.delete()
 
     @action(detail=False, methods=['get'], url_path='today')
     def today(self, request):
@@ -199,8 +176,13 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         start_utc = start_local.astimezone(ZoneInfo("UTC"))
         end_utc = end_local.astimezone(ZoneInfo("UTC"))
 
-        qs = self.get_queryset().filter(scheduled_start__range=(start_utc, end_utc))
-        return Response(self.get_serializer(qs, many=True).data)
+        def build():
+            qs = self.get_queryset().filter(scheduled_start__range=(start_utc, end_utc))
+            return list(calendar_rows(qs))
+
+        clinic_id = request.user.clinic_id
+        etag = make_etag('appointments-today', clinic_id, data_version(clinic_id), now_local.date())
+        return conditional_response(request, etag, build)
 
     @action(detail=False, methods=['get'], url_path='range')
     def range(self, request):
@@ -220,17 +202,106 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             return Response({'detail': 'Invalid datetime format'}, status=400)
 
         qs = self.get_queryset().filter(scheduled_start__gte=start_dt, scheduled_start__lte=end_dt)
-        return Response(AppointmentSerializer(qs, many=True).data)
+        return streaming_calendar_response(request, qs)
+
+    @action(detail=False, methods=['get'], url_path='summary')
+    def summary(self, request):
+        """
+        Month / week badges: appointment counts per clinic-local day,
+        provider and status.
+        Query params: start, end (YYYY-MM-DD, inclusive),
+        source ('rollup' = day counters, default; 'live' = grouped from appointments)
+        """
+        clinic = request.user.clinic
+        start_date = parse_local_date(request.query_params.get('start'), None)
+        end_date = parse_local_date(request.query_params.get('end'), None)
+        if not start_date or not end_date:
+            return Response({'detail': 'start and end (YYYY-MM-DD) are required'}, status=400)
+        if end_date < start_date or (end_date - start_date).days >= MAX_SUMMARY_DAYS:
+            return Response({'detail': f'end must be on or after start, at most {MAX_SUMMARY_DAYS} days'}, status=400)
+
+        source = request.query_params.get('source', 'rollup')
+        if source not in SUMMARY_SOURCES:
+            return Response({'detail': f"source must be one of {', '.join(SUMMARY_SOURCES)}"}, status=400)
+
+        def build():
+            return {
+                'start': start_date,
+                'end': end_date,
+                'timezone': clinic.timezone,
+                'source': source,
+                'days': calendar_summary(clinic, start_date, end_date, source),
+            }
+
+        etag = make_etag('appointments-summary', clinic.id, data_version(clinic.id), start_date, end_date, source)
+        return conditional_response(request, etag, build)
+
+    @action(detail=False, methods=['post'], url_path='import',
+            parser_classes=[MultiPartParser, FormParser, JSONParser])
+    def bulk_import(self, request):
+        """
+        Bulk import from a spreadsheet (multipart 'file': .csv / .xlsx) or
+        JSON ({"appointments": [...]} or a bare list); columns are listed in
+        scheduling.imports. Valid rows are created, invalid rows reported.
+        ?dry_run=true validates without creating anything.
+        """
+        dry_run = request.query_params.get('dry_run', '').lower() in ('1', 'true', 'yes')
+
+        if 'file' in request.FILES:
+            try:
+                rows = read_upload(request.FILES['file'])
+            except ImportFileError as exc:
+                return Response({'detail': str(exc)}, status=400)
+        else:
+            rows = request.data.get('appointments') if isinstance(request.data, dict) else request.data
+            if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+                return Response({'detail': 'Send a file, or a JSON list of appointment rows'}, status=400)
+
+        if not rows:
+            return Response({'detail': 'No rows to import'}, status=400)
+        if len(rows) > settings.APPOINTMENT_IMPORT_MAX_ROWS:
+            return Response(
+                {'detail': f'At most {settings.APPOINTMENT_IMPORT_MAX_ROWS} rows per import'},
+                status=400,
+            )
+
+        try:
+            report = import_appointments(request.user.clinic, rows, dry_run=dry_run)
+        except IntegrityError as exc:
+            # A concurrent booking beat the in-memory check
+            raise_for_provider_overlap(exc)
+
+        AuditLog.log_action(
+            user=request.user,
+            action='create',
+            resource_type='appointment_import',
+            changes={
+                'dry_run': dry_run,
+                'received': report['received'],
+                'created': report['created'],
+                'rejected': len(report['errors']),
+            },
+            ip_address=request.META.get('REMOTE_ADDR', ''),
+            user_agent=request.META.get('HTTP_USER_AGENT', ''),
+        )
+
+        if dry_run:
+            return Response(report)
+        return Response(report, status=201 if report['created'] else 400)
 
     @action(detail=False, methods=['get'], url_path='provider-availability')
     def provider_availability(self, request):
         """
         Soft availability check.
         Returns conflicts if provider already has an appointment
-        at the requested time within the same clinic.
+        overlapping the requested time within the same clinic.
+
+        Query params: provider (name), scheduled_start (ISO),
+        duration_minutes (optional; default 30)
         """
         provider = request.query_params.get('provider')
         scheduled_start = request.query_params.get('scheduled_start')
+        duration_minutes = int(request.query_params.get('duration_minutes') or 30)
 
         if not provider or not scheduled_start:
             return Response(
@@ -242,24 +313,65 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         if not start_dt:
             return Response({'detail': 'Invalid datetime'}, status=400)
 
-        clinic = request.user.clinic
+        _, conflicts = find_conflicts(
+            request.user.clinic,
+            start_dt,
+            start_dt + timedelta(minutes=duration_minutes),
+            provider_name=provider.strip(),
+        )
 
-        conflict = Appointment.objects.filter(
-            clinic=clinic,
-            provider_name=provider,
-            scheduled_start=start_dt
-        ).exists()
+        return Response({
+            'available': not conflicts,
+            'conflict': bool(conflicts),
+            'conflicts': AppointmentSerializer(conflicts, many=True).data,
+        })
+
+    @action(detail=False, methods=['get'], url_path='free-slots')
+    def free_slots(self, request):
+        """
+        Open time per provider.
+        Query params:
+          providers (required; comma-separated provider ids)
+          start_date, end_date (clinic-local YYYY-MM-DD; end defaults to start)
+          duration_minutes (optional; default 30)
+          day_start, day_end (working hours HH:MM; default 07:00-17:00)
+        """
+        clinic = request.user.clinic
+        try:
+            provider_ids = [int(v) for v in (request.query_params.get('providers') or '').split(',') if v.strip()]
+            start_date = parse_local_date(request.query_params.get('start_date'), None)
+            end_date = parse_local_date(request.query_params.get('end_date'), start_date)
+            duration_minutes = int(request.query_params.get('duration_minutes') or 30)
+            day_start = time.fromisoformat(request.query_params.get('day_start') or '07:00')
+            day_end = time.fromisoformat(request.query_params.get('day_end') or '17:00')
+        except ValueError:
+            return Response({'detail': 'Invalid parameter'}, status=400)
+
+        if not provider_ids or not start_date:
+            return Response({'detail': 'providers and start_date are required'}, status=400)
+        if len(provider_ids) > 50:
+            return Response({'detail': 'At most 50 providers per search'}, status=400)
+        if not (0 <= (end_date - start_date).days < 31):
+            return Response({'detail': 'end_date must be within 31 days after start_date'}, status=400)
+        if day_end <= day_start or duration_minutes <= 0:
+            return Response({'detail': 'Invalid working hours or duration'}, status=400)
+
+        providers = list(Provider.objects.filter(clinic=clinic, id__in=provider_ids).order_by('display_name'))
+        if len(providers) != len(set(provider_ids)):
+            return Response({'detail': 'Unknown provider'}, status=400)
 
         return Response({
-            'available': not conflict,
-            'conflict': conflict
+            'duration_minutes': duration_minutes,
+            'providers': find_free_slots(
+                clinic, providers, start_date, end_date, duration_minutes, day_start, day_end,
+            ),
         })
 
     @action(detail=False, methods=['get'], url_path='validate')
     def validate(self, request):
         """
         Ops-only appointment validation (non-blocking):
-        - duplicate check (same patient, same day)
+        - duplicate check (same patient, same clinic-local day)
         - provider availability check (FK-first, name fallback)
 
         Query params:
@@ -282,49 +394,19 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         if not start_dt:
             return Response({'detail': 'scheduled_start invalid'}, status=400)
 
-        from datetime import timedelta
         end_dt = start_dt + timedelta(minutes=duration_minutes)
 
-        clinic = request.user.clinic
-        active_statuses = ['scheduled', 'checked_in', 'pre_op', 'operating_room', 'pacu']
-
-        # --- Duplicate check: same patient same day ---
-        dup_qs = Appointment.objects.filter(
-            clinic=clinic,
+        # Duplicates and provider overlaps in one query
+        duplicates, provider_conflicts = find_conflicts(
+            request.user.clinic,
+            start_dt,
+            end_dt,
             patient_id=patient_id,
-            status__in=active_statuses,
-            scheduled_start__date=start_dt.date(),
-        ).order_by('scheduled_start')
-
-        has_duplicate = dup_qs.exists()
-
-        # --- Provider conflict: overlap window ---
-        has_provider_conflict = False
-        provider_conflicts_qs = Appointment.objects.none()
-
-        if provider_id:
-            provider_conflicts_qs = Appointment.objects.filter(
-                clinic=clinic,
-                provider_id=provider_id,
-                status__in=active_statuses,
-                scheduled_start__lt=end_dt,
-            ).filter(
-                Q(scheduled_end__gt=start_dt) | Q(scheduled_end__isnull=True)
-            ).order_by('scheduled_start')
-
-            has_provider_conflict = provider_conflicts_qs.exists()
-
-        elif provider_name:
-            provider_conflicts_qs = Appointment.objects.filter(
-                clinic=clinic,
-                provider_name__iexact=provider_name,
-                status__in=active_statuses,
-                scheduled_start__lt=end_dt,
-            ).filter(
-                Q(scheduled_end__gt=start_dt) | Q(scheduled_end__isnull=True)
-            ).order_by('scheduled_start')
-
-            has_provider_conflict = provider_conflicts_qs.exists()
+            provider_id=provider_id,
+            provider_name=provider_name,
+        )
+        has_duplicate = bool(duplicates)
+        has_provider_conflict = bool(provider_conflicts)
 
         # --- Log conflicts (analytics via AuditLog for now) ---
         if has_duplicate or has_provider_conflict:
@@ -348,8 +430,8 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         return Response({
             'has_duplicate': has_duplicate,
             'has_provider_conflict': has_provider_conflict,
-            'duplicate_matches': AppointmentSerializer(dup_qs[:10], many=True).data,
-            'provider_conflicts': AppointmentSerializer(provider_conflicts_qs[:10], many=True).data,
+            'duplicate_matches': AppointmentSerializer(duplicates, many=True).data,
+            'provider_conflicts': AppointmentSerializer(provider_conflicts, many=True).data,
         })
 
     @action(detail=True, methods=['post'], url_path='checkin')
@@ -357,6 +439,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         appt = self.get_object()
 
         with transaction.atomic():
+            appt_before = appointment_bucket(appt)
             existing = PatientCheckIn.objects.filter(
                 clinic=request.user.clinic,
                 patient=appt.patient,
@@ -366,7 +449,8 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             if existing:
                 if appt.status != 'checked_in':
                     appt.status = 'checked_in'
-                    appt.save(update_fields=['status'])
+                    appt.save(update_fields=['status', 'updated_at'])
+                    record_change(appt_before, appointment_bucket(appt))
 
                 AuditLog.log_action(
                     user=request.user,
@@ -387,9 +471,10 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 checked_in_by=request.user,
                 is_active=True
             )
+            record_checkin_created(checkin, request.user)
 
             appt.status = 'checked_in'
-            appt.save(update_fields=['status'])
+            appt.save(update_fields=['status', 'updated_at'])
 
             AuditLog.log_action(
                 user=request.user,
@@ -405,63 +490,221 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 user_agent=request.META.get('HTTP_USER_AGENT', ''),
             )
 
-            # Optional: Auto-fill room/provider from SurgeryCase schedule (do not block check-in if it fails)
+            # Optional: Auto-fill room/provider from SurgeryCase schedule (do not block check-in if it fails).
+            # Own savepoint, so a failed query here does not break the check-in transaction.
             try:
-                case = SurgeryCase.objects.filter(
-                    clinic=request.user.clinic,
-                    patient=appt.patient,
-                    scheduled_start__date=timezone.localdate(),
-                ).order_by('scheduled_start').first()
+                with transaction.atomic():
+                    case = SurgeryCase.objects.filter(
+                        clinic=request.user.clinic,
+                        patient=appt.patient,
+                        scheduled_start__date=timezone.localdate(),
+                    ).order_by('scheduled_start').first()
 
-                if case:
-                    updates = []
+                    if case:
+                        updates = []
 
-                    if not checkin.room and case.room:
-                        checkin.room = case.room
-                        updates.append('room')
+                        if not checkin.room and case.room:
+                            checkin.room = case.room
+                            updates.append('room')
 
-                    # Put surgeon into provider_name (Live Patients uses provider_name string)
-                    if (not checkin.provider_name) and case.surgeon:
-                        checkin.provider_name = case.surgeon
-                        updates.append('provider_name')
+                        # Put surgeon into provider_name (Live Patients uses provider_name string)
+                        if (not checkin.provider_name) and case.surgeon:
+                            checkin.provider_name = case.surgeon
+                            updates.append('provider_name')
 
-                    if updates:
-                        checkin.save(update_fields=updates)
+                        if updates:
+                            checkin.save(update_fields=updates)
 
-                    # Optional: also fill appointment fields
-                    appt_updates = []
+                        # Optional: also fill appointment fields
+                        appt_updates = []
 
-                    if (not appt.provider_name) and case.surgeon:
-                        appt.provider_name = case.surgeon
-                        appt_updates.append('provider_name')
+                        if (not appt.provider_name) and case.surgeon:
+                            appt.provider_name = case.surgeon
+                            appt_updates.append('provider_name')
 
-                    if (not appt.reason_for_visit) and case.procedure:
-                        appt.reason_for_visit = case.procedure
-                        appt_updates.append('reason_for_visit')
+                        if (not appt.reason_for_visit) and case.procedure:
+                            appt.reason_for_visit = case.procedure
+                            appt_updates.append('reason_for_visit')
 
-                    if appt_updates:
-                        appt.save(update_fields=appt_updates)
+                        if appt_updates:
+                            appt.save(update_fields=appt_updates + ['updated_at'])
 
             except Exception:
-                pass
+                # Rolled back: drop the in-memory autofill so the counters below match the rows.
+                checkin.refresh_from_db()
+                appt.refresh_from_db()
+
+            record_change(None, checkin_bucket(checkin))
+            record_change(appt_before, appointment_bucket(appt))
+            publish_checkin_event(checkin)
 
             return Response({'detail': 'Checked in', 'checkin_id': checkin.id})
 
-class PatientCheckInViewSet(viewsets.ModelViewSet):
+def _conflict_report(conflicts):
+    return [{'series_index': index, 'appointments': ids} for index, ids in sorted(conflicts.items())]
+
+
+class AppointmentSeriesViewSet(viewsets.ModelViewSet):
+    """
+    Recurring appointments. Occurrences are materialized on create and
+    nightly; edit them with update-following instead of PUT/PATCH.
+    """
+    serializer_class = AppointmentSeriesSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    http_method_names = ['get', 'post', 'head', 'options']
+    filterset_fields = ['patient', 'is_active']
+
+    def get_queryset(self):
+        return AppointmentSeries.objects.filter(
+            clinic=self.request.user.clinic
+        ).select_related('patient', 'provider').order_by('-created_at')
+
+    def create(self, request, *args, **kwargs):
+        """?skip_conflicts=true books the non-conflicting occurrences instead of rejecting."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        clinic = request.user.clinic
+        if serializer.validated_data['patient'].clinic_id != clinic.id:
+            return Response({'patient': 'Unknown patient'}, status=400)
+
+        skip_conflicts = request.query_params.get('skip_conflicts', '').lower() in ('1', 'true', 'yes')
+        if not skip_conflicts:
+            draft = AppointmentSeries(clinic=clinic, **serializer.validated_data)
+            horizon = clinic_today(clinic) + timedelta(days=settings.APPOINTMENT_SERIES_HORIZON_DAYS)
+            conflicts = find_series_conflicts(draft, pending_occurrences(draft, horizon))
+            if conflicts:
+                return Response(
+                    {'detail': 'Some occurrences conflict', 'conflicts': _conflict_report(conflicts)},
+                    status=409,
+                )
+
+        try:
+            with transaction.atomic():
+                series = serializer.save(clinic=clinic, created_by=request.user)
+                created, skipped = materialize_series(series)
+        except IntegrityError as exc:
+            # A booking made since the conflict check, caught by the overlap constraint.
+            raise_for_provider_overlap(exc)
+
+        AuditLog.log_action(
+            user=request.user,
+            action='create',
+            resource_type='appointment_series',
+            resource_id=str(series.id),
+            changes={'detail': 'Created appointment series', 'occurrences': len(created)},
+            ip_address=request.META.get('REMOTE_ADDR', ''),
+            user_agent=request.META.get('HTTP_USER_AGENT', ''),
+        )
+
+        series.refresh_from_db()
+        data = dict(self.get_serializer(series).data)
+        data['created_appointments'] = [appt.id for appt in created]
+        data['skipped'] = _conflict_report(skipped)
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'], url_path='update-following')
+    def update_following(self, request, pk=None):
+        """
+        Change occurrence from_index and every later scheduled one.
+        Body: from_index (or appointment id), and any of start_time (HH:MM,
+        clinic-local), duration_minutes, provider, provider_name,
+        reason_for_visit, cancel (true ends the series). force=true applies
+        the change despite conflicts.
+        """
+        series = self.get_object()
+        data = request.data
+
+        from_index = data.get('from_index')
+        if from_index is None and data.get('appointment'):
+            from_index = Appointment.objects.filter(
+                series=series, pk=data['appointment'],
+            ).values_list('series_index', flat=True).first()
+        try:
+            from_index = int(from_index)
+            changes = {}
+            if data.get('start_time'):
+                changes['start_time'] = time.fromisoformat(data['start_time'])
+            if data.get('duration_minutes'):
+                changes['duration_minutes'] = int(data['duration_minutes'])
+                if changes['duration_minutes'] < 1:
+                    raise ValueError
+        except (TypeError, ValueError):
+            return Response({'detail': 'from_index, start_time or duration_minutes invalid'}, status=400)
+
+        if 'provider' in data:
+            changes['provider'] = None
+            if data['provider']:
+                changes['provider'] = Provider.objects.filter(clinic=series.clinic, pk=data['provider']).first()
+                if changes['provider'] is None:
+                    return Response({'provider': 'Unknown provider'}, status=400)
+        for field in ('provider_name', 'reason_for_visit'):
+            if field in data:
+                changes[field] = (data[field] or '').strip()
+        if str(data.get('cancel', '')).lower() in ('1', 'true'):
+            changes['cancel'] = True
+        if not changes:
+            return Response({'detail': 'Nothing to change'}, status=400)
+
+        force = str(data.get('force', '')).lower() in ('1', 'true')
+        if force and provider_overlap_enforced():
+            return Response(
+                {'detail': 'force is not available while the provider overlap constraint is installed'},
+                status=400,
+            )
+        try:
+            updated, conflicts = update_following(series, from_index, changes, force=force)
+        except IntegrityError as exc:
+            raise_for_provider_overlap(exc)
+        if conflicts and not force:
+            return Response(
+                {'detail': 'Some occurrences conflict', 'conflicts': _conflict_report(conflicts)},
+                status=409,
+            )
+
+        AuditLog.log_action(
+            user=request.user,
+            action='update',
+            resource_type='appointment_series',
+            resource_id=str(series.id),
+            changes={
+                'detail': 'Updated this and following occurrences',
+                'from_index': from_index,
+                'fields': sorted(changes),
+                'updated': updated,
+            },
+            ip_address=request.META.get('REMOTE_ADDR', ''),
+            user_agent=request.META.get('HTTP_USER_AGENT', ''),
+        )
+
+        series.refresh_from_db()
+        return Response({'updated': updated, 'series': self.get_serializer(series).data})
+
+
+class PatientCheckInViewSet(DeltaSyncMixin, viewsets.ModelViewSet):
     serializer_class = PatientCheckInSerializer
     permission_classes = [permissions.IsAuthenticated]
+    sync_kind = 'checkin'
     filterset_fields = ['patient', 'status', 'is_active']
 
     def get_queryset(self):
-        return PatientCheckIn.objects.filter(
+        qs = PatientCheckIn.objects.filter(
             clinic=self.request.user.clinic
         ).order_by('-check_in_time')
+        if self.action in ('set_status', 'complete'):
+            # Everything the transition and the response read, in one query;
+            # the check-in row stays locked until the transition commits.
+            qs = qs.select_related('clinic', 'patient', 'appointment__clinic').select_for_update(of=('self',))
+        return qs
 
     def perform_create(self, serializer):
-        serializer.save(
-            clinic=self.request.user.clinic,
-            checked_in_by=self.request.user
-        )
+        with transaction.atomic():
+            checkin = serializer.save(
+                clinic=self.request.user.clinic,
+                checked_in_by=self.request.user
+            )
+            record_checkin_created(checkin, self.request.user)
+            record_change(None, checkin_bucket(checkin))
+            publish_checkin_event(checkin)
 
         @action(detail=False, methods=['get'], url_path='metrics/dashboard')
         def metrics_dashboard(self, request):
@@ -479,6 +722,21 @@ class PatientCheckInViewSet(viewsets.ModelViewSet):
             data = build_dashboard_metrics(request.user.clinic, date_str=date_str)
             return Response(data)
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            before = checkin_bucket(serializer.instance)
+            checkin = serializer.save()
+            record_change(before, checkin_bucket(checkin))
+            # Discharged check-ins have no bucket but still feed the rollups.
+            mark_rollups_dirty([(checkin.clinic_id, checkin_date(checkin))])
+            publish_checkin_event(checkin)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            record_change(checkin_bucket(instance), None)
+            mark_rollups_dirty([(instance.clinic_id, checkin_date(instance))])
+            instance.delete()
+
     @action(detail=False, methods=['get'], url_path='live')
     def live(self, request):
         clinic_tz = ZoneInfo(getattr(request.user.clinic, 'timezone', None) or 'America/Chicago')
@@ -486,85 +744,92 @@ class PatientCheckInViewSet(viewsets.ModelViewSet):
         from datetime import datetime, time as dtime
         start_of_day = datetime.combine(now_local.date(), dtime.min).replace(tzinfo=clinic_tz)
 
-        qs = self.get_queryset().filter(
-            is_active=True,
-            check_in_time__gte=start_of_day,
-        )
-        return Response(self.get_serializer(qs, many=True).data)
-    
-    @action(detail=True, methods=['post'], url_path='set-status')
-    def set_status(self, request, pk=None):
-        obj = self.get_object()
-        new_status = request.data.get('status')
-
-        allowed = {c[0] for c in PatientCheckIn.STATUS_CHOICES}
-        if new_status not in allowed:
-            return Response({'detail': 'Invalid status'}, status=400)
-
-        _apply_checkin_status_transition(
-            checkin=obj,
-            new_status=new_status,
-            actor=request.user
-        )
+        since = request.query_params.get('since')
+        if since is not None:
+            # Include today's deactivated check-ins so clients drop them.
+            return self.delta_response(self.get_queryset().filter(check_in_time__gte=start_of_day), since)
 
-        # Deactivate on discharge
-        if new_status == 'discharged':
-            obj.is_active = False
-            obj.check_out_time = obj.check_out_time or timezone.now()
-            obj.save(update_fields=['is_active', 'check_out_time'])
-      
+        def build():
+            cursor = current_cursor()
+            qs = self.get_queryset().filter(
+                is_active=True,
+                check_in_time__gte=start_of_day,
+            )
+            return {'cursor': cursor, 'results': list(self.get_serializer(qs, many=True).data)}
 
-        # ✅ Sync appointment status if linked
-        # Map PatientCheckIn statuses to valid Appointment statuses
-        APPT_STATUS_MAP = {
-            'checked_in':     'checked_in',
-            'pre_op':         'in_progress',
-            'operating_room': 'in_progress',
-            'pacu':           'in_progress',
-            'discharged':     'completed',
-        }
-        if obj.appointment_id:
-            appt_status = APPT_STATUS_MAP.get(new_status, 'in_progress')
-            obj.appointment.status = appt_status
-            obj.appointment.save(update_fields=['status'])
+        clinic_id = request.user.clinic_id
+        built = {}
 
+        def body():
+            built.update(cached_live_response('checkins-live', clinic_id, now_local.date(), build))
+            return built['results']
 
-        AuditLog.log_action(
-            user=request.user,
-            action='update',
-            resource_type='checkin',
-            resource_id=str(obj.id),
-            changes={'status': new_status, 'appointment_synced': bool(obj.appointment_id)},
-            ip_address=request.META.get('REMOTE_ADDR', ''),
-            user_agent=request.META.get('HTTP_USER_AGENT', ''),
-        )
+        etag = make_etag('checkins-live', clinic_id, data_version(clinic_id), now_local.date())
+        response = conditional_response(request, etag, body)
+        if built:
+            response[CURSOR_HEADER] = str(built['cursor'])
+        return response
+    
+    @action(detail=True, methods=['post'], url_path='set-status')
+    def set_status(self, request, pk=None):
+        """
+        Move the check-in to the next stage of the clinic's workflow.
+        Body: status, from_status (optional; the status the client shows,
+        409 if it has changed since).
+        """
+        try:
+            with transaction.atomic():
+                obj = self.get_object()
+                previous = obj.status
+                changed = transition_checkin(
+                    obj,
+                    request.data.get('status'),
+                    request.user,
+                    expected_status=request.data.get('from_status'),
+                )
+                if changed:
+                    AuditLog.log_action(
+                        user=request.user,
+                        action='update',
+                        resource_type='checkin',
+                        resource_id=str(obj.id),
+                        changes={'status': obj.status, 'from_status': previous, 'appointment_synced': bool(obj.appointment_id)},
+                        ip_address=request.META.get('REMOTE_ADDR', ''),
+                        user_agent=request.META.get('HTTP_USER_AGENT', ''),
+                    )
+        except StaleTransition as exc:
+            return Response({'detail': str(exc), 'status': exc.current_status}, status=409)
+        except TransitionError as exc:
+            return Response({'detail': str(exc)}, status=400)
 
         return Response(self.get_serializer(obj).data)
 
     @action(detail=True, methods=['post'], url_path='complete')
     def complete(self, request, pk=None):
-        obj = self.get_object()
-
-        obj.status = 'discharged'
-        obj.status_changed_at = timezone.now()
-        obj.is_active = False
-        obj.check_out_time = timezone.now()
-        obj.save(update_fields=['status', 'status_changed_at', 'is_active', 'check_out_time'])
-
-        # ✅ Sync appointment status if linked
-        if obj.appointment_id:
-            obj.appointment.status = 'discharged'
-            obj.appointment.save(update_fields=['status'])
-
-        AuditLog.log_action(
-            user=request.user,
-            action='update',
-            resource_type='checkin',
-            resource_id=str(obj.id),
-            changes={'status': 'discharged', 'is_active': False, 'appointment_synced': bool(obj.appointment_id)},
-            ip_address=request.META.get('REMOTE_ADDR', ''),
-            user_agent=request.META.get('HTTP_USER_AGENT', ''),
-        )
+        try:
+            with transaction.atomic():
+                obj = self.get_object()
+                previous = obj.status
+                changed = transition_checkin(obj, 'discharged', request.user, any_stage=True)
+                if changed:
+                    AuditLog.log_action(
+                        user=request.user,
+                        action='update',
+                        resource_type='checkin',
+                        resource_id=str(obj.id),
+                        changes={
+                            'status': 'discharged',
+                            'from_status': previous,
+                            'is_active': False,
+                            'appointment_synced': bool(obj.appointment_id),
+                        },
+                        ip_address=request.META.get('REMOTE_ADDR', ''),
+                        user_agent=request.META.get('HTTP_USER_AGENT', ''),
+                    )
+        except StaleTransition as exc:
+            return Response({'detail': str(exc), 'status': exc.current_status}, status=409)
+        except TransitionError as exc:
+            return Response({'detail': str(exc)}, status=400)
 
         return Response(self.get_serializer(obj).data)
 
@@ -0,0 +1,154 @@
+"""
+Check-in status transitions (POST /api/checkins/{id}/set-status/ and /complete/).
+
+A clinic's workflow is the PatientCheckIn stages in order, minus any stage
+its workflow_labels switch off with an empty label, e.g.
+{"operating_room": null} for a clinic without an OR; checked_in and
+discharged are always on. set-status moves to the next enabled stage only;
+complete discharges from any stage.
+
+A transition is one transaction: a compare-and-set UPDATE of the check-in
+(matching the status and status_changed_at that were read, so two users
+moving the same patient cannot both win), the CheckInStatusEvent INSERT,
+a locked re-read and UPDATE of the linked appointment and one counter
+upsert. The views load the check-in with clinic, patient and appointment
+(select_related) under select_for_update inside the same transaction, so
+nothing is fetched lazily and the audit row commits with the move.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from scheduling.counters import appointment_bucket, checkin_bucket, record_changes
+from scheduling.live_events import publish_checkin_event
+from scheduling.models import Appointment, CheckInStatusEvent, PatientCheckIn
+
+CHECKIN_STAGES = [value for value, _ in PatientCheckIn.STATUS_CHOICES]
+REQUIRED_STAGES = {'checked_in', 'discharged'}
+
+STAGE_TIMESTAMPS = {
+    'pre_op': 'pre_op_at',
+    'operating_room': 'operating_room_at',
+    'pacu': 'pacu_at',
+    'discharged': 'discharged_at',
+}
+
+# Linked Appointment status for each check-in stage.
+APPOINTMENT_STATUS = {
+    'checked_in': 'checked_in',
+    'pre_op': 'in_progress',
+    'operating_room': 'in_progress',
+    'pacu': 'in_progress',
+    'discharged': 'completed',
+}
+
+
+class TransitionError(ValueError):
+    pass
+
+
+class StaleTransition(TransitionError):
+    """The check-in was moved by someone else since it was read."""
+
+    def __init__(self, message, current_status):
+        super().__init__(message)
+        self.current_status = current_status
+
+
+def checkin_workflow(clinic):
+    """Enabled stages, in order, for the clinic."""
+    labels = clinic.workflow_labels if isinstance(clinic.workflow_labels, dict) else {}
+    return [stage for stage in CHECKIN_STAGES if stage in REQUIRED_STAGES or labels.get(stage, True)]
+
+
+def next_stage(workflow, status):
+    """The stage set-status may move to from status, or None."""
+    position = CHECKIN_STAGES.index(status)
+    later = [stage for stage in workflow if CHECKIN_STAGES.index(stage) > position]
+    return later[0] if later else None
+
+
+def record_checkin_created(checkin, actor):
+    """The event a new check-in's stream starts with (call in its transaction)."""
+    CheckInStatusEvent.objects.create(
+        clinic_id=checkin.clinic_id,
+        checkin=checkin,
+        status=checkin.status,
+        occurred_at=checkin.check_in_time,
+        actor=actor,
+    )
+
+
+def transition_checkin(checkin, new_status, actor, expected_status=None, any_stage=False):
+    """
+    Move checkin to new_status. expected_status, when given, is the status
+    the caller last saw; any_stage allows discharging from any stage.
+
+    Returns False (and writes nothing) if the check-in already has
+    new_status, True after a transition. Raises TransitionError for a move
+    the clinic's workflow does not allow, StaleTransition if the check-in
+    changed underneath.
+    """
+    if new_status not in CHECKIN_STAGES:
+        raise TransitionError('Invalid status')
+    if checkin.status == new_status:
+        return False
+    if expected_status and expected_status != checkin.status:
+        raise StaleTransition(f"Check-in is now '{checkin.status}', not '{expected_status}'", checkin.status)
+    if not checkin.is_active or checkin.status == 'discharged':
+        raise TransitionError('Check-in is already closed')
+
+    if any_stage:
+        allowed = new_status == 'discharged'
+    else:
+        allowed = new_status == next_stage(checkin_workflow(checkin.clinic), checkin.status)
+    if not allowed:
+        raise TransitionError(f"Cannot move from '{checkin.status}' to '{new_status}'")
+
+    now = timezone.now()
+    checkin_before = checkin_bucket(checkin)
+    fields = {'status': new_status, 'status_changed_at': now}
+    stamp = STAGE_TIMESTAMPS.get(new_status)
+    if stamp and getattr(checkin, stamp) is None:
+        fields[stamp] = now
+    if new_status == 'discharged':
+        fields['is_active'] = False
+        fields['check_out_time'] = checkin.check_out_time or now
+
+    with transaction.atomic():
+        moved = PatientCheckIn.objects.filter(
+            pk=checkin.pk, status=checkin.status, status_changed_at=checkin.status_changed_at,
+        ).update(**fields)
+        if not moved:
+            current = PatientCheckIn.objects.filter(pk=checkin.pk).values_list('status', flat=True).first()
+            raise StaleTransition('Check-in was updated by someone else; reload and retry', current)
+        for name, value in fields.items():
+            setattr(checkin, name, value)
+
+        CheckInStatusEvent.objects.create(
+            clinic_id=checkin.clinic_id,
+            checkin=checkin,
+            status=new_status,
+            occurred_at=now,
+            actor=actor,
+        )
+
+        changes = [(checkin_before, checkin_bucket(checkin))]
+        if checkin.appointment_id:
+            # Other writers (check-in, series edits) update it without the
+            # check-in lock: lock it and count from its current state.
+            appointment = (
+                Appointment.objects.select_for_update(of=('self',)).select_related('clinic')
+                .get(pk=checkin.appointment_id)
+            )
+            appointment_status = APPOINTMENT_STATUS[new_status]
+            if appointment.status != appointment_status:
+                appointment_before = appointment_bucket(appointment)
+                appointment.status = appointment_status
+                appointment.save(update_fields=['status', 'updated_at'])
+                changes.append((appointment_before, appointment_bucket(appointment)))
+            checkin.appointment = appointment
+        record_changes(changes)
+
+        publish_checkin_event(checkin)
+    return True
@@ -1,16 +1,18 @@
-import React, { useEffect, useMemo, useState } from 'react';
+import React, { useEffect, useMemo, useRef, useState } from 'react';
 import { useNavigate } from 'react-router-dom';
 import api from '../services/api';
 import { statusLabel as importedStatusLabel, statusPillClass } from '../utils/status';
 
+const POLL_MS = 30000;
+const MAX_RECONNECT_MS = 300000;
+
 const STATUS_ORDER = ['checked_in', 'pre_op', 'operating_room', 'pacu', 'discharged'];
 
-const NEXT_ALLOWED = {
-  checked_in:     new Set(['pre_op']),
-  pre_op:         new Set(['operating_room']),
-  operating_room: new Set(['pacu']),
-  pacu:           new Set(['discharged']),
-  discharged:     new Set([]),
+// Next stage in the clinic's workflow (stages it has switched off are skipped)
+const nextStage = (workflow, status) => {
+  const position = STATUS_ORDER.indexOf(status);
+  if (position === -1) return null;
+  return workflow.find((s) => STATUS_ORDER.indexOf(s) > position) || null;
 };
 
 function formatDuration(ms) {
@@ -23,6 +25,27 @@ function formatDuration(ms) {
   return `${hrs}h ${min}m`;
 }
 
+// Apply one push event from /api/live/events/ to the board
+function applyLiveEvent(items, event) {
+  if (event.type === 'remove') return items.filter((c) => c.id !== event.id);
+  if (event.type === 'upsert') {
+    const exists = items.some((c) => c.id === event.checkin.id);
+    return exists
+      ? items.map((c) => (c.id === event.checkin.id ? event.checkin : c))
+      : [event.checkin, ...items];
+  }
+  return items;
+}
+
+// Apply a ?since= delta from /checkins/live/ to the board
+function applyLiveDelta(items, { results, deleted }) {
+  let next = items.filter((c) => !deleted.includes(c.id));
+  results.forEach((c) => {
+    next = applyLiveEvent(next, c.is_active ? { type: 'upsert', checkin: c } : { type: 'remove', id: c.id });
+  });
+  return next;
+}
+
 function LivePatients() {
   const navigate = useNavigate();
 
@@ -35,9 +58,11 @@ function LivePatients() {
     discharged:     'Discharged',
   });
 
+  const [workflow, setWorkflow] = useState(STATUS_ORDER);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [nowTick, setNowTick] = useState(Date.now());
+  const cursorRef = useRef(null);
 
   const fetchLive = async () => {
     try {
@@ -45,6 +70,7 @@ function LivePatients() {
       setLoading(true);
       const res = await api.get('/checkins/live/');
       setItems(res.data || []);
+      cursorRef.current = res.headers['x-sync-cursor'] || null;
     } catch (err) {
       console.error('Failed to load live patients', err);
       setError('Failed to load live patients.');
@@ -53,20 +79,111 @@ function LivePatients() {
     }
   };
 
+  // Only fetch what changed since the last load
+  const syncLive = async () => {
+    if (!cursorRef.current) return fetchLive();
+    try {
+      const res = await api.get('/checkins/live/', { params: { since: cursorRef.current } });
+      setItems((prev) => applyLiveDelta(prev, res.data));
+      cursorRef.current = res.data.cursor;
+    } catch (err) {
+      // 410: too far behind for a delta, reload the board
+      if (err.response?.status === 410) return fetchLive();
+      console.error('Failed to sync live patients', err);
+    }
+  };
+
   useEffect(() => {
     fetchLive();
     const tick = setInterval(() => setNowTick(Date.now()), 15000);
-    const refresh = setInterval(() => fetchLive(), 30000);
-    return () => { clearInterval(tick); clearInterval(refresh); };
+    return () => clearInterval(tick);
+  }, []);
+
+  // Push channel, with 30s polling whenever it is not connected (WSGI
+  // deployments have no stream, networks drop, tickets expire).
+  useEffect(() => {
+    let source = null;
+    let poll = null;
+    let reconnect = null;
+    let retryMs = 5000;
+    let stopped = false;
+
+    const startPolling = () => {
+      if (!poll) poll = setInterval(() => syncLive(), POLL_MS);
+    };
+    const stopPolling = () => {
+      clearInterval(poll);
+      poll = null;
+    };
+    const scheduleReconnect = () => {
+      reconnect = setTimeout(connect, retryMs);
+      retryMs = Math.min(retryMs * 2, MAX_RECONNECT_MS);
+    };
+
+    async function connect() {
+      if (stopped) return;
+      let ticket;
+      try {
+        // Single-use ticket, so the JWT never goes in the stream URL
+        const res = await api.post('/live/ticket/');
+        ticket = res.data.ticket;
+      } catch (err) {
+        console.error('Failed to get live events ticket', err);
+        scheduleReconnect();
+        return;
+      }
+      if (stopped) return;
+
+      source = new EventSource(`${api.defaults.baseURL}live/events/?ticket=${encodeURIComponent(ticket)}`);
+      source.onopen = () => {
+        retryMs = 5000;
+        stopPolling();
+        // Catch up on anything missed while disconnected, then apply diffs
+        syncLive();
+      };
+      source.onmessage = (e) => {
+        try {
+          const event = JSON.parse(e.data);
+          setItems((prev) => applyLiveEvent(prev, event));
+        } catch (err) {
+          console.error('Bad live event', err);
+        }
+      };
+      source.onerror = () => {
+        // The ticket is spent; reconnect with a new one instead of letting EventSource retry
+        source.close();
+        startPolling();
+        scheduleReconnect();
+      };
+    }
+
+    startPolling();
+    if (typeof EventSource !== 'undefined') connect();
+    return () => {
+      stopped = true;
+      stopPolling();
+      clearTimeout(reconnect);
+      if (source) source.close();
+    };
+  }, []);
+
+  useEffect(() => {
+    api.get('/clinic/config/')
+      .then((res) => {
+        if (Array.isArray(res.data?.workflow)) setWorkflow(res.data.workflow);
+      })
+      .catch((err) => console.error('Failed to load clinic workflow', err));
   }, []);
 
-  const setStatus = async (checkinId, status) => {
+  const setStatus = async (checkin, status) => {
     try {
-      await api.post(`/checkins/${checkinId}/set-status/`, { status });
-      await fetchLive();
+      // from_status: the server answers 409 if someone moved this patient first
+      await api.post(`/checkins/${checkin.id}/set-status/`, { status, from_status: checkin.status });
+      await syncLive();
     } catch (err) {
       console.error('Failed to set status', err);
-      alert('Failed to update status.');
+      alert(err.response?.data?.detail || 'Failed to update status.');
+      if (err.response?.status === 409) await syncLive();
     }
   };
 
@@ -82,7 +199,7 @@ function LivePatients() {
 
   const canGoTo = (currentStatus, targetStatus) => {
     if (!currentStatus) return false;
-    return NEXT_ALLOWED[currentStatus]?.has(targetStatus) || false;
+    return nextStage(workflow, currentStatus) === targetStatus;
   };
 
   const timeInStatus = (row) => {
@@ -195,12 +312,12 @@ function LivePatients() {
                         {labels[c.status] || c.status || '—'}
                       </span>
                       <div className="flex flex-wrap gap-2">
-                        {BUTTONS.map(({ status, label, color }) => {
+                        {BUTTONS.filter(({ status }) => workflow.includes(status)).map(({ status, label, color }) => {
                           const disabled = !canGoTo(c.status, status);
                           return (
                             <button
                               key={status}
-                              onClick={() => setStatus(c.id, status)}
+                              onClick={() => setStatus(c, status)}
                               disabled={disabled}
                               className={btnClass(color, disabled)}
                             >
@@ -4,6 +4,7 @@ import { Calendar, dateFnsLocalizer } from 'react-big-calendar';
 import { format, parse, startOfWeek, getDay } from 'date-fns';
 import 'react-big-calendar/lib/css/react-big-calendar.css';
 import api from '../services/api';
+import { badgeTooltip, fetchCalendarSummary, parseLocalDate, summaryBadges } from '../utils/calendarSummary';
 
 const locales = {
   'en-US': require('date-fns/locale/en-US'),
@@ -20,12 +21,23 @@ const localizer = dateFnsLocalizer({
 function ScheduleCalendar() {
   const navigate = useNavigate();
   const [items, setItems] = useState([]);
-  const [range, setRange] = useState({ start: null, end: null });
+  const [badges, setBadges] = useState([]);
+  const [range, setRange] = useState({ start: null, end: null, view: 'week' });
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
 
   const events = useMemo(() => {
-    return (items || []).map((a) => ({
+    // Month view: per-day status counts from /appointments/summary/
+    const badgeEvents = (badges || []).map((b) => ({
+      id: `count-${b.date}-${b.status}`,
+      title: b.title,
+      start: parseLocalDate(b.date),
+      end: parseLocalDate(b.date),
+      allDay: true,
+      resource: { badge: b },
+    }));
+
+    return badgeEvents.concat((items || []).map((a) => ({
       id: a.id,
       title:
         (a.patient_name ? a.patient_name : 'Appointment') +
@@ -34,8 +46,8 @@ function ScheduleCalendar() {
       end: a.scheduled_end ? new Date(a.scheduled_end) : new Date(new Date(a.scheduled_start).getTime() + 30 * 60000),
       resource: a,
       resourceId: (a.provider_name || '').trim() || 'Unassigned',  
-    }));
-  }, [items]);
+    })));
+  }, [items, badges]);
 
   const resources = useMemo(() => {
     const set = new Set();
@@ -51,11 +63,18 @@ function ScheduleCalendar() {
     }));
   }, [items]);
 
-  const fetchRange = async (start, end) => {
+  const fetchRange = async (start, end, view) => {
     try {
       setError('');
       setLoading(true);
 
+      if (view === 'month') {
+        // The month grid only needs counts; end is the last visible day.
+        setBadges(summaryBadges(await fetchCalendarSummary(api, start, end)));
+        setItems([]);
+        return;
+      }
+
       const qs = new URLSearchParams({
         start: start.toISOString(),
         end: end.toISOString(),
@@ -63,6 +82,7 @@ function ScheduleCalendar() {
 
       const res = await api.get(`/appointments/range/?${qs.toString()}`);
       setItems(Array.isArray(res.data) ? res.data : []);
+      setBadges([]);
     } catch (e) {
       console.error(e);
       setError('Failed to load calendar appointments.');
@@ -73,19 +93,20 @@ function ScheduleCalendar() {
 
   useEffect(() => {
     if (range.start && range.end) {
-      fetchRange(range.start, range.end);
+      fetchRange(range.start, range.end, range.view);
     }
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [range.start?.toISOString?.(), range.end?.toISOString?.()]);
+  }, [range.start?.toISOString?.(), range.end?.toISOString?.(), range.view]);
 
-  const onRangeChange = (r) => {
+  const onRangeChange = (r, view) => {
     // react-big-calendar gives different shapes depending on view
+    const nextView = view || range.view;
     if (Array.isArray(r) && r.length > 0) {
-      setRange({ start: r[0], end: r[r.length - 1] });
+      setRange({ start: r[0], end: r[r.length - 1], view: nextView });
       return;
     }
     if (r?.start && r?.end) {
-      setRange({ start: r.start, end: r.end });
+      setRange({ start: r.start, end: r.end, view: nextView });
       return;
     }
   };
@@ -98,6 +119,7 @@ function ScheduleCalendar() {
   };
 
   const handleSelectEvent = (event) => {
+    if (event.resource?.badge) return;
     navigate('/schedule/today');
   };
 
@@ -160,6 +182,7 @@ function ScheduleCalendar() {
             onSelectSlot={handleSelectSlot}
             onSelectEvent={handleSelectEvent}
             onRangeChange={onRangeChange}
+            tooltipAccessor={(e) => (e.resource?.badge ? badgeTooltip(e.resource.badge) : e.title)}
           />
         </div>
 
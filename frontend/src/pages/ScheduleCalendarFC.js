@@ -7,10 +7,12 @@ import interactionPlugin from '@fullcalendar/interaction';
 import resourceTimeGridPlugin from '@fullcalendar/resource-timegrid';
 import api from '../services/api';
 import { calendarColors, statusLabel } from '../utils/status';
+import { badgeTooltip, fetchCalendarSummary, summaryBadges } from '../utils/calendarSummary';
 
 function ScheduleCalendarFC() {
   const navigate = useNavigate();
   const [items, setItems] = useState([]);
+  const [badges, setBadges] = useState([]);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
 
@@ -58,18 +60,41 @@ function ScheduleCalendarFC() {
         resourceId: (a.provider_name || '').trim() || 'Unassigned',
       }));
 
+    // Month view: per-day status counts from /appointments/summary/
+    const badgeEventsArr = (badges || []).map((b) => {
+      const colors = calendarColors(b.status);
+      return {
+        id: `count-${b.date}-${b.status}`,
+        title: b.title,
+        start: b.date,
+        allDay: true,
+        extendedProps: { badge: b },
+        backgroundColor: colors.backgroundColor,
+        borderColor: colors.borderColor,
+        textColor: colors.textColor,
+      };
+    });
+
     return {
       resources: resourcesArr,
-      events: eventsArr,
+      events: [...eventsArr, ...badgeEventsArr],
       overlayEvents: overlayEventsArr,
     };
-  }, [items]);
+  }, [items, badges]);
 
-  const fetchRange = async (start, end) => {
+  const fetchRange = async (start, end, viewType) => {
     try {
       setError('');
       setLoading(true);
 
+      if (viewType === 'dayGridMonth') {
+        // end is exclusive; the month grid only needs counts
+        const lastDay = new Date(end.getFullYear(), end.getMonth(), end.getDate() - 1);
+        setBadges(summaryBadges(await fetchCalendarSummary(api, start, lastDay)));
+        setItems([]);
+        return;
+      }
+
       const qs = new URLSearchParams({
         start: start.toISOString(),
         end: end.toISOString(),
@@ -77,6 +102,7 @@ function ScheduleCalendarFC() {
 
       const res = await api.get(`/appointments/range/?${qs.toString()}`);
       setItems(Array.isArray(res.data) ? res.data : []);
+      setBadges([]);
     } catch (e) {
       console.error(e);
       setError('Failed to load calendar appointments.');
@@ -141,10 +167,14 @@ function ScheduleCalendarFC() {
           editable={false}
           resources={resources}
           events={[...overlayEvents, ...events]}
-          datesSet={(arg) => fetchRange(arg.start, arg.end)}
+          datesSet={(arg) => fetchRange(arg.start, arg.end, arg.view.type)}
 
           eventDidMount={(info) => {
             const a = info.event.extendedProps || {};
+            if (a.badge) {
+              info.el.title = badgeTooltip(a.badge);
+              return;
+            }
 
             const who = a.patient_name || 'Appointment';
             const provider = a.provider_display_name || a.provider_name || 'Unassigned';
@@ -157,6 +187,11 @@ function ScheduleCalendarFC() {
             navigate(`/schedule/new?scheduled_start=${encodeURIComponent(info.dateStr)}`);
           }}
           eventClick={(info) => {
+            const { badge } = info.event.extendedProps || {};
+            if (badge) {
+              info.view.calendar.changeView('timeGridDay', badge.date);
+              return;
+            }
             navigate('/schedule/today');
           }}
         />
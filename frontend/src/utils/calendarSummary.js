@@ -0,0 +1,38 @@
+import { statusLabel } from './status';
+
+// YYYY-MM-DD for a local Date (the calendar grid's days).
+export const localDateString = (d) =>
+  `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-${String(d.getDate()).padStart(2, '0')}`;
+
+// Parse YYYY-MM-DD as a local midnight, not UTC.
+export const parseLocalDate = (value) => {
+  const [y, m, d] = value.split('-').map(Number);
+  return new Date(y, m - 1, d);
+};
+
+// GET /appointments/summary/ for the inclusive local dates start..end.
+export const fetchCalendarSummary = async (api, start, end) => {
+  const qs = new URLSearchParams({
+    start: localDateString(start),
+    end: localDateString(end),
+  });
+  const res = await api.get(`/appointments/summary/?${qs.toString()}`);
+  return Array.isArray(res.data?.days) ? res.data.days : [];
+};
+
+// One badge per day and status: { date, status, count, providers: [[name, n], ...] }.
+export const summaryBadges = (days) =>
+  (days || []).flatMap((day) =>
+    Object.entries(day.by_status || {}).map(([status, count]) => ({
+      date: day.date,
+      status,
+      count,
+      title: `${count} ${statusLabel(status)}`,
+      providers: Object.entries(day.by_provider || {})
+        .filter(([, counts]) => counts[status])
+        .map(([name, counts]) => [name || 'Unassigned', counts[status]]),
+    }))
+  );
+
+export const badgeTooltip = (badge) =>
+  [`${badge.title} on ${badge.date}`, ...badge.providers.map(([name, n]) => `${name}: ${n}`)].join('\n');
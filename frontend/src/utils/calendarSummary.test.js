@@ -0,0 +1,27 @@
+import { badgeTooltip, localDateString, parseLocalDate, summaryBadges } from './calendarSummary';
+
+test('one badge per day and status, with per-provider counts', () => {
+  const badges = summaryBadges([
+    {
+      date: '2026-03-02',
+      total: 3,
+      by_status: { scheduled: 2, cancelled: 1 },
+      by_provider: { 'Dr Lee': { scheduled: 2 }, '': { cancelled: 1 } },
+    },
+  ]);
+
+  expect(badges).toEqual([
+    { date: '2026-03-02', status: 'scheduled', count: 2, title: '2 Scheduled', providers: [['Dr Lee', 2]] },
+    { date: '2026-03-02', status: 'cancelled', count: 1, title: '1 Cancelled', providers: [['Unassigned', 1]] },
+  ]);
+  expect(badgeTooltip(badges[1])).toBe('1 Cancelled on 2026-03-02\nUnassigned: 1');
+});
+
+test('missing or partial days give no badges', () => {
+  expect(summaryBadges(null)).toEqual([]);
+  expect(summaryBadges([{ date: '2026-03-02' }])).toEqual([]);
+});
+
+test('local dates round-trip without a UTC shift', () => {
+  expect(localDateString(parseLocalDate('2026-03-08'))).toBe('2026-03-08');
+});